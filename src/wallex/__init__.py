@@ -1,6 +1,10 @@
 from . import wallex_deprecated
 
-from .clients import Client, AsyncClient
+from .clients import (
+    Client, AsyncClient, TransportConfig, ConnectorConfig, ResponseCache, RateLimiter, RetryPolicy, HedgePolicy
+)
+
+from .decoders import set_json_decoder
 
 from ._package_data import __version__
 
@@ -8,4 +12,11 @@ from ._package_data import __version__
 __all__ = [
     'Client',
     'AsyncClient',
+    'TransportConfig',
+    'ConnectorConfig',
+    'ResponseCache',
+    'RateLimiter',
+    'RetryPolicy',
+    'HedgePolicy',
+    'set_json_decoder',
 ]
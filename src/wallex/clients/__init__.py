@@ -1,9 +1,20 @@
 from .base import BaseClient
 from .main import Client, AsyncClient
+from .transport import TransportConfig, ConnectorConfig
+from .cache import ResponseCache
+from .ratelimit import RateLimiter
+from .retry import RetryPolicy
+from .hedging import HedgePolicy
 
 
 __all__ = [
     'BaseClient',
     'Client',
-    'AsyncClient'
+    'AsyncClient',
+    'TransportConfig',
+    'ConnectorConfig',
+    'ResponseCache',
+    'RateLimiter',
+    'RetryPolicy',
+    'HedgePolicy',
 ]
@@ -1,10 +1,17 @@
+import math
 import typing as t
 from abc import ABC, abstractmethod
 
 import requests
 
 
+from .. import streaming
 from ..enums import Resolution
+from ..models import OHLC
+from ..orderbook import OrderBook
+from .cache import ResponseCache
+from .ratelimit import RateLimiter
+from .retry import RetryPolicy
 
 
 __all__ = [
@@ -19,6 +26,8 @@ class BaseClient(ABC):
 
     REQUEST_TIMEOUT: float = 10
 
+    OPEN_ORDERS_PAGE_SIZE = 200
+
     SIDE_BUY = 'BUY'
     SIDE_SELL = 'SELL'
 
@@ -31,13 +40,50 @@ class BaseClient(ABC):
     ORDER_TYPE_LIMIT_MAKER = 'LIMIT_MAKER'
 
     def __init__(
-            self, api_key: t.Optional[str] = None, requests_params: t.Optional[t.Dict[str, str]] = None,
+            self,
+            api_key: t.Optional[str] = None,
+            requests_params: t.Optional[t.Dict[str, str]] = None,
+            cache: t.Optional[ResponseCache] = None,
+            stream_parse: bool = False,
+            rate_limiter: t.Optional[RateLimiter] = None,
+            retry_policy: t.Optional[RetryPolicy] = None,
     ):
         self.API_KEY = api_key
 
         self._requests_params = requests_params
+        self.cache = cache
+        self.stream_parse = stream_parse
+        self.rate_limiter = rate_limiter
+        self.retry_policy = retry_policy
         self.session = self._init_session()
 
+    def invalidate_cache(self, path: t.Optional[str] = None):
+        if self.cache is not None:
+            self.cache.invalidate(path)
+
+    def _is_cacheable(self, method: str, path: str) -> bool:
+        return self.cache is not None and method == 'get' and self.cache.ttl_for(path) is not None
+
+    def _is_retryable(self, method: str, path: str, kwargs: t.Dict) -> bool:
+        return self.retry_policy is not None and self.retry_policy.is_idempotent(method, path, kwargs)
+
+    def _report_rate_limit(self, signed: bool, status_code: int, response=None, sent: t.Optional[float] = None):
+        if self.rate_limiter is None:
+            return
+
+        retry_after = None
+        if status_code == 429 and response is not None:
+            try:
+                retry_after = float(response.headers.get('Retry-After'))
+            except (AttributeError, TypeError, ValueError):
+                retry_after = None
+
+        self.rate_limiter.feedback(signed, status_code, retry_after, sent)
+
+    def _can_project(self, path: str) -> bool:
+        # a cached full payload beats parsing a fresh one, however cheaply
+        return self.stream_parse and streaming.is_available() and not self._is_cacheable('get', path)
+
     @staticmethod
     def _get_kwargs(locals_: t.Dict, del_keys: t.List[str] = None, del_nones: bool = False) -> t.Dict:
         _del_keys = ['self', 'cls']
@@ -57,6 +103,17 @@ class BaseClient(ABC):
         }
         return headers
 
+    def _request_key(self, method: str, uri: str, signed: bool, **kwargs) -> t.Tuple:
+        params = kwargs.get('params')
+        if isinstance(params, dict):
+            params = tuple(sorted((str(key), str(value)) for key, value in params.items()))
+
+        projection = kwargs.get('projection')
+        if projection is not None:
+            projection = (projection[0], tuple(sorted(projection[1])))
+
+        return method, uri, params, projection, self.API_KEY if signed else None
+
     def _create_api_uri(self, path: str, version: str = PUBLIC_API_VERSION) -> str:
         return self.API_URL + '/' + version + '/' + path
 
@@ -106,6 +163,44 @@ class BaseClient(ABC):
 
             return result_
 
+    @classmethod
+    def _narrowed(cls, response: t.Dict, path: t.Tuple[str, ...], *pick: str) -> t.Dict:
+        # a response with fresh containers along `path` and only the picked items of the collection at
+        # its end, without touching `response` (which may be cached); everything else is shared with it
+        if not path:
+            return cls._pick(response, *pick)
+        narrowed = dict(response)
+        narrowed[path[0]] = cls._narrowed(response[path[0]], path[1:], *pick)
+        return narrowed
+
+    @staticmethod
+    def _total_pages(response: t.Dict, per_page: int) -> t.Optional[int]:
+        result_info = response.get('result_info')
+        if result_info is None and isinstance(response.get('result'), dict):
+            result_info = response['result'].get('result_info')
+
+        try:
+            return max(1, math.ceil(int(result_info['total_count']) / per_page))
+        except (KeyError, TypeError, ValueError):
+            return None
+
+    @staticmethod
+    def _order_matches(order: t.Dict, symbol: str = None, side: str = None) -> bool:
+        return (symbol is None or order['symbol'] == symbol) and (side is None or order['side'] == side)
+
+    @staticmethod
+    def _record_cancellations(
+            report: t.Dict, order_ids: t.List[str], results: t.List[t.Union[t.Dict, Exception]]
+    ) -> t.Dict:
+        for order_id, result in zip(order_ids, results):
+            if isinstance(result, BaseException):
+                report['failed'][order_id] = result
+            else:
+                report['failed'].pop(order_id, None)
+                if order_id not in report['cancelled']:
+                    report['cancelled'].append(order_id)
+        return report
+
     @abstractmethod
     def _init_session(self) -> requests.Session:
         raise NotImplementedError('_init_session not implemented')
@@ -157,6 +252,10 @@ class BaseClient(ABC):
     def get_orderbook(self, symbol: str) -> t.Dict:
         raise NotImplementedError('get_orderbook not implemented')
 
+    @abstractmethod
+    def get_depth(self, symbol: str) -> OrderBook:
+        raise NotImplementedError('get_depth not implemented')
+
     @abstractmethod
     def get_recent_trades(self, symbol: str = 'None', page: int = 1) -> t.Dict:
         raise NotImplementedError('get_recent_trades not implemented')
@@ -167,6 +266,17 @@ class BaseClient(ABC):
     ) -> t.Dict:
         raise NotImplementedError('get_ohlc_data not implemented')
 
+    @abstractmethod
+    def get_ohlc(self, symbol: str, resolution: Resolution, from_date: int, to_date: int) -> OHLC:
+        raise NotImplementedError('get_ohlc not implemented')
+
+    @abstractmethod
+    def download_ohlc_data(
+            self, symbol: str, resolution: Resolution, from_date: int, to_date: int,
+            max_bars: int = 1000, max_concurrency: int = 8
+    ) -> t.Dict:
+        raise NotImplementedError('download_ohlc_data not implemented')
+
     @abstractmethod
     def get_profile(self) -> t.Dict:
         raise NotImplementedError('get_profile not implemented')
@@ -217,6 +327,12 @@ class BaseClient(ABC):
     ) -> t.Dict:
         raise NotImplementedError('create_order not implemented')
 
+    @abstractmethod
+    def create_orders(
+            self, orders: t.List[t.Dict[str, t.Any]], max_concurrency: int = 10
+    ) -> t.List[t.Union[t.Dict, Exception]]:
+        raise NotImplementedError('create_orders not implemented')
+
     @abstractmethod
     def order_market(self, symbol: str, side: str, quantity: float, client_id: str = None) -> t.Dict:
         raise NotImplementedError('order_market not implemented')
@@ -245,6 +361,12 @@ class BaseClient(ABC):
     def cancel_order(self, order_id: str) -> t.Dict:
         raise NotImplementedError('cancel_order not implemented')
 
+    @abstractmethod
+    def cancel_all_orders(
+            self, symbol: str = None, side: str = None, max_concurrency: int = 20, max_rounds: int = 3
+    ) -> t.Dict:
+        raise NotImplementedError('cancel_all_orders not implemented')
+
     @abstractmethod
     def get_open_orders(
             self, symbol: str = None, side: str = None, page: int = 1
@@ -257,6 +379,25 @@ class BaseClient(ABC):
     ) -> t.Dict:
         raise NotImplementedError('get_user_recent_trades not implemented')
 
+    @abstractmethod
+    def iter_open_orders(
+            self, symbol: str = None, side: str = None, per_page: int = OPEN_ORDERS_PAGE_SIZE, max_concurrency: int = 4
+    ) -> t.Iterator[t.Dict]:
+        raise NotImplementedError('iter_open_orders not implemented')
+
+    @abstractmethod
+    def iter_recent_trades(
+            self, symbol: str = None, per_page: int = 200, max_concurrency: int = 4
+    ) -> t.Iterator[t.Dict]:
+        raise NotImplementedError('iter_recent_trades not implemented')
+
+    @abstractmethod
+    def iter_user_recent_trades(
+            self, symbol: str = None, side: str = None, active: bool = None, per_page: int = 200,
+            max_concurrency: int = 4
+    ) -> t.Iterator[t.Dict]:
+        raise NotImplementedError('iter_user_recent_trades not implemented')
+
     @abstractmethod
     def get_order_status(self, order_id: str) -> t.Dict:
         raise NotImplementedError('get_order_status not implemented')
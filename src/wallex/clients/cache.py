@@ -0,0 +1,144 @@
+import threading
+import time
+import typing as t
+from collections import OrderedDict
+
+
+__all__ = [
+    'ResponseCache',
+]
+
+
+class _Entry:
+    __slots__ = ('path', 'value', 'fresh_until', 'stale_until')
+
+    def __init__(self, path: str, value: t.Any, fresh_until: float, stale_until: float):
+        self.path = path
+        self.value = value
+        self.fresh_until = fresh_until
+        self.stale_until = stale_until
+
+
+class ResponseCache:
+    """
+    LRU cache of decoded GET responses with per-endpoint TTLs.
+
+    Entries are fresh for the endpoint TTL, then served stale for another
+    ``stale_while_revalidate`` seconds while the client refreshes them in the
+    background. Only paths listed in ``ttls`` are cached. One instance may be
+    shared by ``Client`` and ``AsyncClient`` objects.
+    """
+
+    MISS = 'miss'
+    FRESH = 'fresh'
+    STALE = 'stale'
+
+    DEFAULT_TTLS: t.Dict[str, float] = {
+        'markets': 5,
+        'currencies': 300,
+        'currencies/stats': 60,
+    }
+
+    def __init__(
+            self,
+            ttls: t.Optional[t.Dict[str, float]] = None,
+            maxsize: int = 256,
+            stale_while_revalidate: float = 30,
+            clock: t.Callable[[], float] = time.monotonic,
+    ):
+        """
+        :param ttls: Seconds each endpoint path stays fresh, e.g. ``{'markets': 5}``
+        :type ttls: t.Optional[t.Dict[str, float]]
+
+        :param maxsize: Maximum number of cached responses
+        :type maxsize: int
+
+        :param stale_while_revalidate: Seconds an expired entry is still served while it is refreshed
+        :type stale_while_revalidate: float
+
+        :param clock: Monotonic clock
+        :type clock: t.Callable[[], float]
+        """
+        self.ttls = dict(self.DEFAULT_TTLS if ttls is None else ttls)
+        self.maxsize = maxsize
+        self.stale_while_revalidate = stale_while_revalidate
+        self._clock = clock
+
+        self._entries: 'OrderedDict[t.Hashable, _Entry]' = OrderedDict()
+        self._refreshing: t.Set[t.Hashable] = set()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def ttl_for(self, path: str) -> t.Optional[float]:
+        return self.ttls.get(path)
+
+    def lookup(self, key: t.Hashable) -> t.Tuple[str, t.Any]:
+        now = self._clock()
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return self.MISS, None
+
+            if now < entry.fresh_until:
+                self._entries.move_to_end(key)
+                return self.FRESH, entry.value
+
+            if now < entry.stale_until:
+                self._entries.move_to_end(key)
+                return self.STALE, entry.value
+
+            del self._entries[key]
+            return self.MISS, None
+
+    def store(self, key: t.Hashable, path: str, value: t.Any):
+        ttl = self.ttl_for(path)
+        if ttl is None:
+            return
+
+        now = self._clock()
+
+        with self._lock:
+            self._entries[key] = _Entry(path, value, now + ttl, now + ttl + self.stale_while_revalidate)
+            self._entries.move_to_end(key)
+
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def begin_refresh(self, key: t.Hashable) -> bool:
+        """
+        Claim the background refresh of ``key``.
+
+        :return: False if another refresh of the same key is already running
+        :rtype: bool
+        """
+
+        with self._lock:
+            if key in self._refreshing:
+                return False
+            self._refreshing.add(key)
+            return True
+
+    def end_refresh(self, key: t.Hashable):
+        with self._lock:
+            self._refreshing.discard(key)
+
+    def invalidate(self, path: t.Optional[str] = None):
+        """
+        Drop cached responses.
+
+        :param path: Endpoint path to drop, all entries if omitted
+        :type path: t.Optional[str]
+
+        :return: None
+        """
+
+        with self._lock:
+            if path is None:
+                self._entries.clear()
+                return
+
+            for key in [key for key, entry in self._entries.items() if entry.path == path]:
+                del self._entries[key]
@@ -0,0 +1,65 @@
+import asyncio
+import typing as t
+
+from .. import decoders
+
+
+__all__ = [
+    'SingleFlight',
+]
+
+
+class _Flight:
+    __slots__ = ('task', 'waiters')
+
+    def __init__(self, task: asyncio.Future):
+        self.task = task
+        self.waiters = 0
+
+
+class SingleFlight:
+    """
+    Share one in-flight call between concurrent callers asking for the same key.
+
+    Callers are free to mutate what they get back: every caller of a shared
+    flight but the last one to resume gets its own copy of the decoded result,
+    the last one takes the result itself.
+    """
+
+    def __init__(self):
+        self._flights: t.Dict[t.Hashable, _Flight] = {}
+
+    def __len__(self):
+        return len(self._flights)
+
+    async def do(self, key: t.Hashable, factory: t.Callable[[], t.Awaitable[t.Any]]) -> t.Any:
+        flight = self._flights.get(key)
+        if flight is None:
+            flight = _Flight(asyncio.ensure_future(self._run(key, factory)))
+            flight.task.add_done_callback(self._consume_exception)
+            self._flights[key] = flight
+
+        flight.waiters += 1
+        try:
+            # shield so one caller being cancelled does not cancel the request for everyone else
+            result = await asyncio.shield(flight.task)
+        finally:
+            flight.waiters -= 1
+
+        # the flight left the table before completing, so `waiters` only counts down from here:
+        # callers still to resume copy the result, which stays untouched until the last one takes it
+        if flight.waiters:
+            return decoders.copy_decoded(result)
+        return result
+
+    async def _run(self, key: t.Hashable, factory: t.Callable[[], t.Awaitable[t.Any]]) -> t.Any:
+        try:
+            return await factory()
+        finally:
+            self._flights.pop(key, None)
+
+    @staticmethod
+    def _consume_exception(task: asyncio.Future):
+        # avoid "exception was never retrieved" when every waiter was cancelled
+        if not task.cancelled():
+            task.exception()
@@ -0,0 +1,89 @@
+import math
+import threading
+import typing as t
+from collections import deque
+
+
+__all__ = [
+    'HedgePolicy',
+]
+
+
+class HedgePolicy:
+    """
+    When to send a second, identical request for a slow read.
+
+    A hedge is fired once the first request has been pending longer than the
+    given percentile of recent latencies for that endpoint. Only unsigned GETs
+    to the listed paths are hedged, since they are idempotent and public.
+    """
+
+    DEFAULT_PATHS = frozenset(('depth', 'trades'))
+
+    def __init__(
+            self,
+            percentile: float = 95,
+            paths: t.Optional[t.Iterable[str]] = None,
+            window: int = 200,
+            min_samples: int = 20,
+            initial_delay: float = 0.25,
+            min_delay: float = 0.01,
+            max_delay: float = 2.0,
+    ):
+        """
+        :param percentile: Latency percentile (0-100) after which a hedge is fired
+        :type percentile: float
+
+        :param paths: Endpoint paths that may be hedged, ``depth`` and ``trades`` by default
+        :type paths: t.Optional[t.Iterable[str]]
+
+        :param window: Number of recent latencies kept per path
+        :type window: int
+
+        :param min_samples: Samples needed before the percentile is trusted
+        :type min_samples: int
+
+        :param initial_delay: Hedge delay used until ``min_samples`` latencies were seen
+        :type initial_delay: float
+
+        :param min_delay: Lower bound of the hedge delay
+        :type min_delay: float
+
+        :param max_delay: Upper bound of the hedge delay
+        :type max_delay: float
+        """
+        self.percentile = percentile
+        self.paths = frozenset(paths) if paths is not None else self.DEFAULT_PATHS
+        self.window = window
+        self.min_samples = min_samples
+        self.initial_delay = initial_delay
+        self.min_delay = min_delay
+        self.max_delay = max_delay
+
+        self.hedged = 0
+        self.hedge_wins = 0
+
+        self._latencies: t.Dict[str, t.Deque[float]] = {}
+        self._lock = threading.Lock()
+
+    def applies(self, method: str, path: str, signed: bool) -> bool:
+        return method == 'get' and not signed and path in self.paths
+
+    def record(self, path: str, seconds: float):
+        with self._lock:
+            samples = self._latencies.get(path)
+            if samples is None:
+                samples = self._latencies[path] = deque(maxlen=self.window)
+            samples.append(seconds)
+
+    def delay(self, path: str) -> float:
+        with self._lock:
+            samples = sorted(self._latencies.get(path, ()))
+
+        if len(samples) < self.min_samples:
+            delay = self.initial_delay
+        else:
+            index = min(len(samples) - 1, max(0, math.ceil(self.percentile / 100 * len(samples)) - 1))
+            delay = samples[index]
+
+        return min(self.max_delay, max(self.min_delay, delay))
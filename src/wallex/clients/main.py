@@ -1,11 +1,28 @@
+import copy
+import functools
+import threading
+import time
 import typing as t
+import warnings
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
 import requests
 import aiohttp
 import asyncio
 
+from .. import decoders, streaming
 from ..enums import Resolution
+from ..ohlc import split_range, merge_udf
 from .base import BaseClient
+from .transport import TransportConfig, ConnectorConfig
+from .coalescing import SingleFlight
+from .cache import ResponseCache
+from .ratelimit import RateLimiter
+from .retry import RetryPolicy
+from .hedging import HedgePolicy
 from ..exceptions import RequestException, APIException
+from ..models import OHLC
+from ..orderbook import OrderBook
 
 
 __all__ = [
@@ -15,41 +32,256 @@ __all__ = [
 
 
 class Client(BaseClient):
+    """
+    Synchronous Wallex client.
+
+    With ``thread_safe=True`` one client can be used from many threads: every
+    thread gets its own ``requests.Session`` mounted on the same pooled
+    adapters, and per-call state such as ``response`` is kept per thread.
+    :meth:`submit` and :meth:`map` run calls on the client's own thread pool,
+    whose workers always use their own sessions.
+    """
+
     def __init__(
-            self, api_key: t.Optional[str] = None, requests_params: t.Optional[t.Dict[str, t.Any]] = None,
+            self,
+            api_key: t.Optional[str] = None,
+            requests_params: t.Optional[t.Dict[str, t.Any]] = None,
+            transport: t.Optional[TransportConfig] = None,
+            session: t.Optional[requests.Session] = None,
+            cache: t.Optional[ResponseCache] = None,
+            stream_parse: bool = False,
+            rate_limiter: t.Optional[RateLimiter] = None,
+            retry_policy: t.Optional[RetryPolicy] = None,
+            thread_safe: bool = False,
+            max_workers: t.Optional[int] = None,
     ):
 
-        super().__init__(api_key, requests_params)
+        self.transport = transport or TransportConfig()
+        self._shared_session = session
+        self.thread_safe = thread_safe
+        self.max_workers = max_workers or self.transport.pool_maxsize
+        self._local = threading.local()
+        self._thread_sessions: t.List[requests.Session] = []
+        self._sessions_lock = threading.Lock()
+        self._executor: t.Optional[ThreadPoolExecutor] = None
+        self._executor_lock = threading.Lock()
+        super().__init__(api_key, requests_params, cache, stream_parse, rate_limiter, retry_policy)
+
+    @property
+    def response(self) -> t.Optional[requests.Response]:
+        # last response seen by the calling thread
+        return getattr(self._local, 'response', None)
+
+    @response.setter
+    def response(self, value: t.Optional[requests.Response]):
+        self._local.response = value
 
     def _init_session(self) -> requests.Session:
 
         headers = self._get_headers()
 
+        # a session handed in by the caller is shared with other clients, leave its adapters alone
+        if self._shared_session is not None:
+            self._shared_session.headers.update(headers)
+            return self._shared_session
+
+        return self.transport.build_session(headers)
+
+    def _get_session(self) -> requests.Session:
+        if not self.thread_safe and not self._in_pool():
+            return self.session
+
+        session = getattr(self._local, 'session', None)
+        if session is None:
+            session = self._local.session = self._clone_session()
+            with self._sessions_lock:
+                self._thread_sessions.append(session)
+
+        return session
+
+    def _clone_session(self) -> requests.Session:
+        # a private copy of the main session's settings (headers, auth, proxies, verify, ...),
+        # mounted on the same, thread-safe adapters so the connection pools are shared
         session = requests.session()
-        session.headers.update(headers)
+        for name in requests.Session.__attrs__:
+            setattr(session, name, copy.copy(getattr(self.session, name)))
         return session
 
+    def _get_executor(self) -> ThreadPoolExecutor:
+        with self._executor_lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='wallex')
+            return self._executor
+
+    def _in_pool(self) -> bool:
+        return getattr(self._local, 'pooled', False)
+
+    def _run_pooled(self, fn: t.Callable[..., t.Any], *args, **kwargs) -> t.Any:
+        self._local.pooled = True
+        return fn(*args, **kwargs)
+
+    def submit(self, fn: t.Union[str, t.Callable[..., t.Any]], *args, **kwargs) -> Future:
+        """
+        Run a call on the client's thread pool.
+
+        Called from one of the pool's own workers the call runs in place instead,
+        waiting on the pool from inside it could deadlock it.
+
+        :param fn: Client method name (e.g. ``'get_orderbook'``) or any callable
+        :type fn: t.Union[str, t.Callable[..., t.Any]]
+
+        :return: Future of the call's result
+        :rtype: Future
+        """
+
+        if isinstance(fn, str):
+            fn = getattr(self, fn)
+
+        if self._in_pool():
+            future: Future = Future()
+            try:
+                future.set_result(fn(*args, **kwargs))
+            except Exception as e:
+                future.set_exception(e)
+            return future
+
+        return self._get_executor().submit(self._run_pooled, fn, *args, **kwargs)
+
+    def map(
+            self, fn: t.Union[str, t.Callable[..., t.Any]], *iterables: t.Iterable, timeout: t.Optional[float] = None
+    ) -> t.Iterator[t.Any]:
+        """
+        Concurrent ``map`` over the client's thread pool, results come back in input order.
+
+        Like :meth:`submit`, called from one of the pool's workers the calls run in place, one by one.
+
+        :param fn: Client method name (e.g. ``'get_orderbook'``) or any callable
+        :type fn: t.Union[str, t.Callable[..., t.Any]]
+
+        :param iterables: Positional arguments of each call
+        :type iterables: t.Iterable
+
+        :param timeout: Seconds to wait for all results
+        :type timeout: t.Optional[float]
+
+        :return: Iterator over the results
+        :rtype: t.Iterator[t.Any]
+        """
+
+        if isinstance(fn, str):
+            fn = getattr(self, fn)
+
+        if self._in_pool():
+            return map(fn, *iterables)
+
+        return self._get_executor().map(functools.partial(self._run_pooled, fn), *iterables, timeout=timeout)
+
     def _request(self, method, uri: str, signed: bool, **kwargs):
+        return self._send(method, uri, signed, **kwargs)
+
+    def _send(self, method, uri: str, signed: bool, **kwargs):
+        sent = None
+        if self.rate_limiter is not None:
+            sent = self.rate_limiter.acquire(signed)
+
+        try:
+            result = self._fetch(method, uri, signed, **kwargs)
+        except APIException as e:
+            self._report_rate_limit(signed, e.status_code, e.response, sent)
+            raise
+
+        self._report_rate_limit(signed, 200)
+        return result
+
+    def _fetch(self, method, uri: str, signed: bool, projection: t.Optional[t.Tuple] = None, **kwargs):
 
         kwargs = self._get_request_kwargs(method, signed, **kwargs)
 
-        self.response = getattr(self.session, method)(uri, **kwargs)
-        return self._handle_response(self.response)
+        if projection is not None:
+            return self._request_projected(method, uri, projection, **kwargs)
+
+        response = getattr(self._get_session(), method)(uri, **kwargs)
+        self.response = response
+        return self._handle_response(response)
+
+    def _request_projected(self, method, uri: str, projection: t.Tuple, **kwargs):
+        with getattr(self._get_session(), method)(uri, stream=True, **kwargs) as response:
+            self.response = response
+            if not (200 <= response.status_code < 300):
+                raise APIException(response, response.status_code, response.content)
+
+            # let urllib3 undo any content encoding while ijson reads the socket
+            response.raw.decode_content = True
+            try:
+                return streaming.project(response.raw, *projection)
+            except ValueError as e:
+                raise RequestException('Invalid Response: %s' % e)
 
     @staticmethod
     def _handle_response(response: requests.Response):
         if not (200 <= response.status_code < 300):
-            raise APIException(response, response.status_code, response.text)
+            raise APIException(response, response.status_code, response.content)
         try:
-            return response.json()
+            return decoders.loads(response.content)
         except ValueError:
             raise RequestException('Invalid Response: %s' % response.text)
 
     def _request_api(
-            self, method, path: str, signed: bool = False, version=BaseClient.PUBLIC_API_VERSION, **kwargs
+            self, method, path: str, signed: bool = False, version=BaseClient.PUBLIC_API_VERSION,
+            select: t.Optional[t.Callable[[t.Any], t.Any]] = None, **kwargs
     ):
         uri = self._create_api_uri(path, version)
-        return self._request(method, uri, signed, **kwargs)
+
+        if self._is_cacheable(method, path):
+            return self._cached_request(method, path, uri, signed, select, **kwargs)
+
+        result = self._request_with_retry(method, path, uri, signed, **kwargs)
+        return result if select is None else select(result)
+
+    def _request_with_retry(self, method, path: str, uri: str, signed: bool, **kwargs):
+        if not self._is_retryable(method, path, kwargs):
+            return self._request(method, uri, signed, **kwargs)
+
+        attempt = 0
+        while True:
+            attempt += 1
+            try:
+                return self._request(method, uri, signed, **kwargs)
+            except Exception as e:
+                if not self.retry_policy.should_retry(e, attempt, path):
+                    raise
+                time.sleep(self.retry_policy.backoff(attempt, e))
+
+    def _cached_request(
+            self, method, path: str, uri: str, signed: bool, select: t.Optional[t.Callable[[t.Any], t.Any]] = None,
+            **kwargs
+    ):
+        key = self._request_key(method, uri, signed, **kwargs)
+        state, value = self.cache.lookup(key)
+
+        if state == ResponseCache.MISS:
+            value = self._request_with_retry(method, path, uri, signed, **kwargs)
+            self.cache.store(key, path, value)
+
+        elif state == ResponseCache.STALE and self.cache.begin_refresh(key):
+            threading.Thread(
+                target=self._refresh_cache, args=(key, method, path, uri, signed), kwargs=kwargs, daemon=True
+            ).start()
+
+        # callers are free to mutate what they get, never hand out (any part of) the cached object;
+        # `select` narrows it without copying first, so only what is returned gets copied
+        if select is not None:
+            value = select(value)
+        return decoders.copy_decoded(value)
+
+    def _refresh_cache(self, key, method, path: str, uri: str, signed: bool, **kwargs):
+        try:
+            self.cache.store(key, path, self._request_with_retry(method, path, uri, signed, **kwargs))
+        except Exception:
+            # keep serving the stale entry, the next lookup past its lifetime will retry in the foreground
+            pass
+        finally:
+            self.cache.end_refresh(key)
 
     def _get(self, path, signed=False, version=BaseClient.PUBLIC_API_VERSION, **kwargs) -> t.Dict:
         return self._request_api('get', path, signed, version, **kwargs)
@@ -64,35 +296,39 @@ class Client(BaseClient):
         return self._request_api('delete', path, signed, version, **kwargs)
 
     def get_market_stats(self, symbol: str = None) -> t.Dict:
-        result = self._get('markets')
+        if symbol is not None and self._can_project('markets'):
+            return self._get('markets', projection=('result.symbols', [symbol]))
 
         if symbol is not None:
-            data = self._pick(result.get('result').get('symbols'), symbol)
-            result['result']['symbols'] = data
+            return self._get(
+                'markets', select=lambda result: self._narrowed(result, ('result', 'symbols'), symbol)
+            )
 
-        return result
+        return self._get('markets')
 
     def get_currencies(self, currency: str = None) -> t.Dict:
-        result = self._get('currencies')
+        if currency is not None and self._can_project('currencies'):
+            return self._get('currencies', projection=('result', [currency]))
 
         if currency is not None:
-            data = self._pick(result.get('result'), currency)
-            result['result'] = data
+            return self._get('currencies', select=lambda result: self._narrowed(result, ('result',), currency))
 
-        return result
+        return self._get('currencies')
 
     def get_currencies_stats(self, currency=None) -> t.Dict:
-        result = self._get('currencies/stats')
-
         if currency is not None:
-            data = self._pick(result.get('result'), 'key', currency)
-            result['result'] = data
+            return self._get(
+                'currencies/stats', select=lambda result: self._narrowed(result, ('result',), 'key', currency)
+            )
 
-        return result
+        return self._get('currencies/stats')
 
     def get_orderbook(self, symbol: str) -> t.Dict:
         return self._get('depth', params={'symbol': symbol})
 
+    def get_depth(self, symbol: str) -> OrderBook:
+        return OrderBook.from_response(self.get_orderbook(symbol))
+
     def get_recent_trades(self, symbol: str = 'None', page: int = 1, per_page: int = 200) -> t.Dict:
         return self._get('trades', params={'symbol': symbol, 'page': page, 'per_page': per_page})
 
@@ -106,6 +342,51 @@ class Client(BaseClient):
             'to': to_date
         })
 
+    def get_ohlc(
+            self, symbol: str, resolution: Resolution, from_date: int, to_date: int
+    ) -> OHLC:
+        return OHLC.from_udf(self.get_ohlc_data(symbol, resolution, from_date, to_date))
+
+    def download_ohlc_data(
+            self, symbol: str, resolution: Resolution, from_date: int, to_date: int,
+            max_bars: int = 1000, max_concurrency: int = 8
+    ) -> t.Dict:
+        """
+        Download a long OHLC range as concurrent chunks on the client's thread pool and merge them.
+
+        Called from one of the pool's workers the chunks are downloaded one by one.
+
+        :param symbol: Market symbol
+        :type symbol: str
+
+        :param resolution: Bar resolution
+        :type resolution: Resolution
+
+        :param from_date: Start of the range, epoch seconds
+        :type from_date: int
+
+        :param to_date: End of the range, epoch seconds
+        :type to_date: int
+
+        :param max_bars: Bars requested per chunk
+        :type max_bars: int
+
+        :param max_concurrency: Chunks in flight at once
+        :type max_concurrency: int
+
+        :return: UDF response covering the whole range, deduplicated by bar time
+        :rtype: t.Dict
+        """
+
+        limit = threading.BoundedSemaphore(max_concurrency)
+
+        def fetch(window: t.Tuple[int, int]) -> t.Dict:
+            with limit:
+                return self.get_ohlc_data(symbol, resolution, *window)
+
+        windows = split_range(from_date, to_date, resolution, max_bars)
+        return merge_udf(self.map(fetch, windows), windows)
+
     def get_profile(self) -> t.Dict:
         return self._get('account/profile', signed=True)
 
@@ -158,6 +439,33 @@ class Client(BaseClient):
     ) -> t.Dict:
         return self._post('account/orders', signed=True, json=self._get_kwargs(locals(), del_nones=True))
 
+    def create_orders(
+            self, orders: t.List[t.Dict[str, t.Any]], max_concurrency: int = 10
+    ) -> t.List[t.Union[t.Dict, Exception]]:
+        """
+        Place several orders concurrently on the client's thread pool.
+
+        :param orders: ``create_order`` keyword arguments, one dict per order
+        :type orders: t.List[t.Dict[str, t.Any]]
+
+        :param max_concurrency: Orders in flight at once
+        :type max_concurrency: int
+
+        :return: Response or raised exception of every order, in input order
+        :rtype: t.List[t.Union[t.Dict, Exception]]
+        """
+
+        limit = threading.BoundedSemaphore(max_concurrency)
+
+        def place(spec: t.Dict[str, t.Any]) -> t.Union[t.Dict, Exception]:
+            with limit:
+                try:
+                    return self.create_order(**spec)
+                except Exception as e:
+                    return e
+
+        return list(self.map(place, orders))
+
     def order_market(self, symbol: str, side: str, quantity: float, client_id: str = None) -> t.Dict:
         return self.create_order(
             symbol=symbol, side=side, type=self.ORDER_TYPE_MARKET, quantity=quantity, client_id=client_id
@@ -191,6 +499,57 @@ class Client(BaseClient):
     def cancel_order(self, order_id: str) -> t.Dict:
         return self._delete(f'account/orders', signed=True, json={'clientOrderId': order_id})
 
+    def cancel_all_orders(
+            self, symbol: str = None, side: str = None, max_concurrency: int = 20, max_rounds: int = 3
+    ) -> t.Dict:
+        """
+        Cancel every open order, optionally only those of one symbol and/or side.
+
+        All pages of open orders are listed, cancelled concurrently on the client's
+        thread pool and listed again to catch stragglers, for at most ``max_rounds``
+        rounds. Called from one of the pool's workers, orders are cancelled one by one.
+
+        :param symbol: Only cancel orders of this symbol
+        :type symbol: str
+
+        :param side: Only cancel orders on this side
+        :type side: str
+
+        :param max_concurrency: Cancels in flight at once
+        :type max_concurrency: int
+
+        :param max_rounds: Cancel rounds before giving up on the remaining orders
+        :type max_rounds: int
+
+        :return: ``cancelled`` ids, ``failed`` ids mapped to their exception, ``remaining`` ids,
+            ``rounds`` run and ``elapsed`` wall-clock seconds
+        :rtype: t.Dict
+        """
+
+        started = time.perf_counter()
+        report = {'cancelled': [], 'failed': {}, 'remaining': [], 'rounds': 0, 'elapsed': 0.0}
+        limit = threading.BoundedSemaphore(max_concurrency)
+
+        def cancel(order_id: str) -> t.Union[t.Dict, Exception]:
+            with limit:
+                try:
+                    return self.cancel_order(order_id)
+                except Exception as e:
+                    return e
+
+        order_ids = [order.get('clientOrderId') for order in self._get_all_open_orders(symbol, side)]
+        while order_ids and report['rounds'] < max_rounds:
+            report['rounds'] += 1
+            self._record_cancellations(report, order_ids, list(self.map(cancel, order_ids)))
+            order_ids = [order.get('clientOrderId') for order in self._get_all_open_orders(symbol, side)]
+
+        report['remaining'] = order_ids
+        report['elapsed'] = time.perf_counter() - started
+        return report
+
+    def _get_all_open_orders(self, symbol: str = None, side: str = None) -> t.List[t.Dict]:
+        return list(self.iter_open_orders(symbol, side))
+
     def get_open_orders(self, symbol: str = None, side: str = None, page: int = 1, per_page: int = 200) -> t.Dict:
         result = self._get('account/openOrders', signed=True, params={'page': page, 'per_page': per_page})
 
@@ -215,6 +574,98 @@ class Client(BaseClient):
             'per_page': per_page
         })
 
+    def iter_open_orders(
+            self, symbol: str = None, side: str = None, per_page: int = BaseClient.OPEN_ORDERS_PAGE_SIZE,
+            max_concurrency: int = 4
+    ) -> t.Iterator[t.Dict]:
+        pages = self._iter_pages(
+            lambda page: self.get_open_orders(page=page, per_page=per_page),
+            lambda response: response['result']['orders'],
+            per_page, max_concurrency
+        )
+        return (order for order in pages if self._order_matches(order, symbol, side))
+
+    def iter_recent_trades(
+            self, symbol: str = None, per_page: int = 200, max_concurrency: int = 4
+    ) -> t.Iterator[t.Dict]:
+        return self._iter_pages(
+            lambda page: self.get_recent_trades(symbol, page=page, per_page=per_page),
+            lambda response: response['result']['latestTrades'],
+            per_page, max_concurrency
+        )
+
+    def iter_user_recent_trades(
+            self, symbol: str = None, side: str = None, active: bool = None, per_page: int = 200,
+            max_concurrency: int = 4
+    ) -> t.Iterator[t.Dict]:
+        return self._iter_pages(
+            lambda page: self.get_user_recent_trades(symbol, side, active, page=page, per_page=per_page),
+            lambda response: response['result']['AccountLatestTrades'],
+            per_page, max_concurrency
+        )
+
+    def _iter_pages(
+            self,
+            fetch: t.Callable[[int], t.Dict],
+            extract: t.Callable[[t.Dict], t.List[t.Dict]],
+            per_page: int,
+            max_concurrency: int,
+    ) -> t.Iterator[t.Dict]:
+        """
+        Yield the items of every page, fetching ahead on the client's thread pool.
+
+        With a known total (``result_info``) up to ``max_concurrency`` pages are fetched
+        in parallel, otherwise only the next page is prefetched while the current one
+        is consumed. On one of the pool's own workers pages are fetched in place, once
+        they are reached.
+        """
+
+        if self._in_pool():
+            yield from self._iter_pages_in_place(fetch, extract, per_page)
+            return
+
+        current = fetch(1)
+        total_pages = self._total_pages(current, per_page)
+        next_page = 2
+        pending: t.Deque[Future] = deque()
+
+        try:
+            while True:
+                items = extract(current)
+
+                if total_pages is not None:
+                    while next_page <= total_pages and len(pending) < max_concurrency:
+                        pending.append(self.submit(fetch, next_page))
+                        next_page += 1
+                elif len(items) >= per_page and not pending:
+                    pending.append(self.submit(fetch, next_page))
+                    next_page += 1
+
+                yield from items
+
+                if not pending:
+                    return
+                current = pending.popleft().result()
+        finally:
+            for future in pending:
+                future.cancel()
+
+    def _iter_pages_in_place(
+            self, fetch: t.Callable[[int], t.Dict], extract: t.Callable[[t.Dict], t.List[t.Dict]], per_page: int
+    ) -> t.Iterator[t.Dict]:
+        current = fetch(1)
+        total_pages = self._total_pages(current, per_page)
+        page = 1
+
+        while True:
+            items = extract(current)
+            yield from items
+
+            page += 1
+            if page > (total_pages or page) or (total_pages is None and len(items) < per_page):
+                return
+            current = fetch(page)
+
     def get_order_status(self, order_id: str) -> t.Dict:
         return self._get(f'account/orders/{order_id}', signed=True)
 
@@ -225,7 +676,19 @@ class Client(BaseClient):
         return self._post('account/crypto-withdrawal', signed=True, json=self._get_kwargs(locals(), del_nones=True))
 
     def close_connection(self):
-        if self.session:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+            self._executor = None
+
+        with self._sessions_lock:
+            sessions, self._thread_sessions = self._thread_sessions, []
+        self._local = threading.local()
+
+        # shared sessions are owned (and closed) by whoever created them, along with the
+        # adapters per-thread sessions use
+        if self.session and self._shared_session is None:
+            for session in sessions:
+                session.close()
             self.session.close()
 
     def __del__(self):
@@ -237,57 +700,250 @@ class AsyncClient(BaseClient):
             self,
             api_key: t.Optional[str] = None,
             requests_params: t.Optional[t.Dict[str, t.Any]] = None,
-            loop: t.Optional[asyncio.AbstractEventLoop] = None
+            loop: t.Optional[asyncio.AbstractEventLoop] = None,
+            connector: t.Optional[ConnectorConfig] = None,
+            session: t.Optional[aiohttp.ClientSession] = None,
+            coalesce_requests: bool = False,
+            cache: t.Optional[ResponseCache] = None,
+            stream_parse: bool = False,
+            rate_limiter: t.Optional[RateLimiter] = None,
+            retry_policy: t.Optional[RetryPolicy] = None,
+            hedge_policy: t.Optional[HedgePolicy] = None,
     ):
 
-        self.loop = loop or asyncio.get_event_loop()
-        super().__init__(api_key, requests_params)
+        # kept for backwards compatibility, the session binds to the loop it is first used in
+        self.loop = loop
+        self.connector = connector or ConnectorConfig()
+        self._shared_session = session
+        self._session_loop: t.Optional[asyncio.AbstractEventLoop] = None
+        self._single_flight = SingleFlight() if coalesce_requests else None
+        self.hedge_policy = hedge_policy
+        self._background_tasks: t.Set[asyncio.Future] = set()
+        super().__init__(api_key, requests_params, cache, stream_parse, rate_limiter, retry_policy)
 
     @classmethod
     async def create(
             cls,
             api_key: t.Optional[str] = None,
             requests_params: t.Optional[t.Dict[str, t.Any]] = None,
-            loop: t.Optional[asyncio.AbstractEventLoop] = None
+            loop: t.Optional[asyncio.AbstractEventLoop] = None,
+            connector: t.Optional[ConnectorConfig] = None,
+            session: t.Optional[aiohttp.ClientSession] = None,
+            coalesce_requests: bool = False,
+            cache: t.Optional[ResponseCache] = None,
+            stream_parse: bool = False,
+            rate_limiter: t.Optional[RateLimiter] = None,
+            retry_policy: t.Optional[RetryPolicy] = None,
+            hedge_policy: t.Optional[HedgePolicy] = None,
     ) -> 'AsyncClient':
 
-        return cls(api_key, requests_params, loop)
+        return cls(
+            api_key, requests_params, loop, connector=connector, session=session,
+            coalesce_requests=coalesce_requests, cache=cache, stream_parse=stream_parse,
+            rate_limiter=rate_limiter, retry_policy=retry_policy, hedge_policy=hedge_policy
+        )
 
-    def __aenter__(self):
+    async def __aenter__(self):
         return self
 
-    def __aexit__(self, exc_type, exc_val, exc_tb):
-        self.close_connection()
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        await self.close_connection()
         return False
 
-    def _init_session(self) -> aiohttp.ClientSession:
-        session = aiohttp.ClientSession(
-            loop=self.loop,
-            headers=self._get_headers()
-        )
-        return session
+    def _init_session(self) -> t.Optional[aiohttp.ClientSession]:
+        # the owned session is created lazily by `_get_session` inside the running loop
+        return self._shared_session
+
+    def _get_session(self) -> aiohttp.ClientSession:
+        if self._shared_session is not None:
+            return self._shared_session
+
+        loop = asyncio.get_running_loop()
+        session = self.session
+        if session is not None and not session.closed and self._session_loop is not loop:
+            if not self._session_loop.is_closed():
+                # its connections belong to the other loop and can only be closed from there
+                raise RuntimeError(
+                    'the AsyncClient session is still open in another event loop, '
+                    'await close_connection() in that loop before using the client in this one'
+                )
+            warnings.warn(
+                'AsyncClient session left open in a closed event loop, await close_connection() before the loop '
+                'ends', ResourceWarning
+            )
+            session = None
+
+        if session is None or session.closed:
+            self.session = self.connector.build_session(self._get_headers())
+            self._session_loop = loop
+
+        return self.session
+
+    async def _request(self, method, uri: str, signed: bool, hedge_path: t.Optional[str] = None, **kwargs):
+        # identical GETs issued while one is in flight share its response
+        if self._single_flight is not None and method == 'get':
+            key = self._request_key(method, uri, signed, **kwargs)
+            return await self._single_flight.do(key, lambda: self._dispatch(method, uri, signed, hedge_path, **kwargs))
+
+        return await self._dispatch(method, uri, signed, hedge_path, **kwargs)
+
+    async def _dispatch(self, method, uri: str, signed: bool, hedge_path: t.Optional[str], **kwargs):
+        if hedge_path is not None:
+            return await self._send_hedged(hedge_path, method, uri, signed, **kwargs)
+        return await self._send(method, uri, signed, **kwargs)
+
+    async def _send_hedged(self, path: str, method, uri: str, signed: bool, **kwargs):
+        policy = self.hedge_policy
+        loop = asyncio.get_running_loop()
+        started: t.Dict[asyncio.Future, float] = {}
+
+        def finished(task: asyncio.Future):
+            # every attempt that completes is a latency sample; this also retrieves the exception of
+            # attempts nobody awaits any more
+            if not task.cancelled() and task.exception() is None:
+                policy.record(path, loop.time() - started[task])
+
+        def launch() -> asyncio.Future:
+            task = asyncio.ensure_future(self._send(method, uri, signed, **kwargs))
+            started[task] = loop.time()
+            task.add_done_callback(finished)
+            return task
+
+        primary = launch()
+        pending = {primary}
+        answered = False
+        try:
+            done, pending = await asyncio.wait(pending, timeout=policy.delay(path))
+            if not done:
+                # the primary is slower than usual, race it against an identical request
+                pending.add(launch())
+                policy.hedged += 1
+
+            while not done or all(task.exception() is not None for task in done):
+                if not pending:
+                    return primary.result()
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+
+            winner = next(task for task in done if task.exception() is None)
+            if winner is not primary:
+                policy.hedge_wins += 1
+            answered = True
+            return winner.result()
+        finally:
+            now = loop.time()
+            for task in pending:
+                # a losing attempt took at least this long, leaving it out would skew the delay low
+                if answered:
+                    policy.record(path, now - started[task])
+                task.cancel()
+
+    async def _send(self, method, uri: str, signed: bool, **kwargs):
+        sent = None
+        if self.rate_limiter is not None:
+            sent = await self.rate_limiter.acquire_async(signed)
 
-    async def _request(self, method, uri: str, signed: bool, **kwargs):
+        try:
+            result = await self._fetch(method, uri, signed, **kwargs)
+        except APIException as e:
+            self._report_rate_limit(signed, e.status_code, e.response, sent)
+            raise
+
+        self._report_rate_limit(signed, 200)
+        return result
+
+    async def _fetch(self, method, uri: str, signed: bool, projection: t.Optional[t.Tuple] = None, **kwargs):
 
         kwargs = self._get_request_kwargs(method, signed, **kwargs)
+        session = self._get_session()
+        if session is self._shared_session:
+            # a shared session is set up by its owner, the client's own headers go with every request
+            kwargs['headers'] = {**self._get_headers(), **kwargs.get('headers', {})}
 
-        async with getattr(self.session, method)(uri, **kwargs) as response:
+        async with getattr(session, method)(uri, **kwargs) as response:
             self.response = response
+            if projection is not None:
+                return await self._handle_projected_response(response, projection)
             return await self._handle_response(response)
 
+    @staticmethod
+    async def _handle_projected_response(response: aiohttp.ClientResponse, projection: t.Tuple):
+        if not str(response.status).startswith('2'):
+            raise APIException(response, response.status, await response.read())
+        try:
+            return await streaming.project_async(response.content, *projection)
+        except ValueError as e:
+            raise RequestException(f'Invalid Response: {e}')
+
     @staticmethod
     async def _handle_response(response: aiohttp.ClientResponse):
+        body = await response.read()
         if not str(response.status).startswith('2'):
-            raise APIException(response, response.status, await response.text())
+            raise APIException(response, response.status, body)
         try:
-            return await response.json()
+            return decoders.loads(body)
         except ValueError:
-            txt = await response.text()
+            txt = body.decode(response.get_encoding(), 'replace')
             raise RequestException(f'Invalid Response: {txt}')
 
-    async def _request_api(self, method, path, signed=False, version=BaseClient.PUBLIC_API_VERSION, **kwargs):
+    async def _request_api(
+            self, method, path, signed=False, version=BaseClient.PUBLIC_API_VERSION,
+            select: t.Optional[t.Callable[[t.Any], t.Any]] = None, **kwargs
+    ):
         uri = self._create_api_uri(path, version)
-        return await self._request(method, uri, signed, **kwargs)
+
+        if self._is_cacheable(method, path):
+            return await self._cached_request(method, path, uri, signed, select, **kwargs)
+
+        result = await self._request_with_retry(method, path, uri, signed, **kwargs)
+        return result if select is None else select(result)
+
+    async def _request_with_retry(self, method, path: str, uri: str, signed: bool, **kwargs):
+        if self.hedge_policy is not None and self.hedge_policy.applies(method, path, signed):
+            kwargs['hedge_path'] = path
+
+        if not self._is_retryable(method, path, kwargs):
+            return await self._request(method, uri, signed, **kwargs)
+
+        attempt = 0
+        while True:
+            attempt += 1
+            try:
+                return await self._request(method, uri, signed, **kwargs)
+            except Exception as e:
+                if not self.retry_policy.should_retry(e, attempt, path):
+                    raise
+                await asyncio.sleep(self.retry_policy.backoff(attempt, e))
+
+    async def _cached_request(
+            self, method, path: str, uri: str, signed: bool, select: t.Optional[t.Callable[[t.Any], t.Any]] = None,
+            **kwargs
+    ):
+        key = self._request_key(method, uri, signed, **kwargs)
+        state, value = self.cache.lookup(key)
+
+        if state == ResponseCache.MISS:
+            value = await self._request_with_retry(method, path, uri, signed, **kwargs)
+            self.cache.store(key, path, value)
+
+        elif state == ResponseCache.STALE and self.cache.begin_refresh(key):
+            task = asyncio.ensure_future(self._refresh_cache(key, method, path, uri, signed, **kwargs))
+            self._background_tasks.add(task)
+            task.add_done_callback(self._background_tasks.discard)
+
+        # callers are free to mutate what they get, never hand out (any part of) the cached object;
+        # `select` narrows it without copying first, so only what is returned gets copied
+        if select is not None:
+            value = select(value)
+        return decoders.copy_decoded(value)
+
+    async def _refresh_cache(self, key, method, path: str, uri: str, signed: bool, **kwargs):
+        try:
+            self.cache.store(key, path, await self._request_with_retry(method, path, uri, signed, **kwargs))
+        except Exception:
+            # keep serving the stale entry, the next lookup past its lifetime will retry in the foreground
+            pass
+        finally:
+            self.cache.end_refresh(key)
 
     async def _get(self, path, signed=False, version=BaseClient.PUBLIC_API_VERSION, **kwargs) -> t.Dict:
         return await self._request_api('get', path, signed, version, **kwargs)
@@ -302,44 +958,96 @@ class AsyncClient(BaseClient):
         return await self._request_api('delete', path, signed, version, **kwargs)
 
     async def get_market_stats(self, symbol: str = None) -> t.Dict:
-        result = await self._get('markets')
+        if symbol is not None and self._can_project('markets'):
+            return await self._get('markets', projection=('result.symbols', [symbol]))
 
         if symbol is not None:
-            data = self._pick(result.get('result').get('symbols'), symbol)
-            result['result']['symbols'] = data
+            return await self._get(
+                'markets', select=lambda result: self._narrowed(result, ('result', 'symbols'), symbol)
+            )
 
-        return result
+        return await self._get('markets')
 
     async def get_currencies(self, currency: str = None) -> t.Dict:
-        result = await self._get('currencies')
+        if currency is not None and self._can_project('currencies'):
+            return await self._get('currencies', projection=('result', [currency]))
 
         if currency is not None:
-            data = self._pick(result.get('result'), currency)
-            result['result'] = data
+            return await self._get('currencies', select=lambda result: self._narrowed(result, ('result',), currency))
 
-        return result
+        return await self._get('currencies')
 
     async def get_currencies_stats(self, currency=None) -> t.Dict:
-        result = await self._get('currencies/stats')
-
         if currency is not None:
-            data = self._pick(result.get('result'), 'key', currency)
-            result['result'] = data
+            return await self._get(
+                'currencies/stats', select=lambda result: self._narrowed(result, ('result',), 'key', currency)
+            )
 
-        return result
+        return await self._get('currencies/stats')
 
     async def get_orderbook(self, symbol: str) -> t.Dict:
         return await self._get('depth', params={'symbol': symbol})
 
+    async def get_depth(self, symbol: str) -> OrderBook:
+        return OrderBook.from_response(await self.get_orderbook(symbol))
+
     async def get_recent_trades(self, symbol: str = None, page: int = 1, per_page: int = 200) -> t.Dict:
         return await self._get('trades', params=self._get_kwargs(locals(), del_nones=True))
 
     async def get_ohlc_data(
             self, symbol: str = None, resolution: Resolution = None, from_date: int = None, to_date: int = None
     ) -> t.Dict:
-        params = self._get_kwargs(locals(), del_nones=True)
+        params = self._get_kwargs({
+            'symbol': symbol,
+            'resolution': resolution.value if resolution is not None else None,
+            'from': from_date,
+            'to': to_date
+        }, del_nones=True)
         return await self._get('udf/history', params=params)
 
+    async def get_ohlc(
+            self, symbol: str, resolution: Resolution, from_date: int, to_date: int
+    ) -> OHLC:
+        return OHLC.from_udf(await self.get_ohlc_data(symbol, resolution, from_date, to_date))
+
+    async def download_ohlc_data(
+            self, symbol: str, resolution: Resolution, from_date: int, to_date: int,
+            max_bars: int = 1000, max_concurrency: int = 8
+    ) -> t.Dict:
+        """
+        Download a long OHLC range as concurrent chunks and merge them.
+
+        :param symbol: Market symbol
+        :type symbol: str
+
+        :param resolution: Bar resolution
+        :type resolution: Resolution
+
+        :param from_date: Start of the range, epoch seconds
+        :type from_date: int
+
+        :param to_date: End of the range, epoch seconds
+        :type to_date: int
+
+        :param max_bars: Bars requested per chunk
+        :type max_bars: int
+
+        :param max_concurrency: Chunks in flight at once
+        :type max_concurrency: int
+
+        :return: UDF response covering the whole range, deduplicated by bar time
+        :rtype: t.Dict
+        """
+
+        limit = asyncio.Semaphore(max_concurrency)
+
+        async def fetch(window: t.Tuple[int, int]) -> t.Dict:
+            async with limit:
+                return await self.get_ohlc_data(symbol, resolution, *window)
+
+        windows = split_range(from_date, to_date, resolution, max_bars)
+        return merge_udf(await asyncio.gather(*(fetch(window) for window in windows)), windows)
+
     async def get_profile(self) -> t.Dict:
         return await self._get('account/profile', signed=True)
 
@@ -394,6 +1102,30 @@ class AsyncClient(BaseClient):
     ) -> t.Dict:
         return await self._post('account/orders', signed=True, json=self._get_kwargs(locals(), del_nones=True))
 
+    async def create_orders(
+            self, orders: t.List[t.Dict[str, t.Any]], max_concurrency: int = 10
+    ) -> t.List[t.Union[t.Dict, Exception]]:
+        """
+        Place several orders concurrently.
+
+        :param orders: ``create_order`` keyword arguments, one dict per order
+        :type orders: t.List[t.Dict[str, t.Any]]
+
+        :param max_concurrency: Orders in flight at once
+        :type max_concurrency: int
+
+        :return: Response or raised exception of every order, in input order
+        :rtype: t.List[t.Union[t.Dict, Exception]]
+        """
+
+        limit = asyncio.Semaphore(max_concurrency)
+
+        async def place(spec: t.Dict[str, t.Any]) -> t.Dict:
+            async with limit:
+                return await self.create_order(**spec)
+
+        return await asyncio.gather(*(place(spec) for spec in orders), return_exceptions=True)
+
     async def order_market(self, symbol: str, side: str, quantity: float, client_id: str = None) -> t.Dict:
         return await self.create_order(
             symbol=symbol, side=side, type=self.ORDER_TYPE_MARKET, quantity=quantity, client_id=client_id
@@ -427,6 +1159,56 @@ class AsyncClient(BaseClient):
     async def cancel_order(self, order_id: str) -> t.Dict:
         return await self._delete(f'account/orders', signed=True, json={'clientOrderId': order_id})
 
+    async def cancel_all_orders(
+            self, symbol: str = None, side: str = None, max_concurrency: int = 20, max_rounds: int = 3
+    ) -> t.Dict:
+        """
+        Cancel every open order, optionally only those of one symbol and/or side.
+
+        All pages of open orders are listed and every order is cancelled in its own
+        coroutine on the running loop, at most ``max_concurrency`` at a time. A failed
+        cancel does not stop the others. Open orders are then listed again and the
+        stragglers cancelled in another round, for at most ``max_rounds`` rounds.
+
+        :param symbol: Only cancel orders of this symbol
+        :type symbol: str
+
+        :param side: Only cancel orders on this side
+        :type side: str
+
+        :param max_concurrency: Cancel requests in flight at once
+        :type max_concurrency: int
+
+        :param max_rounds: Cancel rounds before giving up on the remaining orders
+        :type max_rounds: int
+
+        :return: ``cancelled`` ids, ``failed`` ids mapped to their exception, ``remaining`` ids,
+            ``rounds`` run and ``elapsed`` wall-clock seconds
+        :rtype: t.Dict
+        """
+
+        started = time.perf_counter()
+        report = {'cancelled': [], 'failed': {}, 'remaining': [], 'rounds': 0, 'elapsed': 0.0}
+        limit = asyncio.Semaphore(max_concurrency)
+
+        async def cancel(order_id: str) -> t.Dict:
+            async with limit:
+                return await self.cancel_order(order_id)
+
+        order_ids = [order.get('clientOrderId') for order in await self._get_all_open_orders(symbol, side)]
+        while order_ids and report['rounds'] < max_rounds:
+            report['rounds'] += 1
+            results = await asyncio.gather(*(cancel(order_id) for order_id in order_ids), return_exceptions=True)
+            self._record_cancellations(report, order_ids, results)
+            order_ids = [order.get('clientOrderId') for order in await self._get_all_open_orders(symbol, side)]
+
+        report['remaining'] = order_ids
+        report['elapsed'] = time.perf_counter() - started
+        return report
+
+    async def _get_all_open_orders(self, symbol: str = None, side: str = None) -> t.List[t.Dict]:
+        return [order async for order in self.iter_open_orders(symbol, side)]
+
     async def get_open_orders(self, symbol: str = None, side: str = None, page: int = 1, per_page: int = 200) -> t.Dict:
         result = await self._get('account/openOrders', signed=True, params={'page': page, 'per_page': per_page})
 
@@ -446,6 +1228,80 @@ class AsyncClient(BaseClient):
         params = self._get_kwargs(locals(), del_nones=True)
         return await self._get('account/trades', signed=True, params=params)
 
+    async def iter_open_orders(
+            self, symbol: str = None, side: str = None, per_page: int = BaseClient.OPEN_ORDERS_PAGE_SIZE,
+            max_concurrency: int = 4
+    ) -> t.AsyncIterator[t.Dict]:
+        pages = self._iter_pages(
+            lambda page: self.get_open_orders(page=page, per_page=per_page),
+            lambda response: response['result']['orders'],
+            per_page, max_concurrency
+        )
+        async for order in pages:
+            if self._order_matches(order, symbol, side):
+                yield order
+
+    def iter_recent_trades(
+            self, symbol: str = None, per_page: int = 200, max_concurrency: int = 4
+    ) -> t.AsyncIterator[t.Dict]:
+        return self._iter_pages(
+            lambda page: self.get_recent_trades(symbol, page=page, per_page=per_page),
+            lambda response: response['result']['latestTrades'],
+            per_page, max_concurrency
+        )
+
+    def iter_user_recent_trades(
+            self, symbol: str = None, side: str = None, active: bool = None, per_page: int = 200,
+            max_concurrency: int = 4
+    ) -> t.AsyncIterator[t.Dict]:
+        return self._iter_pages(
+            lambda page: self.get_user_recent_trades(symbol, side, active, page=page, per_page=per_page),
+            lambda response: response['result']['AccountLatestTrades'],
+            per_page, max_concurrency
+        )
+
+    async def _iter_pages(
+            self,
+            fetch: t.Callable[[int], t.Awaitable[t.Dict]],
+            extract: t.Callable[[t.Dict], t.List[t.Dict]],
+            per_page: int,
+            max_concurrency: int,
+    ) -> t.AsyncIterator[t.Dict]:
+        """
+        Yield the items of every page, fetching ahead in background tasks.
+
+        With a known total (``result_info``) up to ``max_concurrency`` pages are fetched
+        in parallel, otherwise only the next page is prefetched while the current one
+        is consumed.
+        """
+
+        current = await fetch(1)
+        total_pages = self._total_pages(current, per_page)
+        next_page = 2
+        pending: t.Deque[asyncio.Future] = deque()
+
+        try:
+            while True:
+                items = extract(current)
+
+                if total_pages is not None:
+                    while next_page <= total_pages and len(pending) < max_concurrency:
+                        pending.append(asyncio.ensure_future(fetch(next_page)))
+                        next_page += 1
+                elif len(items) >= per_page and not pending:
+                    pending.append(asyncio.ensure_future(fetch(next_page)))
+                    next_page += 1
+
+                for item in items:
+                    yield item
+
+                if not pending:
+                    return
+                current = await pending.popleft()
+        finally:
+            for task in pending:
+                task.cancel()
+
     async def get_order_status(self, order_id: str) -> t.Dict:
         return await self._get(f'account/orders/{order_id}', signed=True)
 
@@ -458,9 +1314,18 @@ class AsyncClient(BaseClient):
         )
 
     async def close_connection(self):
-        if self.session:
-            assert self.session
+        for task in list(self._background_tasks):
+            task.cancel()
+
+        # shared sessions are owned (and closed) by whoever created them
+        if self.session and self._shared_session is None:
             await self.session.close()
+            self.session = None
 
     def __del__(self):
-        asyncio.get_event_loop().create_task(self.close_connection())
+        session = getattr(self, 'session', None)
+        if session is None or session.closed or self._shared_session is not None:
+            return
+
+        if self._session_loop is not None and self._session_loop.is_running():
+            self._session_loop.create_task(session.close())
@@ -0,0 +1,183 @@
+import asyncio
+import threading
+import time
+import typing as t
+
+
+__all__ = [
+    'TokenBucket',
+    'RateLimiter',
+]
+
+
+class TokenBucket:
+    """
+    Thread-safe token bucket with AIMD rate adaptation.
+
+    Tokens are reserved ahead of time, so callers only compute how long to wait
+    and never hold the lock while sleeping. That makes the same bucket usable
+    from threads and from coroutines at once.
+
+    The rate is cut at most once per round of requests: a 429 for a request sent
+    before the last decrease answers a rate that is already gone and only
+    drops the burst allowance.
+    """
+
+    def __init__(
+            self,
+            rate: float,
+            capacity: t.Optional[float] = None,
+            min_rate: t.Optional[float] = None,
+            decrease_factor: float = 0.5,
+            increase_step: t.Optional[float] = None,
+            clock: t.Callable[[], float] = time.monotonic,
+    ):
+        """
+        :param rate: Requests per second allowed when the server is not throttling
+        :type rate: float
+
+        :param capacity: Burst size, defaults to one second worth of requests
+        :type capacity: t.Optional[float]
+
+        :param min_rate: Lowest rate the bucket backs off to, defaults to a tenth of ``rate``
+        :type min_rate: t.Optional[float]
+
+        :param decrease_factor: Multiplier applied to the rate on a 429
+        :type decrease_factor: float
+
+        :param increase_step: Rate added back after every successful request, defaults to 1% of ``rate``
+        :type increase_step: t.Optional[float]
+
+        :param clock: Monotonic clock
+        :type clock: t.Callable[[], float]
+        """
+        self.max_rate = float(rate)
+        self.rate = float(rate)
+        self.capacity = float(capacity if capacity is not None else max(rate, 1))
+        self.min_rate = float(min_rate if min_rate is not None else rate / 10)
+        self.decrease_factor = decrease_factor
+        self.increase_step = float(increase_step if increase_step is not None else rate / 100)
+
+        self._clock = clock
+        self._tokens = self.capacity
+        self._updated = clock()
+        self._paused_until = 0.0
+        self._decreased_at: t.Optional[float] = None
+        self._lock = threading.Lock()
+
+    def _refill(self, now: float):
+        elapsed = now - self._updated
+        if elapsed > 0:
+            self._tokens = min(self.capacity, self._tokens + elapsed * self.rate)
+            self._updated = now
+
+    def reserve(self) -> float:
+        """
+        Take one token.
+
+        :return: Seconds the caller has to wait before sending
+        :rtype: float
+        """
+
+        with self._lock:
+            now = self._clock()
+            self._refill(now)
+            self._tokens -= 1
+
+            wait = 0.0 if self._tokens >= 0 else -self._tokens / self.rate
+            return max(wait, self._paused_until - now)
+
+    def throttled(self, retry_after: t.Optional[float] = None, sent: t.Optional[float] = None):
+        """
+        Back off after a 429.
+
+        :param retry_after: Seconds the server asked to wait
+        :type retry_after: t.Optional[float]
+
+        :param sent: Clock time the throttled request was sent at, None always decreases the rate
+        :type sent: t.Optional[float]
+        """
+
+        with self._lock:
+            now = self._clock()
+            self._refill(now)
+            if sent is None or self._decreased_at is None or sent > self._decreased_at:
+                self.rate = max(self.min_rate, self.rate * self.decrease_factor)
+                self._decreased_at = now
+            # drop the burst allowance, the server just told us it is exhausted
+            self._tokens = min(self._tokens, 0.0)
+            if retry_after:
+                self._paused_until = max(self._paused_until, now + retry_after)
+
+    def succeeded(self):
+        if self.rate >= self.max_rate:
+            return
+
+        with self._lock:
+            self._refill(self._clock())
+            self.rate = min(self.max_rate, self.rate + self.increase_step)
+
+
+class RateLimiter:
+    """
+    Client-side rate limiter with separate budgets for public and signed endpoints.
+
+    Pass the same instance to every client that should share a budget;
+    :meth:`shared` returns a process-wide instance for that purpose.
+    """
+
+    _shared: t.Optional['RateLimiter'] = None
+    _shared_lock = threading.Lock()
+
+    def __init__(self, public_rate: float = 10, signed_rate: float = 5, **bucket_kwargs):
+        """
+        :param public_rate: Requests per second to public endpoints
+        :type public_rate: float
+
+        :param signed_rate: Requests per second to signed (account) endpoints
+        :type signed_rate: float
+
+        :param bucket_kwargs: Extra ``TokenBucket`` arguments applied to both budgets
+        :type bucket_kwargs: t.Any
+        """
+        self.public = TokenBucket(public_rate, **bucket_kwargs)
+        self.signed = TokenBucket(signed_rate, **bucket_kwargs)
+
+    @classmethod
+    def shared(cls) -> 'RateLimiter':
+        with cls._shared_lock:
+            if cls._shared is None:
+                cls._shared = cls()
+            return cls._shared
+
+    def bucket(self, signed: bool) -> TokenBucket:
+        return self.signed if signed else self.public
+
+    def acquire(self, signed: bool) -> float:
+        """
+        Wait for a token.
+
+        :return: Bucket clock time the request goes out at, for :meth:`feedback`
+        :rtype: float
+        """
+
+        bucket = self.bucket(signed)
+        wait = bucket.reserve()
+        if wait > 0:
+            time.sleep(wait)
+        return bucket._clock()
+
+    async def acquire_async(self, signed: bool) -> float:
+        bucket = self.bucket(signed)
+        wait = bucket.reserve()
+        if wait > 0:
+            await asyncio.sleep(wait)
+        return bucket._clock()
+
+    def feedback(
+            self, signed: bool, status_code: int, retry_after: t.Optional[float] = None, sent: t.Optional[float] = None
+    ):
+        if status_code == 429:
+            self.bucket(signed).throttled(retry_after, sent)
+        elif 200 <= status_code < 300:
+            self.bucket(signed).succeeded()
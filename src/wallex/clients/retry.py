@@ -0,0 +1,157 @@
+import asyncio
+import random
+import threading
+import time
+import typing as t
+from collections import deque
+
+import aiohttp
+import requests
+
+from ..exceptions import APIException
+
+
+__all__ = [
+    'RetryPolicy',
+]
+
+
+class RetryPolicy:
+    """
+    Retry transient failures with jittered exponential backoff.
+
+    Only idempotent requests are retried: every GET, ``create_order`` when a
+    ``client_id`` is set and ``withdraw`` when a ``client_unique_id`` is set,
+    since the exchange deduplicates on those ids. Each endpoint has a retry
+    budget per time window so an outage does not turn into a retry storm.
+    """
+
+    RETRY_STATUSES = frozenset((429, 500, 502, 503, 504))
+
+    TRANSIENT_ERRORS = (
+        requests.ConnectionError,
+        requests.Timeout,
+        aiohttp.ClientConnectionError,
+        aiohttp.ClientPayloadError,
+        asyncio.TimeoutError,
+    )
+
+    # POST endpoints that are safe to repeat when the given body field is present
+    IDEMPOTENCY_KEYS: t.Dict[str, str] = {
+        'account/orders': 'client_id',
+        'account/crypto-withdrawal': 'client_unique_id',
+    }
+
+    def __init__(
+            self,
+            max_attempts: int = 3,
+            backoff_base: float = 0.1,
+            backoff_max: float = 5.0,
+            jitter: bool = True,
+            retry_statuses: t.Optional[t.Iterable[int]] = None,
+            budget: int = 20,
+            budget_window: float = 60.0,
+            budgets: t.Optional[t.Dict[str, int]] = None,
+            clock: t.Callable[[], float] = time.monotonic,
+    ):
+        """
+        :param max_attempts: Attempts per request, including the first one
+        :type max_attempts: int
+
+        :param backoff_base: Backoff before the first retry, doubled for every following one
+        :type backoff_base: float
+
+        :param backoff_max: Upper bound of a single backoff
+        :type backoff_max: float
+
+        :param jitter: Draw the backoff uniformly from ``[0, backoff]`` (full jitter)
+        :type jitter: bool
+
+        :param retry_statuses: HTTP statuses worth retrying
+        :type retry_statuses: t.Optional[t.Iterable[int]]
+
+        :param budget: Retries allowed per endpoint within ``budget_window``
+        :type budget: int
+
+        :param budget_window: Length of the budget window in seconds
+        :type budget_window: float
+
+        :param budgets: Per endpoint overrides of ``budget``, keyed by path
+        :type budgets: t.Optional[t.Dict[str, int]]
+
+        :param clock: Monotonic clock
+        :type clock: t.Callable[[], float]
+        """
+        self.max_attempts = max_attempts
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.jitter = jitter
+        self.retry_statuses = frozenset(retry_statuses) if retry_statuses is not None else self.RETRY_STATUSES
+        self.budget = budget
+        self.budget_window = budget_window
+        self.budgets = budgets or {}
+
+        self._clock = clock
+        self._spent: t.Dict[str, t.Deque[float]] = {}
+        self._lock = threading.Lock()
+
+    def is_idempotent(self, method: str, path: str, kwargs: t.Dict[str, t.Any]) -> bool:
+        if method == 'get':
+            return True
+
+        if method == 'post' and path in self.IDEMPOTENCY_KEYS:
+            body = kwargs.get('json') or {}
+            return bool(body.get(self.IDEMPOTENCY_KEYS[path]))
+
+        return False
+
+    def is_transient(self, error: BaseException) -> bool:
+        if isinstance(error, APIException):
+            return error.status_code in self.retry_statuses
+        return isinstance(error, self.TRANSIENT_ERRORS)
+
+    def _consume_budget(self, path: str) -> bool:
+        limit = self.budgets.get(path, self.budget)
+        now = self._clock()
+
+        with self._lock:
+            spent = self._spent.setdefault(path, deque())
+            while spent and spent[0] <= now - self.budget_window:
+                spent.popleft()
+
+            if len(spent) >= limit:
+                return False
+
+            spent.append(now)
+            return True
+
+    def should_retry(self, error: BaseException, attempt: int, path: str) -> bool:
+        """
+        :param error: Error raised by the last attempt
+        :type error: BaseException
+
+        :param attempt: Number of attempts made so far
+        :type attempt: int
+
+        :param path: Endpoint path, used for the retry budget
+        :type path: str
+
+        :return: True if the request should be sent again
+        :rtype: bool
+        """
+
+        return attempt < self.max_attempts and self.is_transient(error) and self._consume_budget(path)
+
+    def backoff(self, attempt: int, error: t.Optional[BaseException] = None) -> float:
+        delay = min(self.backoff_max, self.backoff_base * (2 ** (attempt - 1)))
+        if self.jitter:
+            delay = random.uniform(0, delay)
+
+        # never come back before the server said we may
+        if isinstance(error, APIException) and error.status_code == 429:
+            try:
+                delay = max(delay, float(error.response.headers.get('Retry-After')))
+            except (AttributeError, TypeError, ValueError):
+                pass
+
+        return delay
@@ -0,0 +1,244 @@
+import socket
+import typing as t
+
+import aiohttp
+import requests
+from requests.adapters import HTTPAdapter, DEFAULT_POOLBLOCK
+
+
+__all__ = [
+    'TransportConfig',
+    'ConnectorConfig',
+    'SocketOptionsAdapter',
+]
+
+
+class SocketOptionsAdapter(HTTPAdapter):
+    """
+    ``HTTPAdapter`` that applies socket options to every pooled connection.
+    """
+
+    __attrs__ = HTTPAdapter.__attrs__ + ['socket_options']
+
+    def __init__(self, socket_options: t.Optional[t.List[t.Tuple[int, int, int]]] = None, **kwargs):
+        # must be set before ``HTTPAdapter.__init__`` builds the pool manager
+        self.socket_options = socket_options
+        super().__init__(**kwargs)
+
+    def init_poolmanager(self, connections, maxsize, block=DEFAULT_POOLBLOCK, **pool_kwargs):
+        if self.socket_options is not None:
+            pool_kwargs['socket_options'] = self.socket_options
+        super().init_poolmanager(connections, maxsize, block, **pool_kwargs)
+
+    def proxy_manager_for(self, proxy, **proxy_kwargs):
+        if self.socket_options is not None:
+            proxy_kwargs['socket_options'] = self.socket_options
+        return super().proxy_manager_for(proxy, **proxy_kwargs)
+
+
+class TransportConfig:
+    """
+    Connection pool and socket settings for the sync ``Client``.
+
+    Build one session with :meth:`build_session` and pass it to several clients
+    (``Client(api_key, session=session)``) to share the pooled TLS connections
+    between them. The API key is sent per request, so sharing is safe.
+    """
+
+    def __init__(
+            self,
+            pool_connections: int = 10,
+            pool_maxsize: int = 32,
+            pool_block: bool = False,
+            max_retries: int = 0,
+            keep_alive: bool = True,
+            tcp_nodelay: bool = True,
+            keepalive_idle: t.Optional[int] = 60,
+            keepalive_interval: t.Optional[int] = 15,
+            keepalive_count: t.Optional[int] = 4,
+            adapters: t.Optional[t.Dict[str, HTTPAdapter]] = None,
+    ):
+        """
+        :param pool_connections: Number of host pools to cache
+        :type pool_connections: int
+
+        :param pool_maxsize: Maximum number of connections kept per host pool
+        :type pool_maxsize: int
+
+        :param pool_block: Block when the pool is exhausted instead of opening throwaway connections
+        :type pool_block: bool
+
+        :param max_retries: urllib3 connection retries
+        :type max_retries: int
+
+        :param keep_alive: Use HTTP and TCP keep-alive
+        :type keep_alive: bool
+
+        :param tcp_nodelay: Disable Nagle's algorithm
+        :type tcp_nodelay: bool
+
+        :param keepalive_idle: Seconds before the first TCP keep-alive probe (if supported)
+        :type keepalive_idle: t.Optional[int]
+
+        :param keepalive_interval: Seconds between TCP keep-alive probes (if supported)
+        :type keepalive_interval: t.Optional[int]
+
+        :param keepalive_count: Failed probes before the connection is dropped (if supported)
+        :type keepalive_count: t.Optional[int]
+
+        :param adapters: Extra adapters to mount, keyed by URL prefix
+        :type adapters: t.Optional[t.Dict[str, HTTPAdapter]]
+        """
+        self.pool_connections = pool_connections
+        self.pool_maxsize = pool_maxsize
+        self.pool_block = pool_block
+        self.max_retries = max_retries
+        self.keep_alive = keep_alive
+        self.tcp_nodelay = tcp_nodelay
+        self.keepalive_idle = keepalive_idle
+        self.keepalive_interval = keepalive_interval
+        self.keepalive_count = keepalive_count
+        self.adapters = adapters or {}
+
+    def socket_options(self) -> t.List[t.Tuple[int, int, int]]:
+        options = []
+
+        if self.tcp_nodelay:
+            options.append((socket.IPPROTO_TCP, socket.TCP_NODELAY, 1))
+
+        if self.keep_alive:
+            options.append((socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1))
+
+            # these are platform specific, skip the ones the OS does not know about
+            for name, value in (
+                    ('TCP_KEEPIDLE', self.keepalive_idle),
+                    ('TCP_KEEPINTVL', self.keepalive_interval),
+                    ('TCP_KEEPCNT', self.keepalive_count),
+            ):
+                if value is not None and hasattr(socket, name):
+                    options.append((socket.IPPROTO_TCP, getattr(socket, name), value))
+
+        return options
+
+    def build_adapter(self) -> HTTPAdapter:
+        return SocketOptionsAdapter(
+            socket_options=self.socket_options(),
+            pool_connections=self.pool_connections,
+            pool_maxsize=self.pool_maxsize,
+            pool_block=self.pool_block,
+            max_retries=self.max_retries,
+        )
+
+    def configure(self, session: requests.Session) -> requests.Session:
+        adapter = self.build_adapter()
+        session.mount('https://', adapter)
+        session.mount('http://', adapter)
+
+        for prefix, extra_adapter in self.adapters.items():
+            session.mount(prefix, extra_adapter)
+
+        if not self.keep_alive:
+            session.headers['Connection'] = 'close'
+
+        return session
+
+    def build_session(self, headers: t.Optional[t.Dict[str, str]] = None) -> requests.Session:
+        session = requests.session()
+        if headers:
+            session.headers.update(headers)
+        return self.configure(session)
+
+
+class ConnectorConfig:
+    """
+    ``aiohttp.TCPConnector`` settings for the ``AsyncClient``.
+
+    The connector and session are built lazily inside the running event loop,
+    so the same config can be created at import time.
+    """
+
+    def __init__(
+            self,
+            limit: int = 100,
+            limit_per_host: int = 0,
+            ttl_dns_cache: t.Optional[int] = 300,
+            use_dns_cache: bool = True,
+            keepalive_timeout: float = 30.0,
+            force_close: bool = False,
+            enable_cleanup_closed: bool = False,
+            use_aiodns: t.Optional[bool] = None,
+            connector_kwargs: t.Optional[t.Dict[str, t.Any]] = None,
+    ):
+        """
+        :param limit: Total number of simultaneous connections (0 for no limit)
+        :type limit: int
+
+        :param limit_per_host: Simultaneous connections to the same endpoint (0 for no limit)
+        :type limit_per_host: int
+
+        :param ttl_dns_cache: Seconds to cache resolved addresses (None caches forever)
+        :type ttl_dns_cache: t.Optional[int]
+
+        :param use_dns_cache: Cache DNS lookups
+        :type use_dns_cache: bool
+
+        :param keepalive_timeout: Seconds to keep idle connections open
+        :type keepalive_timeout: float
+
+        :param force_close: Close connections after each request
+        :type force_close: bool
+
+        :param enable_cleanup_closed: Abort SSL transports that were not closed cleanly
+        :type enable_cleanup_closed: bool
+
+        :param use_aiodns: Resolve with aiodns; ``None`` uses it when installed
+        :type use_aiodns: t.Optional[bool]
+
+        :param connector_kwargs: Extra ``aiohttp.TCPConnector`` arguments
+        :type connector_kwargs: t.Optional[t.Dict[str, t.Any]]
+        """
+        self.limit = limit
+        self.limit_per_host = limit_per_host
+        self.ttl_dns_cache = ttl_dns_cache
+        self.use_dns_cache = use_dns_cache
+        self.keepalive_timeout = keepalive_timeout
+        self.force_close = force_close
+        self.enable_cleanup_closed = enable_cleanup_closed
+        self.use_aiodns = use_aiodns
+        self.connector_kwargs = connector_kwargs or {}
+
+    def build_resolver(self) -> t.Optional[aiohttp.AsyncResolver]:
+        if self.use_aiodns is False:
+            return None
+
+        try:
+            import aiodns  # noqa: F401
+        except ImportError:
+            if self.use_aiodns:
+                raise ImportError('aiodns is required for use_aiodns=True, install it with `pip install aiodns`')
+            return None
+
+        return aiohttp.AsyncResolver()
+
+    def build_connector(self) -> aiohttp.TCPConnector:
+        kwargs = {
+            'limit': self.limit,
+            'limit_per_host': self.limit_per_host,
+            'ttl_dns_cache': self.ttl_dns_cache,
+            'use_dns_cache': self.use_dns_cache,
+            'enable_cleanup_closed': self.enable_cleanup_closed,
+            'force_close': self.force_close,
+        }
+        # aiohttp refuses keepalive_timeout together with force_close
+        if not self.force_close:
+            kwargs['keepalive_timeout'] = self.keepalive_timeout
+
+        resolver = self.build_resolver()
+        if resolver is not None:
+            kwargs['resolver'] = resolver
+
+        kwargs.update(self.connector_kwargs)
+        return aiohttp.TCPConnector(**kwargs)
+
+    def build_session(self, headers: t.Optional[t.Dict[str, str]] = None) -> aiohttp.ClientSession:
+        return aiohttp.ClientSession(connector=self.build_connector(), headers=headers)
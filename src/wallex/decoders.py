@@ -0,0 +1,65 @@
+import json
+import typing as t
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover
+    orjson = None
+
+
+__all__ = [
+    'loads',
+    'set_json_decoder',
+    'get_json_decoder',
+    'copy_decoded',
+]
+
+
+JSONDecoder = t.Callable[[t.Union[bytes, str]], t.Any]
+
+
+def _stdlib_loads(data: t.Union[bytes, str]) -> t.Any:
+    # `json.loads` detects the encoding of bytes itself, no intermediate str needed
+    return json.loads(data)
+
+
+_default_decoder: JSONDecoder = orjson.loads if orjson is not None else _stdlib_loads
+_decoder: JSONDecoder = _default_decoder
+
+
+def set_json_decoder(decoder: t.Optional[JSONDecoder] = None):
+    """
+    Replace the JSON decoder used for every response body.
+
+    :param decoder: Callable taking ``bytes`` and raising ``ValueError`` on invalid input,
+        ``None`` restores the default (orjson when installed, stdlib json otherwise)
+    :type decoder: t.Optional[JSONDecoder]
+
+    :return: None
+    """
+
+    global _decoder
+    _decoder = decoder or _default_decoder
+
+
+def get_json_decoder() -> JSONDecoder:
+    return _decoder
+
+
+def loads(data: t.Union[bytes, str]) -> t.Any:
+    return _decoder(data)
+
+
+def copy_decoded(value: t.Any) -> t.Any:
+    """
+    Deep copy of a decoded JSON document.
+
+    Only dicts and lists are copied, every other value a decoder produces is immutable,
+    which makes this several times faster than ``copy.deepcopy``.
+    """
+
+    if isinstance(value, dict):
+        return {key: copy_decoded(item) for key, item in value.items()}
+    if isinstance(value, list):
+        return [copy_decoded(item) for item in value]
+    return value
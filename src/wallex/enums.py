@@ -21,3 +21,18 @@ class Resolution(Enum):
     ONE_DAY = 'D'
     TWO_DAYS = '2D'
     THREE_DAYS = '3D'
+
+    @property
+    def seconds(self) -> int:
+        return _RESOLUTION_SECONDS[self.value]
+
+
+_RESOLUTION_SECONDS = {
+    '60': 60 * 60,
+    '180': 3 * 60 * 60,
+    '360': 6 * 60 * 60,
+    '720': 12 * 60 * 60,
+    'D': 24 * 60 * 60,
+    '2D': 2 * 24 * 60 * 60,
+    '3D': 3 * 24 * 60 * 60,
+}
@@ -1,21 +1,27 @@
 import typing as t
-import json
 
 from requests import Response
 from aiohttp import ClientResponse
 
+from . import decoders
+
 
 class APIException(Exception):
-    def __init__(self, response: t.Union[Response, ClientResponse], status_code: int, text: str):
+    def __init__(self, response: t.Union[Response, ClientResponse], status_code: int, body: t.Union[bytes, str]):
         self.code = 0
+        self.result = None
         try:
-            json_res = json.loads(text)
+            json_res = decoders.loads(body)
         except ValueError:
-            self.message = 'Invalid JSON error message from Wallex: {}'.format(response.text)
+            text = body.decode('utf-8', 'replace') if isinstance(body, bytes) else body
+            self.message = 'Invalid JSON error message from Wallex: {}'.format(text)
         else:
-            self.code = json_res['code']
-            self.message = json_res['message']
-            self.result = json_res['result']
+            if isinstance(json_res, dict):
+                self.code = json_res.get('code', 0)
+                self.message = json_res.get('message')
+                self.result = json_res.get('result')
+            else:
+                self.message = 'Unexpected error message from Wallex: {}'.format(json_res)
 
         self.status_code = status_code
         self.response = response
@@ -40,3 +46,11 @@ class OrderException(Exception):
 
     def __str__(self):
         return 'OrderException(code=%s): %s' % (self.field, self.message)
+
+
+class WebsocketNotConnected(Exception):
+    def __init__(self, message):
+        self.message = message
+
+    def __str__(self):
+        return 'WebsocketNotConnected: %s' % self.message
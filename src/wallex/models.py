@@ -2,6 +2,13 @@ import typing as t
 from pydantic import BaseModel, Field, root_validator
 from datetime import datetime
 
+from .exceptions import RequestException
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover
+    np = None
+
 
 class ResultInfo(BaseModel):
     page: int
@@ -171,22 +178,124 @@ class RecentTrades(_Response):
 
     result: Result
 
-#
-# class OHLC(_Response):
-#     raise NotImplementedError
-
-    # class Result(BaseModel):
-    #     class OHLC(BaseModel):
-    #         open: t.List[float] = Field(None, alias='o')
-    #         high: t.List[float] = Field(None, alias='h')
-    #         low: t.List[float] = Field(None, alias='l')
-    #         close: t.List[float] = Field(None, alias='c')
-    #         volume: t.List[float] = Field(None, alias='v')
-    #         timestamp: t.List[datetime] = Field(None, alias='t')
-    #
-    #     ohlc: t.List[OHLC]
-    #
-    # result: Result
+
+class OHLC:
+    """
+    Columnar OHLC bars backed by contiguous NumPy arrays.
+
+    Not a pydantic model on purpose: bars are never turned into per-bar Python
+    objects. ``time`` holds int64 epoch seconds, the other columns float64.
+    Requires numpy; ``to_pandas`` and ``to_arrow`` need pandas and pyarrow.
+    """
+
+    __slots__ = ('time', 'open', 'high', 'low', 'close', 'volume')
+
+    COLUMNS = {'t': 'time', 'o': 'open', 'h': 'high', 'l': 'low', 'c': 'close', 'v': 'volume'}
+
+    def __init__(self, time, open, high, low, close, volume):
+        self.time = time
+        self.open = open
+        self.high = high
+        self.low = low
+        self.close = close
+        self.volume = volume
+
+    @staticmethod
+    def _numpy():
+        if np is None:
+            raise ImportError('numpy is required for OHLC, install it with `pip install wallex[numpy]`')
+        return np
+
+    @classmethod
+    def from_udf(cls, data: t.Dict[str, t.Any]) -> 'OHLC':
+        """
+        Build from a UDF ``history`` response (``{'s': 'ok', 't': [...], 'o': [...], ...}``).
+
+        Missing values become NaN, numeric strings are parsed by numpy in one pass.
+
+        :raises RequestException: If the response has an error status; ``no_data`` gives an empty OHLC
+        """
+
+        numpy = cls._numpy()
+        status = data.get('s')
+        if status == 'no_data':
+            return cls.empty()
+        if status != 'ok':
+            raise RequestException(f'UDF history failed: {data.get("errmsg") or status}')
+
+        return cls(
+            numpy.asarray(data['t'], dtype=numpy.int64),
+            *(numpy.asarray(data[key], dtype=numpy.float64) for key in 'ohlcv')
+        )
+
+    @classmethod
+    def from_buffers(cls, buffers: t.Dict[str, t.Any]) -> 'OHLC':
+        """
+        Wrap native-endian int64/float64 buffers keyed ``t/o/h/l/c/v`` without copying,
+        e.g. the memory-mapped columns of a ``CandleStore``. The buffers must not change
+        while the arrays are in use.
+        """
+
+        numpy = cls._numpy()
+        return cls(
+            numpy.frombuffer(buffers['t'], dtype=numpy.int64),
+            *(numpy.frombuffer(buffers[key], dtype=numpy.float64) for key in 'ohlcv')
+        )
+
+    @classmethod
+    def empty(cls) -> 'OHLC':
+        numpy = cls._numpy()
+        return cls(numpy.empty(0, dtype=numpy.int64), *(numpy.empty(0, dtype=numpy.float64) for _ in range(5)))
+
+    def __len__(self):
+        return len(self.time)
+
+    def __repr__(self):
+        return f'OHLC(bars={len(self)})'
+
+    def columns(self) -> t.Dict[str, t.Any]:
+        return {name: getattr(self, name) for name in self.__slots__}
+
+    def between(self, from_date: t.Optional[int] = None, to_date: t.Optional[int] = None) -> 'OHLC':
+        """
+        Bars within ``[from_date, to_date]`` as views of the same arrays.
+        """
+
+        start = 0 if from_date is None else int(self.time.searchsorted(from_date, side='left'))
+        end = len(self) if to_date is None else int(self.time.searchsorted(to_date, side='right'))
+        return type(self)(*(column[start:end] for column in self.columns().values()))
+
+    def to_udf(self) -> t.Dict[str, t.Any]:
+        if not len(self):
+            return {'s': 'no_data'}
+
+        udf: t.Dict[str, t.Any] = {'s': 'ok'}
+        for key, name in self.COLUMNS.items():
+            udf[key] = getattr(self, name).tolist()
+        return udf
+
+    def to_pandas(self):
+        """
+        ``pandas.DataFrame`` indexed by UTC bar time, columns share memory with the arrays where pandas allows.
+        """
+
+        import pandas as pd
+
+        index = pd.DatetimeIndex(pd.to_datetime(self.time, unit='s', utc=True), name='time')
+        return pd.DataFrame(
+            {name: getattr(self, name) for name in self.__slots__[1:]}, index=index, copy=False
+        )
+
+    def to_arrow(self):
+        """
+        ``pyarrow.Table`` of the columns, numeric arrays without nulls are wrapped zero-copy.
+        """
+
+        import pyarrow as pa
+
+        arrays = [pa.array(self.time, type=pa.timestamp('s', tz='UTC'))]
+        arrays.extend(pa.array(getattr(self, name)) for name in self.__slots__[1:])
+        return pa.Table.from_arrays(arrays, names=list(self.__slots__))
 
 
 setting_sample = {
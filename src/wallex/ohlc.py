@@ -0,0 +1,100 @@
+import typing as t
+
+from .enums import Resolution
+from .exceptions import RequestException
+
+
+__all__ = [
+    'OHLC_FIELDS',
+    'split_range',
+    'merge_udf',
+]
+
+
+OHLC_FIELDS = ('o', 'h', 'l', 'c', 'v')
+
+
+def split_range(
+        from_date: int, to_date: int, resolution: Resolution, max_bars: int = 1000
+) -> t.List[t.Tuple[int, int]]:
+    """
+    Split ``[from_date, to_date]`` into windows of at most ``max_bars`` bars.
+
+    Window edges are aligned to the resolution so neighbouring chunks never
+    split a bar.
+
+    :param from_date: Start of the range, epoch seconds
+    :type from_date: int
+
+    :param to_date: End of the range, epoch seconds
+    :type to_date: int
+
+    :param resolution: Bar resolution
+    :type resolution: Resolution
+
+    :param max_bars: Bars per window
+    :type max_bars: int
+
+    :return: ``(from, to)`` pairs, in order
+    :rtype: t.List[t.Tuple[int, int]]
+    """
+
+    step = resolution.seconds
+    span = step * max_bars
+    start = from_date - from_date % step
+
+    windows = []
+    while start <= to_date:
+        end = min(start + span - 1, to_date)
+        windows.append((max(start, from_date), end))
+        start += span
+    return windows
+
+
+def merge_udf(
+        chunks: t.Iterable[t.Dict[str, t.Any]], windows: t.Optional[t.Sequence[t.Tuple[int, int]]] = None
+) -> t.Dict[str, t.Any]:
+    """
+    Merge UDF ``history`` responses into one, ordered and deduplicated by bar time.
+
+    Later chunks win when the same timestamp shows up twice. ``no_data`` chunks
+    hold no bars, any other status than ``ok`` fails the merge.
+
+    :param chunks: UDF responses (``{'s': 'ok', 't': [...], 'o': [...], ...}``)
+    :type chunks: t.Iterable[t.Dict[str, t.Any]]
+
+    :param windows: ``(from, to)`` range of every chunk, named in the error
+    :type windows: t.Optional[t.Sequence[t.Tuple[int, int]]]
+
+    :raises RequestException: If any chunk has an error status, naming every failed chunk
+
+    :return: A single UDF response, ``{'s': 'no_data'}`` when no chunk had bars
+    :rtype: t.Dict[str, t.Any]
+    """
+
+    bars: t.Dict[int, t.Tuple] = {}
+    failed: t.List[str] = []
+    for number, chunk in enumerate(chunks):
+        status = chunk.get('s')
+        if status == 'no_data':
+            continue
+        if status != 'ok':
+            where = windows[number] if windows is not None else f'chunk {number}'
+            failed.append(f'{where}: {chunk.get("errmsg") or status}')
+            continue
+
+        columns = [chunk.get(field) or [] for field in OHLC_FIELDS]
+        for index, timestamp in enumerate(chunk.get('t') or []):
+            bars[int(timestamp)] = tuple(column[index] if index < len(column) else None for column in columns)
+
+    if failed:
+        raise RequestException('UDF history failed for ' + ', '.join(failed))
+
+    if not bars:
+        return {'s': 'no_data'}
+
+    timestamps = sorted(bars)
+    merged: t.Dict[str, t.Any] = {'s': 'ok', 't': timestamps}
+    for position, field in enumerate(OHLC_FIELDS):
+        merged[field] = [bars[timestamp][position] for timestamp in timestamps]
+    return merged
@@ -0,0 +1,598 @@
+import asyncio
+import logging
+import threading
+import time
+import typing as t
+import weakref
+from concurrent.futures import Future
+
+from .enums import SIDE_BUY, SIDE_SELL
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover
+    np = None
+
+
+__all__ = [
+    'OrderBook',
+    'LiveOrderBook',
+]
+
+
+logger = logging.getLogger(__name__)
+
+
+def _numpy():
+    if np is None:
+        raise ImportError('numpy is required for OrderBook, install it with `pip install wallex[numpy]`')
+    return np
+
+
+class _Side:
+    """
+    One side of the book: prices ordered best first and their running totals.
+    """
+
+    __slots__ = ('prices', 'quantities', 'cum_quantity', 'cum_notional')
+
+    def __init__(self, prices, quantities):
+        self.prices = prices
+        self.quantities = quantities
+        # a leading zero lets a level index address "everything before it"
+        self.cum_quantity = np.concatenate(([0.0], np.cumsum(quantities)))
+        self.cum_notional = np.concatenate(([0.0], np.cumsum(prices * quantities)))
+
+    def __len__(self):
+        return len(self.prices)
+
+    def cost(self, quantity):
+        """
+        Notional of taking ``quantity`` off this side and the index of the last level touched,
+        NaN where the side is too thin.
+        """
+
+        quantity = np.asarray(quantity, dtype=np.float64)
+        level = np.searchsorted(self.cum_quantity[1:], quantity, side='left')
+        thin = level >= len(self.prices)
+        level = np.minimum(level, max(len(self.prices) - 1, 0))
+
+        if not len(self.prices):
+            return np.full(quantity.shape, np.nan), level
+        cost = self.cum_notional[level] + (quantity - self.cum_quantity[level]) * self.prices[level]
+        return np.where(thin, np.nan, cost), level
+
+
+class OrderBook:
+    """
+    Order book snapshot held as sorted NumPy arrays.
+
+    Bids are ordered by descending and asks by ascending price, with running
+    quantity and notional totals, so pricing a market order of any size is a
+    binary search instead of a loop over levels. Every analytic that takes a
+    quantity also accepts an array of quantities and answers for all of them
+    at once. Requires numpy.
+    """
+
+    __slots__ = ('bids', 'asks')
+
+    def __init__(self, bid_prices, bid_quantities, ask_prices, ask_quantities):
+        """
+        :param bid_prices: Bid prices, any order
+        :param bid_quantities: Quantities of ``bid_prices``
+        :param ask_prices: Ask prices, any order
+        :param ask_quantities: Quantities of ``ask_prices``
+        """
+        _numpy()
+        bid_prices, bid_quantities = self._sorted(bid_prices, bid_quantities, descending=True)
+        ask_prices, ask_quantities = self._sorted(ask_prices, ask_quantities, descending=False)
+        self.bids = _Side(bid_prices, bid_quantities)
+        self.asks = _Side(ask_prices, ask_quantities)
+
+    @staticmethod
+    def _sorted(prices, quantities, descending: bool):
+        prices = np.asarray(prices, dtype=np.float64)
+        quantities = np.asarray(quantities, dtype=np.float64)
+        order = np.argsort(-prices if descending else prices, kind='stable')
+        return prices[order], quantities[order]
+
+    @staticmethod
+    def _levels(levels: t.Iterable[t.Any]):
+        rows = [
+            (level['price'], level['quantity']) if isinstance(level, dict) else (level[0], level[1])
+            for level in levels or ()
+        ]
+        table = np.array(rows, dtype=np.float64).reshape(-1, 2)
+        return table[:, 0], table[:, 1]
+
+    @classmethod
+    def from_levels(cls, bids: t.Iterable[t.Any], asks: t.Iterable[t.Any]) -> 'OrderBook':
+        """
+        :param bids: ``{'price': ..., 'quantity': ...}`` dicts or ``(price, quantity)`` pairs
+        :type bids: t.Iterable[t.Any]
+
+        :param asks: Same as ``bids``
+        :type asks: t.Iterable[t.Any]
+
+        :rtype: OrderBook
+        """
+
+        _numpy()
+        return cls(*cls._levels(bids), *cls._levels(asks))
+
+    @classmethod
+    def from_response(cls, data: t.Dict[str, t.Any]) -> 'OrderBook':
+        """
+        Build from a ``depth`` response, or its ``result``, without creating an object per level.
+        """
+
+        result = data.get('result', data)
+        return cls.from_levels(result.get('bid'), result.get('ask'))
+
+    def __repr__(self):
+        return f'OrderBook(bids={len(self.bids)}, asks={len(self.asks)})'
+
+    def _side(self, side: str) -> _Side:
+        # a buy takes liquidity from the asks, a sell from the bids
+        if side == SIDE_BUY:
+            return self.asks
+        if side == SIDE_SELL:
+            return self.bids
+        raise ValueError(f'Invalid side {side!r}, expected {SIDE_BUY!r} or {SIDE_SELL!r}')
+
+    @property
+    def best_bid(self) -> float:
+        return float(self.bids.prices[0]) if len(self.bids) else float('nan')
+
+    @property
+    def best_ask(self) -> float:
+        return float(self.asks.prices[0]) if len(self.asks) else float('nan')
+
+    @property
+    def spread(self) -> float:
+        return self.best_ask - self.best_bid
+
+    @property
+    def mid(self) -> float:
+        return (self.best_ask + self.best_bid) / 2
+
+    def imbalance(self, levels: t.Optional[int] = None) -> float:
+        """
+        :param levels: Levels per side taken into account, all by default
+        :type levels: t.Optional[int]
+
+        :return: ``(bid - ask) / (bid + ask)`` quantity, from -1 (all asks) to 1 (all bids)
+        :rtype: float
+        """
+
+        bid = self.bids.cum_quantity[min(len(self.bids), levels if levels is not None else len(self.bids))]
+        ask = self.asks.cum_quantity[min(len(self.asks), levels if levels is not None else len(self.asks))]
+        total = bid + ask
+        return float((bid - ask) / total) if total else 0.0
+
+    def liquidity(self, side: str, price: float) -> float:
+        """
+        :return: Quantity a ``side`` order can fill at ``price`` or better
+        :rtype: float
+        """
+
+        book = self._side(side)
+        if side == SIDE_BUY:
+            level = np.searchsorted(book.prices, price, side='right')
+        else:
+            level = np.searchsorted(-book.prices, -price, side='right')
+        return float(book.cum_quantity[level])
+
+    def cost(self, side: str, quantity):
+        """
+        :return: Total price of a market order for ``quantity``, NaN if the book is too thin
+        :rtype: float | numpy.ndarray
+        """
+
+        return self._scalar(self._side(side).cost(quantity)[0])
+
+    def vwap(self, side: str, quantity):
+        """
+        :param side: ``SIDE_BUY`` or ``SIDE_SELL``
+        :type side: str
+
+        :param quantity: Order size, or an array of sizes
+        :type quantity: float | numpy.ndarray
+
+        :return: Average fill price of a market order, NaN if the book is too thin
+        :rtype: float | numpy.ndarray
+        """
+
+        quantity = np.asarray(quantity, dtype=np.float64)
+        cost, _ = self._side(side).cost(quantity)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            return self._scalar(cost / quantity)
+
+    def price_for_depth(self, side: str, quantity):
+        """
+        :return: Worst price a market order for ``quantity`` reaches, i.e. the limit
+            price that fills it at once, NaN if the book is too thin
+        :rtype: float | numpy.ndarray
+        """
+
+        book = self._side(side)
+        cost, level = book.cost(quantity)
+        if not len(book):
+            return self._scalar(cost)
+        return self._scalar(np.where(np.isnan(cost), np.nan, book.prices[level]))
+
+    def slippage(self, side: str, quantity):
+        """
+        :return: How much worse than the best price the average fill is, as a fraction of the best price
+        :rtype: float | numpy.ndarray
+        """
+
+        book = self._side(side)
+        best = book.prices[0] if len(book) else np.nan
+        vwap = self.vwap(side, quantity)
+        return self._scalar((vwap - best) / best if side == SIDE_BUY else (best - vwap) / best)
+
+    @staticmethod
+    def _scalar(value):
+        return float(value) if np.ndim(value) == 0 else value
+
+
+class _Fanout:
+    """
+    Single socket.io handler of one event calling several callbacks in turn.
+    """
+
+    def __init__(self, event: str, previous: t.Optional[t.Callable[..., t.Any]] = None):
+        self.event = event
+        self.callbacks: t.List[t.Callable[..., t.Any]] = [previous] if previous is not None else []
+
+    def __call__(self, *args):
+        for callback in list(self.callbacks):
+            try:
+                callback(*args)
+            except Exception:
+                logger.exception('%r handler %r failed', self.event, callback)
+
+
+# fan-out handlers of sockets whose ``on`` keeps one handler per event, like ``WallexWebsocket``
+_fanouts: 'weakref.WeakKeyDictionary[t.Any, t.Dict[str, _Fanout]]' = weakref.WeakKeyDictionary()
+
+
+def _listen(ws, event: str, callback: t.Callable[..., t.Any]):
+    fanouts = _fanouts.setdefault(ws, {})
+    fanout = fanouts.get(event)
+    if fanout is None:
+        # keep a handler registered before, e.g. by the user, working next to ours
+        handlers = getattr(getattr(ws, '_sio', None), 'handlers', {})
+        fanout = fanouts[event] = _Fanout(event, handlers.get('/', {}).get(event))
+        ws.on(event, fanout)
+    fanout.callbacks.append(callback)
+
+
+class LiveOrderBook:
+    """
+    Order book of one market kept current from the websocket depth channels.
+
+    Wallex publishes the whole visible side on ``{symbol}@buyDepth`` and
+    ``{symbol}@sellDepth`` on every change, without sequence numbers, so an
+    update replaces its side. A REST ``depth`` snapshot seeds the book and is
+    fetched again whenever the book can no longer be trusted: the sides cross,
+    a message can not be parsed, a side goes quiet for longer than
+    ``max_staleness`` or the socket reconnects. A snapshot never overwrites a
+    side that the socket updated after the snapshot was requested.
+
+    :attr:`top` is a tuple swapped in one assignment, so reading the best bid
+    and ask is O(1) and safe from any thread.
+
+    Snapshots are fetched in the background and never block the thread that
+    applies socket messages: on the ``AsyncClient``'s event loop, or on a
+    worker thread with a ``Client``. A failed snapshot is logged and leaves the
+    book marked for resync.
+    """
+
+    BUY_DEPTH = '{}@buyDepth'
+    SELL_DEPTH = '{}@sellDepth'
+
+    def __init__(
+            self,
+            symbol: str,
+            client=None,
+            max_staleness: t.Optional[float] = None,
+            min_resync_interval: float = 1.0,
+            clock: t.Callable[[], float] = time.monotonic,
+            loop: t.Optional[asyncio.AbstractEventLoop] = None,
+    ):
+        """
+        :param symbol: Market symbol, e.g. ``BTCTMN``
+        :type symbol: str
+
+        :param client: ``Client`` or ``AsyncClient`` used for REST snapshots, resync is disabled without one
+        :type client: t.Optional[wallex.Client | wallex.AsyncClient]
+
+        :param max_staleness: Seconds a side may go without an update before :meth:`check` resyncs
+        :type max_staleness: t.Optional[float]
+
+        :param min_resync_interval: Minimum seconds between two snapshots
+        :type min_resync_interval: float
+
+        :param clock: Monotonic clock
+        :type clock: t.Callable[[], float]
+
+        :param loop: Event loop an ``AsyncClient`` runs on, by default the one :meth:`attach`,
+            :meth:`follow` or :meth:`resync` is first called in
+        :type loop: t.Optional[asyncio.AbstractEventLoop]
+        """
+        _numpy()
+        self.symbol = symbol
+        self.client = client
+        self.max_staleness = max_staleness
+        self.min_resync_interval = min_resync_interval
+
+        self.updates = 0
+        self.resyncs = 0
+
+        self.top: t.Tuple[float, float, float, float] = (float('nan'),) * 4
+        self.needs_resync = True
+
+        self._clock = clock
+        self._channels = {self.BUY_DEPTH.format(symbol): 'bid', self.SELL_DEPTH.format(symbol): 'ask'}
+        empty = np.empty(0, dtype=np.float64)
+        self._sides = {'bid': (empty, empty), 'ask': (empty, empty)}
+        self._updated = {'bid': None, 'ask': None}
+        self._book: t.Optional[OrderBook] = None
+        self._last_resync: t.Optional[float] = None
+        self._resyncing = False
+        self._loop = loop
+        self._listeners: t.List[t.Callable[['LiveOrderBook'], None]] = []
+        self._lock = threading.RLock()
+
+    def __repr__(self):
+        return f'LiveOrderBook({self.symbol}, bid={self.best_bid}, ask={self.best_ask})'
+
+    @property
+    def channels(self) -> t.List[str]:
+        return list(self._channels)
+
+    @property
+    def best_bid(self) -> float:
+        return self.top[0]
+
+    @property
+    def best_ask(self) -> float:
+        return self.top[2]
+
+    def on_update(self, callback: t.Callable[['LiveOrderBook'], None]):
+        """
+        Call ``callback(book)`` after every change, on the thread that applied it.
+        """
+
+        self._listeners.append(callback)
+
+    def attach(self, ws):
+        """
+        Subscribe to the depth channels of ``ws`` and route its messages here.
+
+        Handlers are added next to the ones already registered, so several books
+        and the caller's own ``Broadcaster`` handler can share one socket.
+
+        :param ws: Connected ``WallexWebsocket``
+        """
+
+        self._capture_loop()
+        _listen(ws, 'Broadcaster', self.apply)
+        _listen(ws, 'connect', self.invalidate)
+        for channel in self._channels:
+            ws.subscribe(channel)
+
+    async def follow(self, ws):
+        """
+        Apply the depth messages of an ``AsyncWebsocket`` until it disconnects.
+
+        :param ws: Connected ``wallex.websocket.AsyncWebsocket``
+        """
+
+        # added next to the handlers of other books and the caller, removed once the stream ends
+        ws.on('connect', self.invalidate)
+        try:
+            if self.needs_resync and self.client is not None:
+                await self._resync_async()
+
+            async for message in ws.stream(*self._channels):
+                self.apply(message.channel, message.data)
+        finally:
+            ws.off('connect', self.invalidate)
+
+    async def _resync_async(self):
+        future = self.resync(force=True)
+        if future is not None:
+            await asyncio.wrap_future(future)
+
+    @property
+    def book(self) -> OrderBook:
+        """
+        Full depth as an :class:`OrderBook`, built once per change.
+        """
+
+        with self._lock:
+            if self._book is None:
+                self._book = OrderBook(*self._sides['bid'], *self._sides['ask'])
+            return self._book
+
+    def apply(self, channel: str, data: t.Any) -> bool:
+        """
+        Apply a websocket message, messages of other channels are ignored.
+
+        :param channel: Channel the message was published on
+        :type channel: str
+
+        :param data: Levels of that side, ``{'price': ..., 'quantity': ...}`` dicts or pairs
+        :type data: t.Any
+
+        :return: True if the book changed
+        :rtype: bool
+        """
+
+        side = self._channels.get(channel)
+        if side is None:
+            return False
+
+        try:
+            prices, quantities = OrderBook._levels(data)
+        except (KeyError, IndexError, TypeError, ValueError):
+            self.invalidate()
+            return False
+
+        with self._lock:
+            self._replace(side, prices, quantities, self._clock())
+        self._changed()
+        return True
+
+    def _replace(self, side: str, prices, quantities, updated: float):
+        live = quantities > 0
+        self._sides[side] = OrderBook._sorted(prices[live], quantities[live], descending=side == 'bid')
+        self._updated[side] = updated
+        self._book = None
+
+        (bid_prices, bid_quantities), (ask_prices, ask_quantities) = self._sides['bid'], self._sides['ask']
+        nan = float('nan')
+        self.top = (
+            float(bid_prices[0]) if len(bid_prices) else nan,
+            float(bid_quantities[0]) if len(bid_quantities) else nan,
+            float(ask_prices[0]) if len(ask_prices) else nan,
+            float(ask_quantities[0]) if len(ask_quantities) else nan,
+        )
+        self.updates += 1
+
+    def _changed(self):
+        # listeners still see a crossed book, flagged by needs_resync, before it is fixed
+        crossed = self.top[0] >= self.top[2]
+        if crossed:
+            self.needs_resync = True
+
+        for listener in self._listeners:
+            listener(self)
+
+        if crossed:
+            self.invalidate()
+
+    def invalidate(self, *_):
+        """
+        Mark the book untrusted and fetch a new snapshot in the background if a client is set.
+        """
+
+        self.needs_resync = True
+        if self.client is not None:
+            self.resync()
+
+    def check(self):
+        """
+        Resync if a side went quiet for longer than ``max_staleness``; call it periodically.
+        """
+
+        if self.max_staleness is None:
+            return
+
+        now = self._clock()
+        if any(updated is None or now - updated > self.max_staleness for updated in self._updated.values()):
+            self.invalidate()
+
+    def resync(self, force: bool = False) -> t.Optional[t.Union[asyncio.Future, Future]]:
+        """
+        Fetch a REST snapshot through the client in the background, one at a time.
+
+        With an ``AsyncClient`` the request runs on its event loop, with a ``Client``
+        on a worker thread.
+
+        :return: Task or future resolving to True once the snapshot is loaded, False if it
+            failed; None if no snapshot was started
+        :rtype: t.Optional[t.Union[asyncio.Future, concurrent.futures.Future]]
+        """
+
+        with self._lock:
+            now = self._clock()
+            if self._resyncing:
+                return None
+            if not force and self._last_resync is not None and now - self._last_resync < self.min_resync_interval:
+                return None
+            self._last_resync = now
+            self._resyncing = True
+            self.resyncs += 1
+
+        if not asyncio.iscoroutinefunction(self.client.get_orderbook):
+            future: Future = Future()
+            threading.Thread(
+                target=self._resync_blocking, args=(future, now), name=f'wallex-resync-{self.symbol}', daemon=True
+            ).start()
+            return future
+
+        running = self._capture_loop()
+        if running is not None and running is self._loop:
+            return asyncio.ensure_future(self._resync_coroutine(now))
+        if self._loop is None or self._loop.is_closed():
+            self._resynced(now, error=RuntimeError('no event loop to run the AsyncClient on'))
+            return None
+        return asyncio.run_coroutine_threadsafe(self._resync_coroutine(now), self._loop)
+
+    def _capture_loop(self) -> t.Optional[asyncio.AbstractEventLoop]:
+        try:
+            running = asyncio.get_running_loop()
+        except RuntimeError:
+            return None
+        if self._loop is None:
+            self._loop = running
+        return running
+
+    def _resync_blocking(self, future: Future, requested: float):
+        try:
+            data = self.client.get_orderbook(self.symbol)
+        except Exception as e:
+            future.set_result(self._resynced(requested, error=e))
+        else:
+            future.set_result(self._resynced(requested, data))
+
+    async def _resync_coroutine(self, requested: float) -> bool:
+        try:
+            data = await self.client.get_orderbook(self.symbol)
+        except Exception as e:
+            return self._resynced(requested, error=e)
+        return self._resynced(requested, data)
+
+    def _resynced(
+            self, requested: float, data: t.Optional[t.Dict[str, t.Any]] = None, error: t.Optional[Exception] = None
+    ) -> bool:
+        with self._lock:
+            self._resyncing = False
+
+        if error is None:
+            try:
+                self.seed(data, requested=requested)
+                return True
+            except (AttributeError, KeyError, IndexError, TypeError, ValueError) as e:
+                error = e
+
+        # keep the book flagged, the next invalidate() or check() tries again
+        self.needs_resync = True
+        logger.warning('%s depth snapshot failed: %r', self.symbol, error)
+        return False
+
+    def seed(self, data: t.Dict[str, t.Any], requested: t.Optional[float] = None):
+        """
+        Load a REST ``depth`` response.
+
+        :param data: ``depth`` response, or its ``result``
+        :type data: t.Dict[str, t.Any]
+
+        :param requested: Clock time the snapshot was requested at, sides updated
+            by the socket since then are kept
+        :type requested: t.Optional[float]
+        """
+
+        result = data.get('result', data)
+        with self._lock:
+            for side in ('bid', 'ask'):
+                updated = self._updated[side]
+                if requested is not None and updated is not None and updated > requested:
+                    continue
+                self._replace(side, *OrderBook._levels(result.get(side)), self._clock())
+            self.needs_resync = False
+        self._changed()
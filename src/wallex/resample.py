@@ -0,0 +1,225 @@
+import re
+import typing as t
+
+from .enums import Resolution
+from .models import OHLC
+
+
+__all__ = [
+    'WEEK_ORIGIN',
+    'period_seconds',
+    'bucket_start',
+    'resample',
+    'Resampler',
+]
+
+
+# 1970-01-05, the first Monday after the epoch, so weekly bars start on Mondays
+WEEK_ORIGIN = 4 * 24 * 60 * 60
+
+_UNITS = {'s': 1, 'm': 60, 'h': 60 * 60, 'd': 24 * 60 * 60, 'w': 7 * 24 * 60 * 60}
+
+_PERIOD = re.compile(r'^\s*(\d+)?\s*([smhdw])\s*$', re.IGNORECASE)
+
+Period = t.Union[int, str, Resolution]
+
+
+def period_seconds(period: Period) -> int:
+    """
+    :param period: Seconds, a ``Resolution`` or a string such as ``'4H'``, ``'1W'``, ``'90m'``
+    :type period: Period
+
+    :return: Length of the period in seconds
+    :rtype: int
+    """
+
+    if isinstance(period, Resolution):
+        return period.seconds
+    if isinstance(period, int):
+        seconds = period
+    else:
+        match = _PERIOD.match(period)
+        if match is None:
+            raise ValueError(f'Invalid period {period!r}, expected e.g. "4H", "1D" or "1W"')
+        seconds = int(match.group(1) or 1) * _UNITS[match.group(2).lower()]
+
+    if seconds <= 0:
+        raise ValueError(f'Period must be positive, got {period!r}')
+    return seconds
+
+
+def _origin(seconds: int, origin: t.Optional[int]) -> int:
+    if origin is not None:
+        return origin
+    return WEEK_ORIGIN if seconds % _UNITS['w'] == 0 else 0
+
+
+def bucket_start(timestamp: int, period: Period, origin: t.Optional[int] = None) -> int:
+    """
+    :return: Open time of the bar of ``period`` that ``timestamp`` falls into
+    :rtype: int
+    """
+
+    seconds = period_seconds(period)
+    origin = _origin(seconds, origin)
+    return timestamp - (timestamp - origin) % seconds
+
+
+def resample(ohlc: OHLC, period: Period, origin: t.Optional[int] = None) -> OHLC:
+    """
+    Aggregate bars into the coarser ``period`` without a Python loop per bar.
+
+    Bars are bucketed by ``(time - origin) // period``. Missing source bars
+    simply do not contribute; a bucket without any source bar is not emitted,
+    the same way the exchange leaves out bars without trades. NaN prices are
+    ignored by high/low and treated as zero volume.
+
+    :param ohlc: Source bars, ordered by time
+    :type ohlc: OHLC
+
+    :param period: Target period, see :func:`period_seconds`
+    :type period: Period
+
+    :param origin: Epoch second buckets are aligned to, the first Monday for whole weeks and 0 otherwise
+    :type origin: t.Optional[int]
+
+    :return: Resampled bars, stamped with the open time of each bucket
+    :rtype: OHLC
+    """
+
+    np = OHLC._numpy()
+    if not len(ohlc):
+        return OHLC.empty()
+
+    seconds = period_seconds(period)
+    origin = _origin(seconds, origin)
+
+    buckets = (ohlc.time - origin) // seconds
+    starts = np.flatnonzero(np.concatenate(([True], buckets[1:] != buckets[:-1])))
+    ends = np.append(starts[1:], len(ohlc)) - 1
+
+    return OHLC(
+        buckets[starts] * seconds + origin,
+        ohlc.open[starts],
+        np.fmax.reduceat(ohlc.high, starts),
+        np.fmin.reduceat(ohlc.low, starts),
+        ohlc.close[ends],
+        np.add.reduceat(np.nan_to_num(ohlc.volume), starts),
+    )
+
+
+class Resampler:
+    """
+    Incrementally maintained :func:`resample` of a growing series.
+
+    Only the source bars of the last, still open bucket are kept, so feeding
+    new bars re-aggregates one bucket plus whatever the new bars add. Closed
+    buckets are appended to preallocated arrays that grow by doubling, so an
+    update costs the same however long the series is. Bars already fed may be
+    sent again (e.g. the forming source bar); the newer values win.
+    """
+
+    def __init__(self, period: Period, origin: t.Optional[int] = None):
+        """
+        :param period: Target period, see :func:`period_seconds`
+        :type period: Period
+
+        :param origin: Bucket alignment, see :func:`resample`
+        :type origin: t.Optional[int]
+        """
+        self.period = period_seconds(period)
+        self.origin = _origin(self.period, origin)
+
+        # closed buckets in the first ``_count`` rows, never written again
+        self._columns: t.Optional[t.List[t.Any]] = None
+        self._count = 0
+        self._open = OHLC.empty()
+        self._tail = OHLC.empty()
+        self._bars: t.Optional[OHLC] = None
+
+    @property
+    def closed(self) -> OHLC:
+        """
+        Buckets later bars can no longer change, as read-only views; O(1).
+        """
+
+        if self._columns is None:
+            return OHLC.empty()
+
+        views = []
+        for column in self._columns:
+            view = column[:self._count]
+            view.flags.writeable = False
+            views.append(view)
+        return OHLC(*views)
+
+    @property
+    def current(self) -> OHLC:
+        """
+        The open bucket, empty before the first update.
+        """
+
+        return self._open
+
+    @property
+    def bars(self) -> OHLC:
+        """
+        Closed buckets followed by the open one, concatenated on the first read after an update.
+        """
+
+        if self._bars is None:
+            np = OHLC._numpy()
+            self._bars = OHLC(*(
+                np.concatenate((a, b)) for a, b in zip(self.closed.columns().values(), self._open.columns().values())
+            ))
+        return self._bars
+
+    def _close(self, bars: OHLC):
+        if not len(bars):
+            return
+
+        np = OHLC._numpy()
+        needed = self._count + len(bars)
+
+        if self._columns is None or needed > len(self._columns[0]):
+            # views handed out by ``closed`` keep the previous arrays alive
+            capacity = max(needed, 2 * self._count, 64)
+            columns = [np.empty(capacity, dtype=column.dtype) for column in bars.columns().values()]
+            for new, old in zip(columns, self._columns or ()):
+                new[:self._count] = old[:self._count]
+            self._columns = columns
+
+        for column, values in zip(self._columns, bars.columns().values()):
+            column[self._count:needed] = values
+        self._count = needed
+
+    def update(self, ohlc: OHLC) -> OHLC:
+        """
+        Feed new source bars.
+
+        :param ohlc: Source bars, ordered by time, none older than the last bucket
+        :type ohlc: OHLC
+
+        :return: The buckets that changed, the first one replaces the open bucket returned before
+        :rtype: OHLC
+        """
+
+        np = OHLC._numpy()
+        if not len(ohlc):
+            return OHLC.empty()
+
+        if len(self._tail) and ohlc.time[0] < self._tail.time[0] - (self._tail.time[0] - self.origin) % self.period:
+            raise ValueError('Bars older than the last bucket can not be fed incrementally, resample again')
+
+        # keep the held source bars that the new ones do not overwrite
+        held = self._tail.between(to_date=int(ohlc.time[0]) - 1)
+        source = OHLC(*(np.concatenate((a, b)) for a, b in zip(held.columns().values(), ohlc.columns().values())))
+
+        # the source starts in the open bucket, so every changed bucket but the last is closed now
+        changed = resample(source, self.period, self.origin)
+        last = int(changed.time[-1])
+        self._close(changed.between(to_date=last - 1))
+        self._open = changed.between(from_date=last)
+        self._tail = source.between(from_date=last)
+        self._bars = None
+        return changed
@@ -0,0 +1,334 @@
+import bisect
+import json
+import mmap
+import os
+import threading
+import time
+import typing as t
+from array import array
+
+from .enums import Resolution
+from .models import OHLC
+from .ohlc import merge_udf
+from .resample import Period, bucket_start, resample
+
+
+__all__ = [
+    'CandleStore',
+]
+
+
+_TYPECODES = {'t': 'q', 'o': 'd', 'h': 'd', 'l': 'd', 'c': 'd', 'v': 'd'}
+
+
+class CandleStore:
+    """
+    Incremental on-disk OHLC cache.
+
+    Every ``(symbol, resolution)`` pair is a directory holding one flat binary
+    file per column (``t`` as int64 epoch seconds, ``o/h/l/c/v`` as float64, native
+    byte order) plus a small ``meta.json`` with the settled range already held.
+    Columns are read through ``mmap``, so loading a slice of a long history does
+    not read the whole file. Column files are never modified in place: every
+    update writes new files and swaps them in with ``os.replace``, so views
+    handed out earlier keep reading the data they were created from. Windows
+    refuses to replace a file while it is mapped, so there (see :attr:`MMAP`)
+    columns are read into memory instead.
+
+    The held range is always contiguous. :meth:`load` only downloads what is
+    missing before or after it, including any gap between it and the requested
+    range; the newest, possibly unfinished bar is always fetched again.
+    """
+
+    META_FILE = 'meta.json'
+
+    # map column files; off on Windows, where a mapped file can not be replaced
+    MMAP = os.name != 'nt'
+
+    def __init__(self, root: str, clock: t.Callable[[], float] = time.time):
+        """
+        :param root: Directory the candles are stored in, created if missing
+        :type root: str
+
+        :param clock: Wall clock returning epoch seconds
+        :type clock: t.Callable[[], float]
+        """
+        self.root = root
+        self._clock = clock
+        self._lock = threading.RLock()
+
+    def _path(self, symbol: str, resolution: Resolution, name: str = '') -> str:
+        return os.path.join(self.root, symbol.upper(), resolution.value, name)
+
+    def _column_path(self, symbol: str, resolution: Resolution, field: str) -> str:
+        return self._path(symbol, resolution, field + '.bin')
+
+    def covered(self, symbol: str, resolution: Resolution) -> t.Optional[t.Tuple[int, int]]:
+        """
+        :return: ``(from, to)`` epoch seconds of the settled range held, None if nothing is stored
+        :rtype: t.Optional[t.Tuple[int, int]]
+        """
+
+        try:
+            with open(self._path(symbol, resolution, self.META_FILE)) as f:
+                meta = json.load(f)
+        except FileNotFoundError:
+            return None
+        return meta['from'], meta['to']
+
+    def _write_meta(self, symbol: str, resolution: Resolution, covered: t.Tuple[int, int]):
+        path = self._path(symbol, resolution, self.META_FILE)
+        meta = {'symbol': symbol.upper(), 'resolution': resolution.value, 'from': covered[0], 'to': covered[1]}
+        with open(path + '.tmp', 'w') as f:
+            json.dump(meta, f)
+        os.replace(path + '.tmp', path)
+
+    def columns(self, symbol: str, resolution: Resolution) -> t.Dict[str, memoryview]:
+        """
+        Memory-mapped (see :attr:`MMAP`), read-only views of every stored column, unaffected by later updates.
+
+        :return: ``t/o/h/l/c/v`` mapped to typed memoryviews, empty views if nothing is stored
+        :rtype: t.Dict[str, memoryview]
+        """
+
+        views = {}
+        for field, typecode in _TYPECODES.items():
+            try:
+                with open(self._column_path(symbol, resolution, field), 'rb') as f:
+                    if os.fstat(f.fileno()).st_size == 0:
+                        raise FileNotFoundError
+                    if self.MMAP:
+                        buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+                    else:
+                        buffer = f.read()
+            except FileNotFoundError:
+                views[field] = memoryview(array(typecode))
+                continue
+            views[field] = memoryview(buffer).cast(typecode)
+        return views
+
+    def read(
+            self, symbol: str, resolution: Resolution,
+            from_date: t.Optional[int] = None, to_date: t.Optional[int] = None
+    ) -> t.Dict[str, t.Any]:
+        """
+        Stored bars within ``[from_date, to_date]`` as a UDF ``history`` response.
+
+        :return: ``{'s': 'ok', 't': [...], 'o': [...], ...}``, ``{'s': 'no_data'}`` if there are no bars
+        :rtype: t.Dict[str, t.Any]
+        """
+
+        with self._lock:
+            views = self.columns(symbol, resolution)
+
+        timestamps = views['t']
+        start = 0 if from_date is None else bisect.bisect_left(timestamps, from_date)
+        end = len(timestamps) if to_date is None else bisect.bisect_right(timestamps, to_date)
+        if start >= end:
+            return {'s': 'no_data'}
+
+        udf: t.Dict[str, t.Any] = {'s': 'ok'}
+        for field, view in views.items():
+            udf[field] = view[start:end].tolist()
+        return udf
+
+    def read_ohlc(
+            self, symbol: str, resolution: Resolution,
+            from_date: t.Optional[int] = None, to_date: t.Optional[int] = None
+    ) -> OHLC:
+        """
+        Stored bars within ``[from_date, to_date]`` as NumPy arrays mapped straight from the column files.
+
+        The arrays are a snapshot: later updates write new column files, so they keep
+        the bars held when this was called for as long as they are alive.
+
+        :return: Zero-copy, read-only ``OHLC``
+        :rtype: OHLC
+        """
+
+        with self._lock:
+            views = self.columns(symbol, resolution)
+        return OHLC.from_buffers(views).between(from_date, to_date)
+
+    def read_resampled(
+            self, symbol: str, period: Period,
+            from_date: t.Optional[int] = None, to_date: t.Optional[int] = None,
+            base: Resolution = Resolution.ONE_HOUR
+    ) -> OHLC:
+        """
+        Bars of any ``period`` (e.g. ``'4H'`` or ``'1W'``) derived from the stored ``base`` bars.
+
+        ``from_date`` is widened to the start of its bucket so the first bar is complete.
+        """
+
+        if from_date is not None:
+            from_date = bucket_start(from_date, period)
+        return resample(self.read_ohlc(symbol, base, from_date, to_date), period)
+
+    def store(self, symbol: str, resolution: Resolution, udf: t.Dict[str, t.Any], from_date: int, to_date: int):
+        """
+        Merge a downloaded UDF response covering ``[from_date, to_date]`` into the store.
+
+        Bars that replace or extend the tail of what is held are spliced onto the kept
+        head of the columns; anything else rewrites them.
+
+        :raises ValueError: If ``[from_date, to_date]`` neither overlaps nor touches the held range,
+            the gap in between would be recorded as held
+        """
+
+        with self._lock:
+            covered = self.covered(symbol, resolution)
+            if covered is not None and (from_date > covered[1] + 1 or to_date < covered[0] - 1):
+                raise ValueError(
+                    f'[{from_date}, {to_date}] does not touch the held range [{covered[0]}, {covered[1]}]'
+                )
+
+            os.makedirs(self._path(symbol, resolution), exist_ok=True)
+            new = merge_udf([udf])
+
+            if new.get('s') == 'ok':
+                held = self.columns(symbol, resolution)['t']
+                cut = bisect.bisect_left(held, new['t'][0])
+                extends_tail = not len(held) or new['t'][-1] >= held[-1]
+                held.release()
+
+                if extends_tail:
+                    self._splice(symbol, resolution, cut, new)
+                else:
+                    self._rewrite(symbol, resolution, merge_udf([self.read(symbol, resolution), new]))
+
+            # the last bar of the range may still be forming, it is not settled yet
+            settled = min(to_date, int(self._clock()) - resolution.seconds)
+            if covered is not None:
+                from_date, settled = min(covered[0], from_date), max(covered[1], settled)
+            self._write_meta(symbol, resolution, (from_date, settled))
+
+    def _splice(self, symbol: str, resolution: Resolution, keep: int, udf: t.Dict[str, t.Any]):
+        # the first `keep` rows of every column followed by `udf`, written to a new file
+        for field, typecode in _TYPECODES.items():
+            path = self._column_path(symbol, resolution, field)
+            with open(path + '.tmp', 'wb') as out:
+                if keep:
+                    with open(path, 'rb') as f:
+                        out.write(f.read(keep * array(typecode).itemsize))
+                array(typecode, self._column(udf, field)).tofile(out)
+            os.replace(path + '.tmp', path)
+
+    def _rewrite(self, symbol: str, resolution: Resolution, udf: t.Dict[str, t.Any]):
+        self._splice(symbol, resolution, 0, udf)
+
+    @staticmethod
+    def _column(udf: t.Dict[str, t.Any], field: str) -> t.List:
+        if field == 't':
+            return [int(value) for value in udf['t']]
+        return [float('nan') if value is None else float(value) for value in udf[field]]
+
+    def missing(
+            self, symbol: str, resolution: Resolution, from_date: int, to_date: int
+    ) -> t.List[t.Tuple[int, int]]:
+        """
+        Ranges to download so the held range covers ``[from_date, to_date]``.
+
+        A range that starts after the held one (or ends before it) is widened to
+        reach it, the held range has no holes.
+
+        :return: The missing head and/or tail ranges, in order
+        :rtype: t.List[t.Tuple[int, int]]
+        """
+
+        covered = self.covered(symbol, resolution)
+        if covered is None:
+            return [(from_date, to_date)]
+
+        ranges = []
+        if from_date < covered[0]:
+            ranges.append((from_date, covered[0] - 1))
+        if to_date > covered[1]:
+            ranges.append((covered[1] + 1, to_date))
+        return ranges
+
+    def drop(self, symbol: str, resolution: Resolution):
+        with self._lock:
+            for name in [field + '.bin' for field in _TYPECODES] + [self.META_FILE]:
+                try:
+                    os.remove(self._path(symbol, resolution, name))
+                except FileNotFoundError:
+                    pass
+
+    def _download_missing(self, client, symbol: str, resolution: Resolution, from_date: int, to_date: int):
+        for start, end in self.missing(symbol, resolution, from_date, to_date):
+            self.store(symbol, resolution, client.download_ohlc_data(symbol, resolution, start, end), start, end)
+
+    async def _download_missing_async(
+            self, client, symbol: str, resolution: Resolution, from_date: int, to_date: int
+    ):
+        for start, end in self.missing(symbol, resolution, from_date, to_date):
+            udf = await client.download_ohlc_data(symbol, resolution, start, end)
+            self.store(symbol, resolution, udf, start, end)
+
+    def load(self, client, symbol: str, resolution: Resolution, from_date: int, to_date: int) -> t.Dict[str, t.Any]:
+        """
+        Bars of ``[from_date, to_date]``, downloading only the part that is not stored yet.
+
+        :param client: ``Client`` used for the missing ranges
+        :type client: wallex.Client
+
+        :return: UDF ``history`` response
+        :rtype: t.Dict[str, t.Any]
+        """
+
+        self._download_missing(client, symbol, resolution, from_date, to_date)
+        return self.read(symbol, resolution, from_date, to_date)
+
+    def load_ohlc(self, client, symbol: str, resolution: Resolution, from_date: int, to_date: int) -> OHLC:
+        """
+        :meth:`load` returning the zero-copy snapshot ``OHLC`` of :meth:`read_ohlc`.
+        """
+
+        self._download_missing(client, symbol, resolution, from_date, to_date)
+        return self.read_ohlc(symbol, resolution, from_date, to_date)
+
+    def load_resampled(
+            self, client, symbol: str, period: Period, from_date: int, to_date: int,
+            base: Resolution = Resolution.ONE_HOUR
+    ) -> OHLC:
+        """
+        :meth:`read_resampled` after downloading the missing ``base`` bars, so one
+        resolution per symbol serves every coarser one.
+        """
+
+        from_date = bucket_start(from_date, period)
+        self._download_missing(client, symbol, base, from_date, to_date)
+        return resample(self.read_ohlc(symbol, base, from_date, to_date), period)
+
+    async def load_async(
+            self, client, symbol: str, resolution: Resolution, from_date: int, to_date: int
+    ) -> t.Dict[str, t.Any]:
+        """
+        Async version of :meth:`load` taking an ``AsyncClient``.
+        """
+
+        await self._download_missing_async(client, symbol, resolution, from_date, to_date)
+        return self.read(symbol, resolution, from_date, to_date)
+
+    async def load_ohlc_async(
+            self, client, symbol: str, resolution: Resolution, from_date: int, to_date: int
+    ) -> OHLC:
+        """
+        Async version of :meth:`load_ohlc` taking an ``AsyncClient``.
+        """
+
+        await self._download_missing_async(client, symbol, resolution, from_date, to_date)
+        return self.read_ohlc(symbol, resolution, from_date, to_date)
+
+    async def load_resampled_async(
+            self, client, symbol: str, period: Period, from_date: int, to_date: int,
+            base: Resolution = Resolution.ONE_HOUR
+    ) -> OHLC:
+        """
+        Async version of :meth:`load_resampled` taking an ``AsyncClient``.
+        """
+
+        from_date = bucket_start(from_date, period)
+        await self._download_missing_async(client, symbol, base, from_date, to_date)
+        return resample(self.read_ohlc(symbol, base, from_date, to_date), period)
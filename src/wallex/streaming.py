@@ -0,0 +1,105 @@
+import typing as t
+
+try:
+    import ijson
+except ImportError:  # pragma: no cover
+    ijson = None
+
+
+__all__ = [
+    'is_available',
+    'project',
+    'project_async',
+]
+
+
+def is_available() -> bool:
+    return ijson is not None
+
+
+class _Projector:
+    """
+    Rebuild a JSON document from ijson events, skipping every key of the
+    object at ``prefix`` that was not asked for. Keys asked for but missing
+    come out as None, as with ``BaseClient._pick``.
+    """
+
+    def __init__(self, prefix: str, keys: t.Iterable[str]):
+        self.prefix = prefix
+        self.keys = set(keys)
+
+        self._builder = ijson.ObjectBuilder()
+        self._skipping = False
+        self._depth = 0
+
+    def feed(self, path: str, event: str, value: t.Any):
+        if self._skipping:
+            if event in ('start_map', 'start_array'):
+                self._depth += 1
+            elif event in ('end_map', 'end_array'):
+                self._depth -= 1
+
+            if self._depth == 0:
+                self._skipping = False
+            return
+
+        if path == self.prefix and event == 'map_key' and value not in self.keys:
+            self._skipping = True
+            self._depth = 0
+            return
+
+        self._builder.event(event, value)
+
+    @property
+    def value(self) -> t.Any:
+        document = target = self._builder.value
+        for name in self.prefix.split('.') if self.prefix else ():
+            target = target.get(name) if isinstance(target, dict) else None
+
+        if isinstance(target, dict):
+            for key in self.keys:
+                target.setdefault(key, None)
+        return document
+
+
+def project(file: t.Any, prefix: str, keys: t.Iterable[str]) -> t.Dict[str, t.Any]:
+    """
+    Incrementally parse ``file`` keeping only ``keys`` of the object at ``prefix``.
+
+    Skipped values are never materialised, everything outside ``prefix`` is kept as is.
+
+    :param file: File-like object with a ``read`` method returning bytes
+    :type file: t.Any
+
+    :param prefix: Dotted path of the object to filter, e.g. ``'result.symbols'``
+    :type prefix: str
+
+    :param keys: Keys of that object to keep
+    :type keys: t.Iterable[str]
+
+    :return: The document with the object at ``prefix`` filtered, missing ``keys`` set to None
+    :rtype: t.Dict[str, t.Any]
+    """
+
+    projector = _Projector(prefix, keys)
+    try:
+        for path, event, value in ijson.parse(file, use_float=True):
+            projector.feed(path, event, value)
+    except ijson.JSONError as e:
+        raise ValueError(str(e))
+    return projector.value
+
+
+async def project_async(file: t.Any, prefix: str, keys: t.Iterable[str]) -> t.Dict[str, t.Any]:
+    """
+    Async version of :func:`project` for readers with a coroutine ``read`` method,
+    such as ``aiohttp.ClientResponse.content``.
+    """
+
+    projector = _Projector(prefix, keys)
+    try:
+        async for path, event, value in ijson.parse_async(file, use_float=True):
+            projector.feed(path, event, value)
+    except ijson.JSONError as e:
+        raise ValueError(str(e))
+    return projector.value
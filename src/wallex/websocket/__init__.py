@@ -0,0 +1,21 @@
+from .buffers import BufferPolicy, StreamBuffer
+from .base import BaseWebsocket, Message
+from .client import AsyncWebsocket
+from .hub import FeedHub, HubWebsocket
+from .metrics import WebsocketMetrics
+from .recording import ReplayWebsocket, SessionRecorder, read_session
+
+
+__all__ = [
+    'AsyncWebsocket',
+    'BaseWebsocket',
+    'BufferPolicy',
+    'FeedHub',
+    'HubWebsocket',
+    'ReplayWebsocket',
+    'SessionRecorder',
+    'StreamBuffer',
+    'WebsocketMetrics',
+    'Message',
+    'read_session',
+]
@@ -0,0 +1,229 @@
+import asyncio
+import time
+import typing as t
+from abc import ABC, abstractmethod
+from collections import Counter
+
+from ..exceptions import WebsocketNotConnected
+from .buffers import BufferPolicy, StreamBuffer, default_policy
+from .metrics import WebsocketMetrics
+
+
+__all__ = [
+    'Message',
+    'BaseWebsocket',
+]
+
+
+class Message(t.NamedTuple):
+    channel: str
+    data: t.Any
+    # time.time() when the message was handed to the client
+    received: float
+    # True for trades fetched over REST after a reconnect
+    backfilled: bool = False
+
+
+class BaseWebsocket(ABC):
+    """
+    Channel streams on top of a message source.
+
+    Keeps the reference counted subscriptions, the per-stream buffers and the
+    event callbacks; subclasses connect to the source, send ``subscribe``/
+    ``unsubscribe`` through :meth:`emit`, hand every message to :meth:`_publish`
+    and fire events through :meth:`_trigger`.
+    """
+
+    # buffer policy of streams opened without one, None picks it by channel
+    DEFAULT_POLICY: t.Optional[BufferPolicy] = None
+
+    def __init__(self, metrics: t.Optional[WebsocketMetrics] = None, clock: t.Callable[[], float] = time.time):
+        self.metrics = metrics if metrics is not None else WebsocketMetrics(clock=clock)
+        self._clock = clock
+
+        self._subscriptions: t.Dict[str, int] = {}
+        self._streams: t.Dict[str, t.Set[StreamBuffer]] = {}
+        # counters of buffers whose stream has ended
+        self._retired: t.Dict[str, t.Counter[str]] = {
+            'delivered': Counter(), 'dropped': Counter(), 'coalesced': Counter()
+        }
+        self._callbacks: t.Dict[str, t.List[t.Callable[..., t.Any]]] = {}
+        # held by the message waiting for room in a BLOCK buffer, the next ones queue up behind it
+        self._blocked = asyncio.Lock()
+
+    @property
+    @abstractmethod
+    def connected(self) -> bool:
+        raise NotImplementedError('connected not implemented')
+
+    @abstractmethod
+    async def connect(self, *args, **kwargs):
+        raise NotImplementedError('connect not implemented')
+
+    @abstractmethod
+    async def disconnect(self):
+        raise NotImplementedError('disconnect not implemented')
+
+    @abstractmethod
+    async def emit(self, event: str, data: t.Any):
+        raise NotImplementedError('emit not implemented')
+
+    def _check_connected(self, name: str):
+        if not self.connected:
+            raise WebsocketNotConnected(f'{name} needs a connected websocket, call connect() first')
+
+    def _close_streams(self):
+        for buffers in self._streams.values():
+            for buffer in buffers:
+                buffer.close()
+        self._streams.clear()
+        self._subscriptions.clear()
+
+    def on(self, event: str, callback: t.Callable[..., t.Any]):
+        """
+        Add a callback of ``event``, next to the ones already added; coroutine functions are awaited.
+
+        :param event: Event name, e.g. ``connect`` or ``disconnect``
+        :type event: str
+
+        :param callback: Called with the event arguments
+        :type callback: t.Callable[..., t.Any]
+        """
+
+        self._callbacks.setdefault(event, []).append(callback)
+
+    def off(self, event: str, callback: t.Callable[..., t.Any]):
+        """
+        Remove a callback added by :meth:`on`, if it is still there.
+        """
+
+        callbacks = self._callbacks.get(event)
+        if callbacks and callback in callbacks:
+            callbacks.remove(callback)
+
+    async def _trigger(self, event: str, *args):
+        for callback in list(self._callbacks.get(event, ())):
+            result = callback(*args)
+            if asyncio.iscoroutine(result):
+                await result
+
+    @property
+    def subscriptions(self) -> t.List[str]:
+        return list(self._subscriptions)
+
+    async def subscribe(self, channel: str):
+        """
+        Subscribe to ``channel``; subscriptions are counted, one unsubscribe undoes one subscribe.
+
+        :param channel: Channel name, e.g. ``BTCTMN@trade`` or ``BTCTMN@buyDepth``
+        :type channel: str
+        """
+
+        count = self._subscriptions.get(channel, 0)
+        self._subscriptions[channel] = count + 1
+        if not count:
+            await self.emit('subscribe', {'channel': channel})
+
+    async def unsubscribe(self, channel: str):
+        count = self._subscriptions.get(channel, 0)
+        if count > 1:
+            self._subscriptions[channel] = count - 1
+            return
+
+        self._subscriptions.pop(channel, None)
+        self._unsubscribed(channel)
+        if count and self.connected:
+            await self.emit('unsubscribe', {'channel': channel})
+
+    def _unsubscribed(self, channel: str):
+        pass
+
+    async def _publish(self, message: Message) -> bool:
+        buffers = self._streams.get(message.channel)
+        if not buffers:
+            return False
+
+        for buffer in list(buffers):
+            if self._blocked.locked() or not buffer.put_nowait(message):
+                async with self._blocked:
+                    await buffer.put(message)
+        return True
+
+    async def stream(
+            self, *channels: str, maxsize: int = 1000, policy: t.Optional[BufferPolicy] = None
+    ) -> t.AsyncIterator[Message]:
+        """
+        Messages of ``channels`` in arrival order, until the socket is disconnected.
+
+        :param channels: Channels to read, subscribed to if needed
+        :type channels: str
+
+        :param maxsize: Messages buffered for this stream
+        :type maxsize: int
+
+        :param policy: Policy of a full buffer, by default :attr:`DEFAULT_POLICY` or else ``LATEST`` for
+            depth and market cap channels and ``DROP_OLDEST`` for anything else, see :class:`BufferPolicy`
+        :type policy: t.Optional[BufferPolicy]
+
+        :return: Async iterator of :class:`Message`
+        :rtype: t.AsyncIterator[Message]
+        """
+
+        self._check_connected('stream')
+        policy = policy or self.DEFAULT_POLICY or default_policy(channels)
+        buffer = StreamBuffer(maxsize, policy)
+        for channel in channels:
+            self._streams.setdefault(channel, set()).add(buffer)
+
+        subscribed = []
+        try:
+            for channel in channels:
+                await self.subscribe(channel)
+                subscribed.append(channel)
+
+            while True:
+                message = await buffer.get()
+                if message is None:
+                    return
+                yield message
+                # the consumer asks for the next message once it is done with this one
+                self.metrics.handled(message.channel, message.received)
+        finally:
+            buffer.close()
+            for name, counter in self._retired.items():
+                counter.update(getattr(buffer, name))
+            for channel in channels:
+                buffers = self._streams.get(channel)
+                if buffers is not None:
+                    buffers.discard(buffer)
+                    if not buffers:
+                        del self._streams[channel]
+            for channel in subscribed:
+                await self.unsubscribe(channel)
+
+    def buffer_stats(self) -> t.Dict[str, t.Dict[str, int]]:
+        """
+        :return: Per channel ``queued``, ``delivered``, ``dropped`` and ``coalesced`` message counts,
+            summed over every stream, including ended ones
+        :rtype: t.Dict[str, t.Dict[str, int]]
+        """
+
+        totals = {name: Counter(counter) for name, counter in self._retired.items()}
+        queued: t.Counter[str] = Counter()
+        for buffer in {buffer for buffers in self._streams.values() for buffer in buffers}:
+            for name, counter in totals.items():
+                counter.update(getattr(buffer, name))
+            queued.update(message.channel for message in buffer.messages())
+        totals['queued'] = queued
+
+        channels = set().union(*totals.values())
+        return {
+            channel: {name: counter[channel] for name, counter in totals.items()} for channel in sorted(channels)
+        }
+
+    async def __aenter__(self):
+        await self.connect()
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        await self.disconnect()
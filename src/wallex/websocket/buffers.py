@@ -0,0 +1,152 @@
+import asyncio
+import typing as t
+from collections import Counter, OrderedDict, deque
+from enum import Enum
+
+
+__all__ = [
+    'BufferPolicy',
+    'StreamBuffer',
+    'default_policy',
+]
+
+
+class BufferPolicy(Enum):
+    # wait for the consumer, holding up every later message of the connection meanwhile
+    BLOCK = 'block'
+    # discard the oldest queued message to make room
+    DROP_OLDEST = 'drop_oldest'
+    # keep only the newest message of each channel
+    LATEST = 'latest'
+
+
+# channels publishing full snapshots, where only the newest message matters
+SNAPSHOT_SUFFIXES = ('@buyDepth', '@sellDepth', '@marketCap')
+
+
+def default_policy(channels: t.Iterable[str]) -> BufferPolicy:
+    channels = list(channels)
+    if channels and all(channel.endswith(SNAPSHOT_SUFFIXES) for channel in channels):
+        return BufferPolicy.LATEST
+    return BufferPolicy.DROP_OLDEST
+
+
+class StreamBuffer:
+    """
+    Bounded buffer between the socket and one consumer.
+
+    Every stream reads from its own buffer, so with ``DROP_OLDEST`` and
+    ``LATEST`` a slow consumer only loses its own messages and never delays
+    the socket or other streams. ``BLOCK`` trades that isolation for
+    losslessness: a full buffer pauses delivery for the whole connection.
+    Messages wait their turn in arrival order, and ``AsyncWebsocket`` stops
+    reading the socket meanwhile, so a consumer stalled for longer than the
+    server's ping timeout gets the connection dropped.
+    """
+
+    def __init__(self, maxsize: int = 1000, policy: BufferPolicy = BufferPolicy.DROP_OLDEST):
+        """
+        :param maxsize: Most messages held, ``LATEST`` holds at most one per channel anyway
+        :type maxsize: int
+
+        :param policy: What to do when the buffer is full
+        :type policy: BufferPolicy
+        """
+        if maxsize <= 0:
+            raise ValueError('maxsize must be positive')
+
+        self.maxsize = maxsize
+        self.policy = BufferPolicy(policy)
+
+        self.delivered: t.Counter[str] = Counter()
+        self.dropped: t.Counter[str] = Counter()
+        self.coalesced: t.Counter[str] = Counter()
+
+        self._queue: t.Deque = deque()
+        self._latest: t.OrderedDict[str, t.Any] = OrderedDict()
+        self._closed = False
+        self._readable = asyncio.Event()
+        self._writable = asyncio.Event()
+        self._writable.set()
+
+    def __len__(self):
+        return len(self._latest) if self.policy is BufferPolicy.LATEST else len(self._queue)
+
+    def messages(self) -> t.List[t.Any]:
+        """
+        :return: The queued messages, oldest first
+        """
+
+        return list(self._latest.values()) if self.policy is BufferPolicy.LATEST else list(self._queue)
+
+    @property
+    def closed(self) -> bool:
+        return self._closed
+
+    def put_nowait(self, message) -> bool:
+        """
+        Queue ``message`` (anything with a ``channel`` attribute) without waiting.
+
+        :return: False if the buffer is full under ``BLOCK`` or closed, the message was not queued
+        :rtype: bool
+        """
+
+        if self._closed:
+            return False
+
+        channel = message.channel
+        if self.policy is BufferPolicy.LATEST:
+            if channel in self._latest:
+                self.coalesced[channel] += 1
+                del self._latest[channel]
+            elif len(self._latest) >= self.maxsize:
+                dropped = self._latest.popitem(last=False)[0]
+                self.dropped[dropped] += 1
+            self._latest[channel] = message
+        else:
+            if len(self._queue) >= self.maxsize:
+                if self.policy is BufferPolicy.BLOCK:
+                    self._writable.clear()
+                    return False
+                self.dropped[self._queue.popleft().channel] += 1
+            self._queue.append(message)
+
+        self._readable.set()
+        return True
+
+    async def put(self, message):
+        """
+        Queue ``message``, waiting for room under ``BLOCK``.
+        """
+
+        while not self.put_nowait(message) and not self._closed:
+            await self._writable.wait()
+
+    async def get(self):
+        """
+        :return: The next message, None once the buffer was closed and drained
+        """
+
+        while not len(self):
+            if self._closed:
+                return None
+            self._readable.clear()
+            await self._readable.wait()
+
+        if self.policy is BufferPolicy.LATEST:
+            message = self._latest.popitem(last=False)[1]
+        else:
+            message = self._queue.popleft()
+            self._writable.set()
+
+        self.delivered[message.channel] += 1
+        return message
+
+    def close(self):
+        """
+        Stop accepting messages; queued ones can still be read.
+        """
+
+        self._closed = True
+        self._readable.set()
+        self._writable.set()
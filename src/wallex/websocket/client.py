@@ -0,0 +1,360 @@
+import asyncio
+import random
+import time
+import typing as t
+from collections import deque
+from datetime import datetime
+
+import aiohttp
+import engineio
+import socketio
+from engineio import packet as engineio_packet
+from socketio import exceptions as socketio_exceptions
+
+from ..exceptions import APIException
+from .base import BaseWebsocket, Message
+from .metrics import WebsocketMetrics
+from .recording import SessionRecorder
+from .trades import TRADE_CHANNEL_SUFFIX, TradeDeduplicator
+
+
+__all__ = [
+    'AsyncWebsocket',
+]
+
+
+class _EngineioClient(engineio.AsyncClient):
+    """
+    engine.io client reporting the round trip of its pings and handling
+    messages in order on its read loop.
+    """
+
+    metrics: t.Optional[WebsocketMetrics] = None
+    _ping_sent: t.Optional[float] = None
+
+    async def _send_packet(self, pkt):
+        if pkt.packet_type == engineio_packet.PING:
+            self._ping_sent = time.monotonic()
+        await super()._send_packet(pkt)
+
+    async def _receive_packet(self, pkt):
+        if pkt.packet_type == engineio_packet.PONG and self._ping_sent is not None and self.metrics is not None:
+            self.metrics.pinged(time.monotonic() - self._ping_sent)
+            self._ping_sent = None
+        await super()._receive_packet(pkt)
+
+    async def _trigger_event(self, event, *args, **kwargs):
+        if event == 'message':
+            # engine.io starts a task per message by default, which loses the arrival order and lets a
+            # full BLOCK buffer pile up waiting tasks; awaiting it here pauses reading instead
+            kwargs['run_async'] = False
+        return await super()._trigger_event(event, *args, **kwargs)
+
+
+class _SocketioClient(socketio.AsyncClient):
+    """
+    socket.io client remembering the size of the packet being handled and
+    passing every packet to the recorder, if any.
+    """
+
+    def __init__(self, metrics: WebsocketMetrics, **kwargs):
+        super().__init__(**kwargs)
+        self.eio.metrics = metrics
+        self.packet_size: t.Optional[int] = None
+        self.recorder: t.Optional[SessionRecorder] = None
+
+    def _engineio_client_class(self):
+        return _EngineioClient
+
+    async def _handle_eio_message(self, data):
+        self.packet_size = len(data) if isinstance(data, (str, bytes)) else None
+        if self.recorder is not None and self.packet_size is not None:
+            self.recorder.write(time.time(), data)
+        try:
+            await super()._handle_eio_message(data)
+        finally:
+            self.packet_size = None
+
+
+class AsyncWebsocket(BaseWebsocket):
+    """
+    asyncio websocket client for the Wallex socket.io feed.
+
+    Built on ``socketio.AsyncClient``, so the socket runs as tasks on the
+    caller's event loop, next to an ``AsyncClient``: messages are delivered
+    without a thread hop. ``stream`` subscribes to channels on first use and
+    unsubscribes once the last stream reading them is closed.
+
+    The connection is supervised: when it drops, the client reconnects with
+    jittered exponential backoff, subscribes to every active channel again and,
+    given a REST ``client``, backfills ``{symbol}@trade`` channels from
+    ``get_recent_trades``. Live trades of a channel being backfilled are held
+    until its backfill is delivered, and trades are deduplicated against what
+    was already delivered, so streams keep running, in order, across reconnects.
+
+    Throughput, latency, ping and reconnect figures are collected in
+    :attr:`metrics`, see :class:`WebsocketMetrics`.
+
+    .. code-block:: python
+
+        async with AsyncWebsocket() as ws:
+            async for msg in ws.stream('BTCTMN@trade'):
+                print(msg.data)
+    """
+
+    URL = 'https://api.wallex.ir'
+    SOCKETIO_PATH = 'socket.io'
+
+    # every channel message is broadcast as ``Broadcaster(channel, data)``
+    BROADCAST_EVENT = 'Broadcaster'
+
+    def __init__(
+            self,
+            url: t.Optional[str] = None,
+            socketio_params: t.Optional[t.Dict[str, t.Any]] = None,
+            client=None,
+            reconnect: bool = True,
+            backoff_base: float = 0.5,
+            backoff_max: float = 30.0,
+            backfill_pages: int = 5,
+            metrics: t.Optional[WebsocketMetrics] = None,
+            recorder: t.Optional[SessionRecorder] = None,
+            clock: t.Callable[[], float] = time.time,
+    ):
+        """
+        :param url: Socket URL, ``https://api.wallex.ir`` by default
+        :type url: t.Optional[str]
+
+        :param socketio_params: Extra ``socketio.AsyncClient`` arguments
+        :type socketio_params: t.Optional[t.Dict[str, t.Any]]
+
+        :param client: ``AsyncClient`` used to backfill trade channels after a reconnect
+        :type client: t.Optional[wallex.AsyncClient]
+
+        :param reconnect: Reconnect when the connection drops
+        :type reconnect: bool
+
+        :param backoff_base: Delay before the first reconnect attempt, doubled for every following one
+        :type backoff_base: float
+
+        :param backoff_max: Upper bound of the reconnect delay
+        :type backoff_max: float
+
+        :param backfill_pages: Most ``trades`` pages fetched per channel when backfilling
+        :type backfill_pages: int
+
+        :param metrics: Metrics to record into, e.g. one shared by several sockets; a new one by default
+        :type metrics: t.Optional[WebsocketMetrics]
+
+        :param recorder: Recorder every inbound packet is appended to, for :class:`ReplayWebsocket`;
+            flushed by :meth:`disconnect`, closed by its owner
+        :type recorder: t.Optional[SessionRecorder]
+
+        :param clock: Wall clock stamped on received messages
+        :type clock: t.Callable[[], float]
+        """
+        super().__init__(metrics, clock)
+        self.url = url or self.URL
+        self.client = client
+        self.reconnect = reconnect
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.backfill_pages = backfill_pages
+
+        self.backfilled = 0
+        self.backfill_errors = 0
+
+        socketio_params = dict(socketio_params or {})
+        if reconnect:
+            # reconnection is supervised here, so subscriptions and backfill follow it
+            socketio_params.setdefault('reconnection', False)
+        self._sio = _SocketioClient(self.metrics, **socketio_params)
+        self._sio.recorder = recorder
+        self._sio.on(self.BROADCAST_EVENT, self._on_broadcast)
+        self._sio.on('disconnect', self._on_disconnect)
+
+        self._connect_kwargs: t.Dict[str, t.Any] = {}
+        self._closing = False
+        self._supervisor: t.Optional[asyncio.Task] = None
+
+        self._trades: t.Dict[str, TradeDeduplicator] = {}
+        # live trades received while their channel is backfilled
+        self._held: t.Dict[str, t.Deque[t.Any]] = {}
+
+    @property
+    def reconnects(self) -> int:
+        return self.metrics.reconnects
+
+    @property
+    def connected(self) -> bool:
+        return self._sio.connected
+
+    async def connect(self, url: t.Optional[str] = None, **kwargs):
+        """
+        :param url: Socket URL overriding the one given to the constructor
+        :type url: t.Optional[str]
+
+        :param kwargs: Extra ``socketio.AsyncClient.connect`` arguments
+        :type kwargs: t.Any
+        """
+
+        kwargs.setdefault('transports', ['websocket'])
+        kwargs.setdefault('socketio_path', self.SOCKETIO_PATH)
+        self.url = url or self.url
+        self._connect_kwargs = kwargs
+        self._closing = False
+        await self._sio.connect(self.url, **kwargs)
+
+    async def disconnect(self):
+        """
+        Close the socket and end every open stream.
+        """
+
+        self._closing = True
+        if self._supervisor is not None:
+            self._supervisor.cancel()
+            self._supervisor = None
+
+        self._close_streams()
+        self._trades.clear()
+        self._held.clear()
+
+        if self.connected:
+            await self._sio.disconnect()
+
+        recorder = self._sio.recorder
+        if recorder is not None and not recorder.closed:
+            # the writer thread writes out the buffered records, the loop only waits for it
+            await asyncio.wrap_future(recorder.flush())
+
+    async def emit(self, event: str, data: t.Any):
+        self._check_connected('emit')
+        await self._sio.emit(event, data)
+
+    def _unsubscribed(self, channel: str):
+        self._trades.pop(channel, None)
+
+    def on(self, event: str, callback: t.Callable[..., t.Any]):
+        """
+        Add a socket.io event handler next to the ones already added, coroutine functions are awaited on the loop.
+
+        ``disconnect`` handlers run before a reconnect is started. Channel messages
+        are read with :meth:`stream`, not through a handler.
+        """
+
+        if event == self.BROADCAST_EVENT:
+            raise ValueError(f'channel messages ({event!r} events) are read with stream(), not through on()')
+        if event not in self._callbacks and event != 'disconnect':
+            # socket.io keeps one handler per event, it calls every callback in turn
+            self._sio.on(event, self._dispatcher(event))
+        super().on(event, callback)
+
+    def _dispatcher(self, event: str) -> t.Callable[..., t.Awaitable[None]]:
+        async def dispatch(*args):
+            await self._trigger(event, *args)
+
+        return dispatch
+
+    async def _on_broadcast(self, channel: str, data: t.Any = None):
+        self.metrics.received(channel, self._sio.packet_size)
+        held = self._held.get(channel)
+        if held is not None:
+            held.append(data)
+            return
+        await self._deliver(channel, data)
+
+    async def _deliver(
+            self, channel: str, data: t.Any, backfilled: bool = False, since: t.Optional[datetime] = None
+    ) -> bool:
+        if channel not in self._streams:
+            return False
+
+        if channel.endswith(TRADE_CHANNEL_SUFFIX):
+            dedup = self._trades.get(channel)
+            if dedup is None:
+                dedup = self._trades[channel] = TradeDeduplicator()
+            data = dedup.filter(data, since)
+            if data is None:
+                return False
+
+        return await self._publish(Message(channel, data, self._clock(), backfilled))
+
+    async def _on_disconnect(self):
+        await self._trigger('disconnect')
+
+        if self.reconnect and not self._closing and self._supervisor is None:
+            # newest trade delivered per channel before the drop, backfill starts there
+            marks = {channel: dedup.latest for channel, dedup in self._trades.items()}
+            self._supervisor = asyncio.ensure_future(self._reconnect(marks))
+
+    def _backoff(self, attempt: int) -> float:
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * (2 ** attempt)))
+
+    async def _reconnect(self, marks: t.Dict[str, t.Optional[datetime]]):
+        if self.client is not None:
+            self._held = {channel: deque() for channel, since in marks.items() if since is not None}
+
+        attempt = 0
+        try:
+            while not self._closing:
+                await asyncio.sleep(self._backoff(attempt))
+                attempt += 1
+                try:
+                    await self._sio.connect(self.url, **self._connect_kwargs)
+                except (socketio_exceptions.ConnectionError, OSError):
+                    continue
+
+                self.metrics.reconnected()
+                for channel in list(self._subscriptions):
+                    await self._sio.emit('subscribe', {'channel': channel})
+                await self._backfill(marks)
+                return
+        finally:
+            self._supervisor = None
+            self._held.clear()
+
+    async def _backfill(self, marks: t.Dict[str, t.Optional[datetime]]):
+        if self.client is None:
+            return
+
+        for channel, since in marks.items():
+            if since is None:
+                continue
+            try:
+                if channel in self._subscriptions:
+                    await self._backfill_channel(channel, since)
+            finally:
+                await self._release(channel)
+
+    async def _backfill_channel(self, channel: str, since: datetime):
+        symbol = channel[:-len(TRADE_CHANNEL_SUFFIX)]
+        missed: t.List[t.Dict[str, t.Any]] = []
+        try:
+            for page in range(1, self.backfill_pages + 1):
+                response = await self.client.get_recent_trades(symbol, page=page)
+                trades = response['result']['latestTrades']
+                missed.extend(trades)
+                if not trades or TradeDeduplicator.covers_gap(trades, since):
+                    break
+        except (APIException, aiohttp.ClientError, asyncio.TimeoutError, KeyError, TypeError):
+            self.backfill_errors += 1
+
+        # newest first over REST, delivered oldest first and one message per trade like the live feed
+        for trade in reversed(missed):
+            self.backfilled += await self._deliver(channel, trade, backfilled=True, since=since)
+
+    async def _release(self, channel: str):
+        # held live trades follow the backfill, the ones it already delivered are skipped by key;
+        # the channel stays held until the queue is empty so newer trades cannot overtake older ones
+        held = self._held.get(channel)
+        while held:
+            await self._deliver(channel, held.popleft())
+        self._held.pop(channel, None)
+
+    async def wait(self):
+        """
+        Run until the socket is disconnected.
+        """
+
+        self._check_connected('wait')
+        await self._sio.wait()
@@ -0,0 +1,320 @@
+import asyncio
+import errno
+import json
+import os
+import socket
+import stat
+import typing as t
+from collections import Counter
+
+from .. import decoders
+from .base import BaseWebsocket, Message
+from .buffers import BufferPolicy
+
+
+__all__ = [
+    'FeedHub',
+    'HubWebsocket',
+]
+
+
+# a single depth snapshot can be far larger than asyncio's 64 KiB line default
+_LINE_LIMIT = 16 * 1024 * 1024
+
+
+def _frame(payload: t.Dict[str, t.Any]) -> bytes:
+    return json.dumps(payload, separators=(',', ':'), default=str).encode() + b'\n'
+
+
+class _Peer:
+    def __init__(self, writer: asyncio.StreamWriter, high_water: int):
+        self.writer = writer
+        self.high_water = high_water
+        self.channels: t.Set[str] = set()
+        self.dropped: t.Counter[str] = Counter()
+
+    def send(self, channel: str, frame: bytes):
+        # never wait for a slow subscriber, skip frames while its socket buffer is full
+        if self.writer.transport.get_write_buffer_size() > self.high_water:
+            self.dropped[channel] += 1
+            return
+        self.writer.write(frame)
+
+
+class FeedHub:
+    """
+    Shares one upstream websocket with local processes over a Unix domain socket.
+
+    The hub subscribes upstream only to channels some subscriber asked for,
+    decodes every message once and writes the same encoded frame to every
+    subscriber of its channel. Subscribers connect with :class:`HubWebsocket`,
+    which has the same ``subscribe``/``stream`` API as ``AsyncWebsocket``.
+
+    A subscriber that does not keep up misses frames (counted in
+    :attr:`dropped`) instead of slowing the hub down. A channel whose upstream
+    stream ended, e.g. because the upstream socket was disconnected, is
+    streamed again on its next subscribe.
+
+    .. code-block:: python
+
+        async with AsyncWebsocket() as ws:
+            async with FeedHub(ws, '/tmp/wallex.sock'):
+                await ws.wait()
+    """
+
+    def __init__(
+            self,
+            ws: BaseWebsocket,
+            path: str,
+            maxsize: int = 1000,
+            policy: t.Optional[BufferPolicy] = None,
+            high_water: int = 4 * 1024 * 1024,
+    ):
+        """
+        :param ws: Connected upstream websocket
+        :type ws: BaseWebsocket
+
+        :param path: Path of the Unix domain socket; a stale socket left there is removed,
+            anything else at that path makes :meth:`start` fail
+        :type path: str
+
+        :param maxsize: Buffer size of the upstream stream of every channel
+        :type maxsize: int
+
+        :param policy: Buffer policy of those streams, see ``AsyncWebsocket.stream``
+        :type policy: t.Optional[BufferPolicy]
+
+        :param high_water: Bytes queued for a subscriber above which its frames are dropped
+        :type high_water: int
+        """
+        self.ws = ws
+        self.path = path
+        self.maxsize = maxsize
+        self.policy = policy
+        self.high_water = high_water
+
+        self.published: t.Counter[str] = Counter()
+        # upstream streams that ended with an error, e.g. because the upstream socket was disconnected
+        self.errors: t.Counter[str] = Counter()
+
+        self._server: t.Optional[asyncio.AbstractServer] = None
+        self._peers: t.Set[_Peer] = set()
+        self._channels: t.Dict[str, t.Set[_Peer]] = {}
+        self._forwarders: t.Dict[str, asyncio.Task] = {}
+        # drop counts of subscribers that have left
+        self._dropped: t.Counter[str] = Counter()
+
+    @property
+    def dropped(self) -> t.Counter[str]:
+        total = Counter(self._dropped)
+        for peer in self._peers:
+            total.update(peer.dropped)
+        return total
+
+    @property
+    def subscribers(self) -> int:
+        return len(self._peers)
+
+    async def start(self):
+        self._remove_stale_socket()
+        self._server = await asyncio.start_unix_server(self._serve, self.path, limit=_LINE_LIMIT)
+
+    def _remove_stale_socket(self):
+        try:
+            mode = os.stat(self.path).st_mode
+        except FileNotFoundError:
+            return
+        if not stat.S_ISSOCK(mode):
+            raise FileExistsError(errno.EEXIST, 'not a socket, refusing to replace it', self.path)
+
+        # a socket nobody accepts on is left over by a hub that did not close
+        probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            probe.connect(self.path)
+        except (ConnectionRefusedError, FileNotFoundError):
+            os.remove(self.path)
+            return
+        finally:
+            probe.close()
+        raise OSError(errno.EADDRINUSE, 'another hub is serving this socket', self.path)
+
+    async def close(self):
+        served = self._server is not None
+        if served:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
+
+        for task in self._forwarders.values():
+            task.cancel()
+        await asyncio.gather(*self._forwarders.values(), return_exceptions=True)
+        self._forwarders.clear()
+
+        for peer in list(self._peers):
+            peer.writer.close()
+        self._peers.clear()
+        self._channels.clear()
+
+        if served and os.path.exists(self.path):
+            os.remove(self.path)
+
+    async def _serve(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        peer = _Peer(writer, self.high_water)
+        self._peers.add(peer)
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                try:
+                    request = decoders.loads(line)
+                    event, channel = request['event'], request['data']['channel']
+                except (ValueError, KeyError, TypeError):
+                    continue
+
+                if event == 'subscribe':
+                    self._subscribe(peer, channel)
+                elif event == 'unsubscribe':
+                    self._unsubscribe(peer, channel)
+        except (ConnectionError, asyncio.IncompleteReadError, asyncio.LimitOverrunError):
+            pass
+        finally:
+            for channel in list(peer.channels):
+                self._unsubscribe(peer, channel)
+            self._peers.discard(peer)
+            self._dropped.update(peer.dropped)
+            writer.close()
+
+    def _subscribe(self, peer: _Peer, channel: str):
+        peer.channels.add(channel)
+        self._channels.setdefault(channel, set()).add(peer)
+        if channel not in self._forwarders:
+            task = self._forwarders[channel] = asyncio.ensure_future(self._forward(channel))
+            task.add_done_callback(lambda task: self._forwarded(channel, task))
+
+    def _forwarded(self, channel: str, task: asyncio.Task):
+        # forget an ended forwarder so the next subscribe starts a new one
+        if self._forwarders.get(channel) is task:
+            del self._forwarders[channel]
+        if not task.cancelled() and task.exception() is not None:
+            self.errors[channel] += 1
+
+    def _unsubscribe(self, peer: _Peer, channel: str):
+        peer.channels.discard(channel)
+        peers = self._channels.get(channel)
+        if peers is None:
+            return
+
+        peers.discard(peer)
+        if not peers:
+            del self._channels[channel]
+            task = self._forwarders.pop(channel, None)
+            if task is not None:
+                task.cancel()
+
+    async def _forward(self, channel: str):
+        async for message in self.ws.stream(channel, maxsize=self.maxsize, policy=self.policy):
+            frame = _frame(message._asdict())
+            self.published[channel] += 1
+            for peer in self._channels.get(channel, ()):
+                peer.send(channel, frame)
+
+    async def __aenter__(self):
+        await self.start()
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        await self.close()
+
+
+class HubWebsocket(BaseWebsocket):
+    """
+    Subscriber side of a :class:`FeedHub`, a drop-in for ``AsyncWebsocket`` in worker processes.
+
+    .. code-block:: python
+
+        async with HubWebsocket('/tmp/wallex.sock') as ws:
+            async for msg in ws.stream('BTCTMN@trade'):
+                print(msg.data)
+    """
+
+    # the only events of a hub connection, channel messages are read with stream()
+    EVENTS = ('connect', 'disconnect')
+
+    def __init__(self, path: str, **kwargs):
+        """
+        :param path: Unix domain socket of the hub
+        :type path: str
+
+        :param kwargs: ``metrics`` and ``clock``, as for ``AsyncWebsocket``
+        :type kwargs: t.Any
+        """
+        super().__init__(**kwargs)
+        self.path = path
+
+        self._reader: t.Optional[asyncio.StreamReader] = None
+        self._writer: t.Optional[asyncio.StreamWriter] = None
+        self._receiver: t.Optional[asyncio.Task] = None
+
+    @property
+    def connected(self) -> bool:
+        return self._writer is not None and not self._writer.is_closing()
+
+    async def connect(self, path: t.Optional[str] = None):
+        self.path = path or self.path
+        self._reader, self._writer = await asyncio.open_unix_connection(self.path, limit=_LINE_LIMIT)
+        self._receiver = asyncio.ensure_future(self._receive())
+        await self._trigger('connect')
+
+    async def disconnect(self):
+        """
+        Close the connection to the hub and end every open stream.
+        """
+
+        self._close_streams()
+        if self._receiver is not None:
+            self._receiver.cancel()
+            self._receiver = None
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
+
+    async def emit(self, event: str, data: t.Any):
+        self._check_connected('emit')
+        self._writer.write(_frame({'event': event, 'data': data}))
+        await self._writer.drain()
+
+    def on(self, event: str, callback: t.Callable[..., t.Any]):
+        """
+        Add a ``connect`` or ``disconnect`` callback, coroutine functions are awaited.
+
+        The hub relays channel messages only, other socket.io events of the upstream
+        socket never reach its subscribers and are refused here.
+        """
+
+        if event not in self.EVENTS:
+            raise ValueError(f'{event!r} events are not relayed by the hub, only {" and ".join(self.EVENTS)} are')
+        super().on(event, callback)
+
+    async def _receive(self):
+        try:
+            while True:
+                line = await self._reader.readline()
+                if not line:
+                    break
+                try:
+                    message = Message(**decoders.loads(line))
+                except (ValueError, TypeError):
+                    continue
+                self.metrics.received(message.channel, len(line))
+                await self._publish(message)
+        except (ConnectionError, asyncio.IncompleteReadError, asyncio.LimitOverrunError):
+            pass
+
+        # the hub went away
+        self._receiver = None
+        self._close_streams()
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
+        await self._trigger('disconnect')
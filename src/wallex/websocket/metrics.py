@@ -0,0 +1,251 @@
+import bisect
+import math
+import time
+import typing as t
+from collections import Counter, deque
+
+
+__all__ = [
+    'Histogram',
+    'WebsocketMetrics',
+]
+
+
+class Histogram:
+    """
+    Cumulative histogram with fixed upper bounds, in the shape Prometheus expects.
+    """
+
+    DEFAULT_BUCKETS = (
+        0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0,
+    )
+
+    def __init__(self, buckets: t.Sequence[float] = DEFAULT_BUCKETS):
+        self.buckets = tuple(sorted(buckets))
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def cumulative(self) -> t.List[t.Tuple[float, int]]:
+        """
+        :return: ``(upper bound, observations <= bound)`` pairs, the last bound is ``inf``
+        :rtype: t.List[t.Tuple[float, int]]
+        """
+
+        total = 0
+        pairs = []
+        for bound, count in zip(self.buckets + (math.inf,), self.counts):
+            total += count
+            pairs.append((bound, total))
+        return pairs
+
+    def quantile(self, q: float) -> float:
+        """
+        :return: Upper bound of the bucket holding the ``q`` quantile (0-1), NaN without observations
+        :rtype: float
+        """
+
+        if not self.count:
+            return math.nan
+        rank = q * self.count
+        for bound, total in self.cumulative():
+            if total >= rank:
+                return bound
+        return math.inf
+
+    @property
+    def mean(self) -> float:
+        return self.sum / self.count if self.count else math.nan
+
+
+class _Rate:
+    """
+    Events per second over the last ``window`` whole seconds.
+    """
+
+    def __init__(self, window: int):
+        self.window = window
+        self._seconds: t.Deque[t.List[int]] = deque()
+
+    def add(self, now: float):
+        second = int(now)
+        if self._seconds and self._seconds[-1][0] == second:
+            self._seconds[-1][1] += 1
+        else:
+            self._seconds.append([second, 1])
+        while self._seconds[0][0] <= second - self.window:
+            self._seconds.popleft()
+
+    def per_second(self, now: float) -> float:
+        start = int(now) - self.window
+        return sum(count for second, count in self._seconds if second > start) / self.window
+
+
+class WebsocketMetrics:
+    """
+    Counters of one websocket connection, per channel where it applies.
+
+    * messages and payload bytes received,
+    * messages per second over the last ``rate_window`` seconds,
+    * receive to handler completion latency, i.e. from a message arriving until
+      the stream consumer asks for the next one,
+    * engine.io ping round-trip time,
+    * reconnects.
+
+    :meth:`to_prometheus` renders everything in the Prometheus text format.
+    """
+
+    def __init__(
+            self,
+            rate_window: int = 10,
+            latency_buckets: t.Sequence[float] = Histogram.DEFAULT_BUCKETS,
+            clock: t.Callable[[], float] = time.time,
+    ):
+        """
+        :param rate_window: Seconds the message rate is averaged over
+        :type rate_window: int
+
+        :param latency_buckets: Upper bounds, in seconds, of the latency histograms
+        :type latency_buckets: t.Sequence[float]
+
+        :param clock: Wall clock, the same one the websocket stamps messages with
+        :type clock: t.Callable[[], float]
+        """
+        self.rate_window = rate_window
+        self.latency_buckets = tuple(latency_buckets)
+        self._clock = clock
+
+        self.messages: t.Counter[str] = Counter()
+        self.bytes: t.Counter[str] = Counter()
+        self.latency: t.Dict[str, Histogram] = {}
+        self.ping_rtt = Histogram(latency_buckets)
+        self.last_ping_rtt: t.Optional[float] = None
+        self.reconnects = 0
+
+        self._rates: t.Dict[str, _Rate] = {}
+
+    def received(self, channel: str, size: t.Optional[int] = None):
+        self.messages[channel] += 1
+        if size:
+            self.bytes[channel] += size
+
+        rate = self._rates.get(channel)
+        if rate is None:
+            rate = self._rates[channel] = _Rate(self.rate_window)
+        rate.add(self._clock())
+
+    def handled(self, channel: str, received: float):
+        histogram = self.latency.get(channel)
+        if histogram is None:
+            histogram = self.latency[channel] = Histogram(self.latency_buckets)
+        histogram.observe(max(0.0, self._clock() - received))
+
+    def pinged(self, seconds: float):
+        self.last_ping_rtt = seconds
+        self.ping_rtt.observe(seconds)
+
+    def reconnected(self):
+        self.reconnects += 1
+
+    def messages_per_second(self, channel: t.Optional[str] = None) -> float:
+        """
+        :param channel: Channel to report, all channels together by default
+        :type channel: t.Optional[str]
+        """
+
+        now = self._clock()
+        rates = [self._rates[channel]] if channel in self._rates else [] if channel else self._rates.values()
+        return sum(rate.per_second(now) for rate in rates)
+
+    def snapshot(self) -> t.Dict[str, t.Any]:
+        """
+        :return: Every metric as plain numbers, latencies summarised as mean, p50, p99 and max, the
+            percentiles and max given as the upper bound of the bucket they fall into
+        :rtype: t.Dict[str, t.Any]
+        """
+
+        channels = sorted(set(self.messages) | set(self.latency))
+        return {
+            'channels': {
+                channel: {
+                    'messages': self.messages[channel],
+                    'bytes': self.bytes[channel],
+                    'messages_per_second': self.messages_per_second(channel),
+                    'latency': self._summary(self.latency.get(channel)),
+                }
+                for channel in channels
+            },
+            'ping_rtt': self._summary(self.ping_rtt),
+            'last_ping_rtt': self.last_ping_rtt,
+            'reconnects': self.reconnects,
+        }
+
+    @staticmethod
+    def _summary(histogram: t.Optional[Histogram]) -> t.Dict[str, float]:
+        if histogram is None:
+            return {'count': 0, 'mean': math.nan, 'p50': math.nan, 'p99': math.nan, 'max': math.nan}
+        return {
+            'count': histogram.count,
+            'mean': histogram.mean,
+            'p50': histogram.quantile(0.5),
+            'p99': histogram.quantile(0.99),
+            'max': histogram.quantile(1.0),
+        }
+
+    def to_prometheus(self, prefix: str = 'wallex_ws') -> str:
+        """
+        :param prefix: Metric name prefix
+        :type prefix: str
+
+        :return: Metrics in the Prometheus text exposition format
+        :rtype: str
+        """
+
+        lines: t.List[str] = []
+
+        def header(name: str, kind: str, text: str):
+            lines.append(f'# HELP {prefix}_{name} {text}')
+            lines.append(f'# TYPE {prefix}_{name} {kind}')
+
+        def histogram(name: str, value: Histogram, labels: str = ''):
+            separator = ',' if labels else ''
+            for bound, total in value.cumulative():
+                le = '+Inf' if math.isinf(bound) else repr(bound)
+                lines.append(f'{prefix}_{name}_bucket{{{labels}{separator}le="{le}"}} {total}')
+            suffix = f'{{{labels}}}' if labels else ''
+            lines.append(f'{prefix}_{name}_sum{suffix} {value.sum}')
+            lines.append(f'{prefix}_{name}_count{suffix} {value.count}')
+
+        header('messages_total', 'counter', 'Messages received.')
+        for channel, count in sorted(self.messages.items()):
+            lines.append(f'{prefix}_messages_total{{{self._label(channel)}}} {count}')
+
+        header('received_bytes_total', 'counter', 'Payload bytes received.')
+        for channel, count in sorted(self.bytes.items()):
+            lines.append(f'{prefix}_received_bytes_total{{{self._label(channel)}}} {count}')
+
+        header('messages_per_second', 'gauge', f'Messages per second over the last {self.rate_window}s.')
+        for channel in sorted(self._rates):
+            lines.append(f'{prefix}_messages_per_second{{{self._label(channel)}}} {self.messages_per_second(channel)}')
+
+        header('handler_latency_seconds', 'histogram', 'Time from receiving a message until it was handled.')
+        for channel, value in sorted(self.latency.items()):
+            histogram('handler_latency_seconds', value, self._label(channel))
+
+        header('ping_rtt_seconds', 'histogram', 'Engine.io ping round-trip time.')
+        histogram('ping_rtt_seconds', self.ping_rtt)
+
+        header('reconnects_total', 'counter', 'Reconnects after the connection dropped.')
+        lines.append(f'{prefix}_reconnects_total {self.reconnects}')
+
+        return '\n'.join(lines) + '\n'
+
+    @staticmethod
+    def _label(channel: str) -> str:
+        escaped = channel.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+        return f'channel="{escaped}"'
@@ -0,0 +1,303 @@
+import asyncio
+import logging
+import os
+import struct
+import time
+import typing as t
+from concurrent.futures import Future, ThreadPoolExecutor
+
+from socketio import packet as socketio_packet
+
+from .base import BaseWebsocket, Message
+from .buffers import BufferPolicy
+
+
+__all__ = [
+    'SessionRecorder',
+    'read_session',
+    'ReplayWebsocket',
+]
+
+
+logger = logging.getLogger(__name__)
+
+
+MAGIC = b'WLXREC1\n'
+
+# receive time (epoch seconds), length of the raw packet that follows and whether it is a binary frame
+_HEADER = struct.Struct('<dI?')
+
+
+class SessionRecorder:
+    """
+    Append-only log of the raw socket.io packets a websocket receives.
+
+    Every record is the receive time as a float64, the packet length as a
+    uint32, a flag set for binary frames and the packet exactly as it came off
+    the wire, e.g. ``2["Broadcaster","BTCTMN@trade",{...}]``. A record cut
+    short by a crash is ignored when reading, so the file stays usable.
+
+    :meth:`write` only buffers the record, so it is cheap enough for the event
+    loop; full batches are written out on a background thread, in order.
+    """
+
+    def __init__(self, path: str, flush_every: int = 100):
+        """
+        :param path: File to append to, created with a header if it does not exist
+        :type path: str
+
+        :param flush_every: Records buffered before they are written out
+        :type flush_every: int
+        """
+        self.path = path
+        self.flush_every = flush_every
+        self.records = 0
+
+        self._pending: t.List[bytes] = []
+        self._closed = False
+        self._file = open(path, 'ab')
+        if self._file.tell() == 0:
+            self._file.write(MAGIC)
+            self._file.flush()
+        elif self._file.tell() < len(MAGIC) or _magic(path) != MAGIC:
+            self._file.close()
+            raise ValueError(f'{path} is not a websocket session recording')
+        # one thread, so batches reach the file in the order they were recorded
+        self._writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix='wallex-recorder')
+
+    @property
+    def closed(self) -> bool:
+        return self._closed
+
+    def write(self, received: float, packet: t.Union[str, bytes]):
+        """
+        :param received: Receive time, epoch seconds
+        :type received: float
+
+        :param packet: engine.io message, str for text frames and bytes for binary ones
+        :type packet: t.Union[str, bytes]
+        """
+
+        if self._closed:
+            raise ValueError(f'{self.path} recorder is closed')
+
+        binary = isinstance(packet, bytes)
+        raw = packet if binary else packet.encode()
+        self._pending.append(_HEADER.pack(received, len(raw), binary) + raw)
+        self.records += 1
+        if len(self._pending) >= self.flush_every:
+            self.flush()
+
+    def flush(self) -> Future:
+        """
+        Hand the buffered records to the writer thread.
+
+        :return: Future done once they are written to the file
+        :rtype: concurrent.futures.Future
+        """
+
+        batch, self._pending = b''.join(self._pending), []
+        return self._writer.submit(self._write, batch)
+
+    def _write(self, batch: bytes):
+        self._file.write(batch)
+        self._file.flush()
+
+    def close(self):
+        """
+        Write out every buffered record and close the file.
+        """
+
+        if self._closed:
+            return
+        self._closed = True
+        self.flush()
+        self._writer.shutdown(wait=True)
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+
+def _magic(path: str) -> bytes:
+    with open(path, 'rb') as f:
+        return f.read(len(MAGIC))
+
+
+def read_session(path: str) -> t.Iterator[t.Tuple[float, t.Union[str, bytes]]]:
+    """
+    :param path: File written by :class:`SessionRecorder`
+    :type path: str
+
+    :return: ``(receive time, raw packet)`` pairs in recording order, the packet is str for
+        text frames and bytes for binary ones, as engine.io handed it over
+    :rtype: t.Iterator[t.Tuple[float, t.Union[str, bytes]]]
+    """
+
+    with open(path, 'rb') as f:
+        if f.read(len(MAGIC)) != MAGIC:
+            raise ValueError(f'{path} is not a websocket session recording')
+
+        while True:
+            header = f.read(_HEADER.size)
+            if len(header) < _HEADER.size:
+                return
+            received, size, binary = _HEADER.unpack(header)
+            raw = f.read(size)
+            if len(raw) < size:
+                return
+            yield received, raw if binary else raw.decode('utf-8', 'replace')
+
+
+class _Decoder:
+    """
+    socket.io packet decoder of a recorded session, a binary event arrives as
+    a text packet followed by one binary frame per attachment.
+    """
+
+    def __init__(self):
+        self._binary: t.Optional[socketio_packet.Packet] = None
+
+    def broadcast(self, raw: t.Union[str, bytes]) -> t.Optional[t.Tuple[str, t.Any]]:
+        """
+        :return: ``(channel, data)`` of a ``Broadcaster`` event, None for any other packet or
+            for a packet still waiting for its attachments
+        """
+
+        if isinstance(raw, bytes):
+            if self._binary is None:
+                raise ValueError('binary frame without a packet expecting it')
+            if not self._binary.add_attachment(raw):
+                return None
+            pkt, self._binary = self._binary, None
+        else:
+            self._binary = None
+            pkt = socketio_packet.Packet(encoded_packet=raw)
+            if pkt.packet_type == socketio_packet.BINARY_EVENT and pkt.attachment_count:
+                self._binary = pkt
+                return None
+
+        if pkt.packet_type not in (socketio_packet.EVENT, socketio_packet.BINARY_EVENT):
+            return None
+        if not isinstance(pkt.data, list) or not pkt.data or pkt.data[0] != 'Broadcaster':
+            return None
+        return pkt.data[1], pkt.data[2] if len(pkt.data) > 2 else None
+
+
+class ReplayWebsocket(BaseWebsocket):
+    """
+    Plays a recorded session back through the ``stream`` API of ``AsyncWebsocket``.
+
+    ``speed`` 1 keeps the recorded pacing, 10 plays ten times faster and None
+    as fast as the consumers take messages. Streams default to the ``BLOCK``
+    policy so a replay is lossless and deterministic. Messages are stamped
+    with the replay clock, so handler latency metrics stay meaningful.
+    Packets that cannot be decoded are logged, counted in :attr:`skipped`
+    and left out.
+
+    .. code-block:: python
+
+        async with ReplayWebsocket('session.rec', speed=None) as ws:
+            consumer = asyncio.ensure_future(consume(ws.stream('BTCTMN@trade')))
+            await ws.wait('BTCTMN@trade')
+            await consumer
+    """
+
+    DEFAULT_POLICY = BufferPolicy.BLOCK
+
+    def __init__(self, path: str, speed: t.Optional[float] = 1.0, **kwargs):
+        """
+        :param path: File written by :class:`SessionRecorder`
+        :type path: str
+
+        :param speed: Playback speed factor, None for no pacing at all
+        :type speed: t.Optional[float]
+
+        :param kwargs: ``metrics`` and ``clock``, as for ``AsyncWebsocket``
+        :type kwargs: t.Any
+        """
+        super().__init__(**kwargs)
+        if speed is not None and speed <= 0:
+            raise ValueError('speed must be positive or None')
+
+        self.path = path
+        self.speed = speed
+        self.replayed = 0
+        self.skipped = 0
+
+        self._connected = False
+        # set whenever a stream subscribes to a channel
+        self._subscribed = asyncio.Event()
+
+    @property
+    def connected(self) -> bool:
+        return self._connected
+
+    async def connect(self, path: t.Optional[str] = None):
+        self.path = path or self.path
+        if not os.path.exists(self.path):
+            raise FileNotFoundError(self.path)
+        self._connected = True
+
+    async def disconnect(self):
+        self._close_streams()
+        self._connected = False
+
+    async def emit(self, event: str, data: t.Any):
+        self._check_connected('emit')
+        if event == 'subscribe':
+            self._subscribed.set()
+
+    async def ready(self, *channels: str):
+        """
+        Wait until a stream reads each of ``channels``.
+        """
+
+        self._check_connected('ready')
+        while not all(channel in self._streams for channel in channels):
+            self._subscribed.clear()
+            await self._subscribed.wait()
+
+    async def wait(self, *channels: str) -> int:
+        """
+        Replay the whole session, then end every stream.
+
+        :param channels: Channels to wait for a stream of before the replay starts, see :meth:`ready`;
+            without any the replay starts right away and only streams already reading see it all
+        :type channels: str
+
+        :return: Number of channel messages replayed
+        :rtype: int
+        """
+
+        await self.ready(*channels)
+
+        decoder = _Decoder()
+        first: t.Optional[float] = None
+        started = time.monotonic()
+        for received, raw in read_session(self.path):
+            try:
+                event = decoder.broadcast(raw)
+            except (ValueError, TypeError, IndexError, KeyError) as e:
+                self.skipped += 1
+                logger.warning('skipping undecodable packet recorded at %.6f in %s: %r', received, self.path, e)
+                continue
+            if event is None:
+                continue
+
+            if self.speed is not None:
+                first = received if first is None else first
+                delay = (received - first) / self.speed - (time.monotonic() - started)
+                if delay > 0:
+                    await asyncio.sleep(delay)
+
+            channel, data = event
+            self.metrics.received(channel, len(raw))
+            await self._publish(Message(channel, data, self._clock()))
+            self.replayed += 1
+
+        await self.disconnect()
+        return self.replayed
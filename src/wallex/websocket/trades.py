@@ -0,0 +1,98 @@
+import typing as t
+from collections import deque
+from datetime import datetime
+
+
+__all__ = [
+    'TRADE_CHANNEL_SUFFIX',
+    'TradeDeduplicator',
+]
+
+
+TRADE_CHANNEL_SUFFIX = '@trade'
+
+
+def _trade_time(trade: t.Dict[str, t.Any]) -> t.Optional[datetime]:
+    value = trade.get('timestamp')
+    if isinstance(value, datetime):
+        return value
+    try:
+        return datetime.fromisoformat(str(value).replace('Z', '+00:00'))
+    except ValueError:
+        return None
+
+
+def _trade_key(trade: t.Dict[str, t.Any]) -> t.Tuple:
+    # trades carry no id, these fields together identify one
+    return (
+        str(trade.get('timestamp')), str(trade.get('price')), str(trade.get('quantity')), trade.get('isBuyOrder')
+    )
+
+
+class TradeDeduplicator:
+    """
+    Remembers the trades already delivered on one channel.
+
+    Trades older than the newest one seen are dropped, as are trades with the
+    same key among the last ``window`` delivered, which covers trades sharing
+    a timestamp and the overlap between a REST backfill and the live feed.
+    """
+
+    def __init__(self, window: int = 1000):
+        self._keys: t.Deque[t.Tuple] = deque(maxlen=window)
+        self._seen: t.Set[t.Tuple] = set()
+        self.latest: t.Optional[datetime] = None
+        self.duplicates = 0
+
+    def is_new(self, trade: t.Dict[str, t.Any], since: t.Optional[datetime] = None) -> bool:
+        """
+        :param trade: Trade as published on the channel or returned by ``trades``
+        :type trade: t.Dict[str, t.Any]
+
+        :param since: Time trades have to be newer than, the newest trade seen by default
+        :type since: t.Optional[datetime]
+
+        :return: True, and remember the trade, if it was not delivered yet
+        :rtype: bool
+        """
+
+        key = _trade_key(trade)
+        when = _trade_time(trade)
+        since = since if since is not None else self.latest
+        if key in self._seen or (when is not None and since is not None and when < since):
+            self.duplicates += 1
+            return False
+
+        if len(self._keys) == self._keys.maxlen:
+            self._seen.discard(self._keys[0])
+        self._keys.append(key)
+        self._seen.add(key)
+        if when is not None and (self.latest is None or when > self.latest):
+            self.latest = when
+        return True
+
+    def filter(self, data: t.Any, since: t.Optional[datetime] = None) -> t.Any:
+        """
+        :param data: One trade or a list of trades, as published on a trade channel
+        :type data: t.Any
+
+        :return: ``data`` without the trades already seen, None if nothing is left
+        :rtype: t.Any
+        """
+
+        if isinstance(data, dict):
+            return data if self.is_new(data, since) else None
+        if isinstance(data, list):
+            fresh = [trade for trade in data if not isinstance(trade, dict) or self.is_new(trade, since)]
+            return fresh or None
+        return data
+
+    @staticmethod
+    def covers_gap(trades: t.List[t.Dict[str, t.Any]], since: t.Optional[datetime]) -> bool:
+        """
+        :return: True if ``trades`` reach back to ``since``, i.e. nothing older is missing
+        :rtype: bool
+        """
+
+        times = [when for when in map(_trade_time, trades) if when is not None]
+        return since is None or not times or min(times) <= since
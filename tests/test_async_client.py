@@ -0,0 +1,96 @@
+import asyncio
+import threading
+
+import aiohttp
+import pytest
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+
+from wallex import AsyncClient
+
+
+def test_session_is_reused_within_a_loop_and_rebuilt_once_closed():
+    async def run():
+        client = AsyncClient()
+        session = client._get_session()
+        assert client._get_session() is session
+        assert session.headers['Accept'] == 'application/json'
+
+        await client.close_connection()
+        assert client._get_session() is not session
+        await client.close_connection()
+
+    asyncio.run(run())
+
+
+def test_session_open_in_another_loop_fails_loudly():
+    client = AsyncClient()
+    other = asyncio.new_event_loop()
+    ready, stop = threading.Event(), threading.Event()
+
+    def serve():
+        asyncio.set_event_loop(other)
+        other.run_until_complete(open_session())
+
+    async def open_session():
+        client._get_session()
+        ready.set()
+        while not stop.is_set():
+            await asyncio.sleep(0.01)
+        await client.close_connection()
+
+    thread = threading.Thread(target=serve)
+    thread.start()
+    ready.wait(5)
+
+    async def use():
+        with pytest.raises(RuntimeError):
+            client._get_session()
+
+    try:
+        asyncio.run(use())
+    finally:
+        stop.set()
+        thread.join(5)
+        other.close()
+
+    async def use_after_close():
+        session = client._get_session()
+        await client.close_connection()
+        return session
+
+    assert asyncio.run(use_after_close()).closed
+
+
+def test_session_left_open_in_a_closed_loop_is_replaced_with_a_warning():
+    client = AsyncClient()
+
+    async def open_session():
+        return client._get_session()
+
+    first = asyncio.run(open_session())
+
+    async def reuse():
+        with pytest.warns(ResourceWarning):
+            session = client._get_session()
+        await client.close_connection()
+        return session
+
+    assert asyncio.run(reuse()) is not first
+
+
+def test_shared_session_requests_carry_the_client_headers():
+    async def echo(request):
+        return web.json_response({'accept': request.headers.get('Accept'), 'key': request.headers.get('x-api-key')})
+
+    async def run():
+        app = web.Application()
+        app.router.add_get('/v1/account/profile', echo)
+        async with TestServer(app) as server:
+            async with aiohttp.ClientSession() as shared:
+                client = AsyncClient('secret', session=shared)
+                client.API_URL = str(server.make_url('')).rstrip('/')
+                assert await client.get_profile() == {'accept': 'application/json', 'key': 'secret'}
+                assert 'Accept' not in shared.headers
+
+    asyncio.run(run())
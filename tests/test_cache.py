@@ -0,0 +1,76 @@
+import asyncio
+
+from wallex import AsyncClient, Client, ResponseCache
+
+
+MARKETS = {
+    'success': True,
+    'result': {'symbols': {
+        'BTCTMN': {'symbol': 'BTCTMN', 'stats': {'lastPrice': '100'}},
+        'ETHTMN': {'symbol': 'ETHTMN', 'stats': {'lastPrice': '10'}},
+    }},
+}
+
+STATS = {'success': True, 'result': [{'key': 'BTC', 'price': 1}, {'key': 'ETH', 'price': 2}]}
+
+
+def cached_client(cls, payloads):
+    client = cls(cache=ResponseCache())
+    calls = []
+
+    def fetch(method, uri, signed, **kwargs):
+        calls.append(uri)
+        return payloads[uri.rsplit('/v1/', 1)[1]]
+
+    async def fetch_async(method, uri, signed, **kwargs):
+        return fetch(method, uri, signed, **kwargs)
+
+    client._fetch = fetch_async if cls is AsyncClient else fetch
+    return client, calls
+
+
+def test_hits_are_copies_of_the_cached_response():
+    client, calls = cached_client(Client, {'markets': MARKETS})
+
+    first = client.get_market_stats()
+    first['result']['symbols']['BTCTMN']['stats']['lastPrice'] = 'changed'
+    del first['result']['symbols']['ETHTMN']
+
+    second = client.get_market_stats()
+    assert second == MARKETS
+    assert len(calls) == 1
+
+
+def test_picked_entries_leave_the_cached_response_alone():
+    client, calls = cached_client(Client, {'markets': MARKETS, 'currencies/stats': STATS})
+
+    btc = client.get_market_stats('BTCTMN')
+    assert btc['result']['symbols'] == {'BTCTMN': MARKETS['result']['symbols']['BTCTMN']}
+    btc['result']['symbols']['BTCTMN']['stats']['lastPrice'] = 'changed'
+    btc['success'] = False
+
+    assert client.get_market_stats('ETHTMN')['result']['symbols'] == {
+        'ETHTMN': MARKETS['result']['symbols']['ETHTMN']
+    }
+    assert client.get_market_stats() == MARKETS
+
+    eth = client.get_currencies_stats('ETH')
+    assert eth['result'] == [{'key': 'ETH', 'price': 2}]
+    eth['result'][0]['price'] = 0
+    assert client.get_currencies_stats() == STATS
+    assert len(calls) == 2
+
+
+def test_async_hits_are_copies_of_the_cached_response():
+    async def run():
+        client, calls = cached_client(AsyncClient, {'markets': MARKETS})
+
+        btc = await client.get_market_stats('BTCTMN')
+        btc['result']['symbols']['BTCTMN']['stats']['lastPrice'] = 'changed'
+        full = await client.get_market_stats()
+        full['result']['symbols'].clear()
+
+        assert await client.get_market_stats() == MARKETS
+        assert len(calls) == 1
+
+    asyncio.run(run())
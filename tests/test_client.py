@@ -0,0 +1,150 @@
+import threading
+
+import requests
+
+from wallex import Client
+
+
+def test_thread_sessions_copy_the_main_session():
+    main = requests.session()
+    main.verify = '/etc/ssl/custom.pem'
+    main.proxies = {'https': 'http://proxy:3128'}
+    main.auth = ('user', 'secret')
+    client = Client(session=main, thread_safe=True)
+
+    session = client.submit(client._get_session).result()
+    assert session is not main
+    assert session.verify == main.verify
+    assert session.proxies == main.proxies
+    assert session.auth == main.auth
+    assert session.headers == main.headers
+    assert session.get_adapter('https://api.wallex.ir') is main.get_adapter('https://api.wallex.ir')
+
+    client.close_connection()
+
+
+def test_close_connection_closes_thread_sessions():
+    client = Client(thread_safe=True)
+    closed = []
+
+    def track():
+        session = client._get_session()
+        session.close = lambda: closed.append(session)
+        return session
+
+    sessions = [track(), client.submit(track).result()]
+    assert sessions[0] is not sessions[1]
+
+    client.close_connection()
+    assert closed == sessions
+    # a new session is cloned after closing
+    assert client._get_session() not in sessions
+
+
+def test_pool_workers_use_their_own_sessions():
+    client = Client(max_workers=4)
+    barrier = threading.Barrier(4)
+
+    def session(_):
+        # keep all four workers busy so every call runs on its own thread
+        barrier.wait(timeout=5)
+        return client._get_session()
+
+    sessions = list(client.map(session, range(4)))
+    assert client.session not in sessions
+    assert len({id(s) for s in sessions}) == 4
+    assert client._get_session() is client.session
+
+    client.close_connection()
+
+
+def test_create_orders_from_a_pool_worker_does_not_deadlock():
+    client = Client(max_workers=1)
+    client.create_order = lambda **spec: spec
+
+    orders = [{'symbol': 'BTCTMN', 'quantity': n} for n in range(3)]
+    assert client.submit(client.create_orders, orders).result(timeout=5) == orders
+
+    client.close_connection()
+
+
+class FakeOrders:
+    def __init__(self, client, count):
+        self.client = client
+        self.open = {f'order-{n}': {'clientOrderId': f'order-{n}', 'symbol': 'BTCTMN', 'side': 'BUY'}
+                     for n in range(count)}
+        self.sessions = []
+        self.lock = threading.Lock()
+
+    def get_open_orders(self, page=1, per_page=200, **_):
+        with self.lock:
+            orders = list(self.open.values())
+        return {'result': {'orders': orders[(page - 1) * per_page:page * per_page]}}
+
+    def cancel_order(self, order_id):
+        with self.lock:
+            self.sessions.append(self.client._get_session())
+            del self.open[order_id]
+        return {'success': True}
+
+
+def test_cancel_all_orders_from_a_pool_worker():
+    client = Client(max_workers=1)
+    orders = FakeOrders(client, 5)
+    client.get_open_orders = orders.get_open_orders
+    client.cancel_order = orders.cancel_order
+
+    report = client.submit(client.cancel_all_orders).result(timeout=5)
+    assert sorted(report['cancelled']) == [f'order-{n}' for n in range(5)]
+    assert report['remaining'] == [] and report['rounds'] == 1
+    assert client.session not in orders.sessions
+
+    client.close_connection()
+
+
+def fake_pages(pages, per_page, total=True):
+    fetched = []
+
+    def fetch(page):
+        fetched.append(page)
+        count = per_page if page <= pages else 0
+        response = {'result': {'latestTrades': [{'page': page} for _ in range(count)]}}
+        if total:
+            response['result_info'] = {'total_count': pages * per_page}
+        return response
+
+    return fetch, fetched
+
+
+def trades(response):
+    return response['result']['latestTrades']
+
+
+def test_iter_pages_prefetches_on_the_pool():
+    client = Client(max_workers=4)
+    fetch, fetched = fake_pages(5, 2)
+
+    items = list(client._iter_pages(fetch, trades, 2, 4))
+    assert [item['page'] for item in items] == [1, 1, 2, 2, 3, 3, 4, 4, 5, 5]
+    assert sorted(fetched) == [1, 2, 3, 4, 5]
+
+    client.close_connection()
+
+
+def test_iter_pages_on_a_pool_worker_fetches_in_place():
+    client = Client(max_workers=1)
+
+    def consume(total):
+        fetch, fetched = fake_pages(5, 2, total)
+        pages = client._iter_pages(fetch, trades, 2, 4)
+        head = [next(pages)['page'] for _ in range(3)]
+        reached = list(fetched)
+        return head, reached, [item['page'] for item in pages]
+
+    for total in (True, False):
+        head, reached, rest = client.submit(consume, total).result(timeout=5)
+        assert head == [1, 1, 2]
+        assert reached == [1, 2]
+        assert rest == [2, 3, 3, 4, 4, 5, 5]
+
+    client.close_connection()
@@ -0,0 +1,64 @@
+import asyncio
+
+import pytest
+
+from wallex.clients.coalescing import SingleFlight
+
+
+def test_concurrent_callers_share_one_call_and_get_their_own_result():
+    async def run():
+        flight = SingleFlight()
+        calls = []
+
+        async def fetch():
+            calls.append(1)
+            await asyncio.sleep(0.01)
+            return {'result': {'symbols': {'BTCTMN': [1, 2]}}}
+
+        async def caller():
+            result = await flight.do('markets', fetch)
+            # mutate right away, before the other callers have resumed
+            result['result']['symbols']['BTCTMN'].append('mine')
+            return result
+
+        results = await asyncio.gather(*(caller() for _ in range(4)))
+        assert len(calls) == 1
+        assert len(flight) == 0
+        assert all(result['result']['symbols']['BTCTMN'] == [1, 2, 'mine'] for result in results)
+        assert len({id(result) for result in results}) == 4
+
+    asyncio.run(run())
+
+
+def test_a_cancelled_caller_does_not_cancel_the_flight():
+    async def run():
+        flight = SingleFlight()
+
+        async def fetch():
+            await asyncio.sleep(0.01)
+            return {'ok': True}
+
+        first = asyncio.ensure_future(flight.do('key', fetch))
+        second = asyncio.ensure_future(flight.do('key', fetch))
+        await asyncio.sleep(0)
+        first.cancel()
+
+        assert await second == {'ok': True}
+        with pytest.raises(asyncio.CancelledError):
+            await first
+
+    asyncio.run(run())
+
+
+def test_errors_reach_every_caller():
+    async def run():
+        flight = SingleFlight()
+
+        async def fetch():
+            await asyncio.sleep(0)
+            raise ValueError('boom')
+
+        results = await asyncio.gather(*(flight.do('key', fetch) for _ in range(3)), return_exceptions=True)
+        assert all(isinstance(result, ValueError) for result in results)
+
+    asyncio.run(run())
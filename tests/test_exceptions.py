@@ -0,0 +1,21 @@
+import pytest
+
+from wallex.exceptions import APIException
+
+
+def test_json_object_body():
+    error = APIException(None, 400, b'{"code": 12, "message": "bad symbol", "result": {"symbol": ["invalid"]}}')
+    assert (error.code, error.message, error.result) == (12, 'bad symbol', {'symbol': ['invalid']})
+
+
+@pytest.mark.parametrize('body', [b'["rate limited"]', b'"rate limited"', b'42', b'null'])
+def test_json_body_that_is_not_an_object(body):
+    error = APIException(None, 429, body)
+    assert error.code == 0 and error.result is None
+    assert error.message.startswith('Unexpected error message from Wallex')
+    assert error.status_code == 429
+
+
+def test_invalid_json_body():
+    error = APIException(None, 502, b'<html>Bad Gateway</html>')
+    assert error.message == 'Invalid JSON error message from Wallex: <html>Bad Gateway</html>'
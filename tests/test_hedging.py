@@ -0,0 +1,70 @@
+import asyncio
+import gc
+
+from wallex import AsyncClient, HedgePolicy
+
+
+def hedged_client(*attempts):
+    """
+    Client whose n-th request sleeps ``attempts[n][0]`` seconds, then returns or raises ``attempts[n][1]``.
+    """
+
+    policy = HedgePolicy(initial_delay=0.02, min_delay=0.01)
+    client = AsyncClient(hedge_policy=policy)
+    queue = list(attempts)
+
+    async def send(method, uri, signed, **kwargs):
+        delay, outcome = queue.pop(0)
+        await asyncio.sleep(delay)
+        if isinstance(outcome, Exception):
+            raise outcome
+        return outcome
+
+    client._send = send
+    return client, policy
+
+
+def run_collecting_errors(coro):
+    errors = []
+
+    async def main():
+        asyncio.get_running_loop().set_exception_handler(lambda loop, context: errors.append(context))
+        try:
+            return await coro
+        finally:
+            await asyncio.sleep(0.1)
+            gc.collect()
+
+    return asyncio.run(main()), errors
+
+
+def test_hedge_wins_and_the_slow_primary_is_recorded():
+    client, policy = hedged_client((0.2, {'from': 'primary'}), (0, {'from': 'hedge'}))
+
+    result, errors = run_collecting_errors(client.get_orderbook('BTCTMN'))
+    assert result == {'from': 'hedge'}
+    assert (policy.hedged, policy.hedge_wins) == (1, 1)
+    assert errors == []
+
+    samples = sorted(policy._latencies['depth'])
+    assert len(samples) == 2
+    # the hedge answered quickly, the cancelled primary had been pending at least the hedge delay
+    assert samples[0] < 0.02 <= samples[1]
+
+
+def test_failed_primary_exception_is_retrieved():
+    client, policy = hedged_client((0.05, ValueError('primary failed')), (0.1, {'from': 'hedge'}))
+
+    result, errors = run_collecting_errors(client.get_orderbook('BTCTMN'))
+    assert result == {'from': 'hedge'}
+    assert errors == []
+    assert len(policy._latencies['depth']) == 1
+
+
+def test_failed_hedge_after_primary_won_is_retrieved():
+    client, policy = hedged_client((0.05, {'from': 'primary'}), (0, ValueError('hedge failed')))
+
+    result, errors = run_collecting_errors(client.get_orderbook('BTCTMN'))
+    assert result == {'from': 'primary'}
+    assert policy.hedge_wins == 0
+    assert errors == []
@@ -0,0 +1,94 @@
+import asyncio
+import os
+import socket
+
+import pytest
+
+pytest.importorskip('socketio')
+
+from wallex.websocket import BaseWebsocket, FeedHub, HubWebsocket, Message  # noqa: E402
+
+
+class Upstream(BaseWebsocket):
+    connected = True
+
+    async def connect(self):
+        pass
+
+    async def disconnect(self):
+        self._close_streams()
+
+    async def emit(self, event, data):
+        pass
+
+
+async def until(condition):
+    for _ in range(500):
+        if condition():
+            return
+        await asyncio.sleep(0.01)
+    raise AssertionError('timed out')
+
+
+def test_channel_is_forwarded_again_after_its_upstream_stream_ended(tmp_path):
+    path = str(tmp_path / 'hub.sock')
+
+    async def run():
+        upstream = Upstream()
+        async with FeedHub(upstream, path) as hub:
+            first = HubWebsocket(path)
+            await first.connect()
+            await first.subscribe('BTCTMN@trade')
+            await until(lambda: 'BTCTMN@trade' in upstream._streams)
+
+            # the upstream socket went away and came back
+            upstream._close_streams()
+            await until(lambda: not hub._forwarders)
+
+            second = HubWebsocket(path)
+            await second.connect()
+            stream = second.stream('BTCTMN@trade')
+            reading = asyncio.ensure_future(stream.__anext__())
+            await until(lambda: 'BTCTMN@trade' in upstream._streams)
+
+            await upstream._publish(Message('BTCTMN@trade', {'price': '1'}, 0.0))
+            message = await asyncio.wait_for(reading, 5)
+            assert message.data == {'price': '1'}
+
+            await stream.aclose()
+            await first.disconnect()
+            await second.disconnect()
+
+    asyncio.run(run())
+
+
+def test_start_replaces_only_a_stale_socket(tmp_path):
+    path = str(tmp_path / 'hub.sock')
+
+    async def run():
+        with open(path, 'w') as f:
+            f.write('keep me')
+        with pytest.raises(FileExistsError):
+            await FeedHub(Upstream(), path).start()
+        assert open(path).read() == 'keep me'
+        os.remove(path)
+
+        # bound and never unlinked, as after a crash
+        stale = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        stale.bind(path)
+        stale.close()
+
+        async with FeedHub(Upstream(), path):
+            with pytest.raises(OSError):
+                await FeedHub(Upstream(), path).start()
+            assert os.path.exists(path)
+        assert not os.path.exists(path)
+
+    asyncio.run(run())
+
+
+def test_hub_websocket_refuses_events_the_hub_does_not_relay(tmp_path):
+    ws = HubWebsocket(str(tmp_path / 'hub.sock'))
+    ws.on('disconnect', lambda: None)
+    with pytest.raises(ValueError):
+        ws.on('Broadcaster', lambda channel, data: None)
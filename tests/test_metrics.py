@@ -0,0 +1,93 @@
+import math
+
+import pytest
+
+pytest.importorskip('socketio')
+
+from wallex.websocket.metrics import Histogram, WebsocketMetrics  # noqa: E402
+
+
+class Clock:
+    def __init__(self, now=1000.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+def test_rate_is_averaged_over_the_sliding_window():
+    clock = Clock()
+    metrics = WebsocketMetrics(rate_window=10, clock=clock)
+
+    for second in range(10):
+        clock.now = 1000.0 + second
+        for _ in range(3):
+            metrics.received('BTCTMN@trade', 100)
+    metrics.received('ETHTMN@trade')
+
+    assert metrics.messages_per_second('BTCTMN@trade') == 3.0
+    assert metrics.messages_per_second() == 3.1
+    assert metrics.messages_per_second('unknown') == 0.0
+
+    # the first five seconds fall out of the window
+    clock.now = 1014.5
+    assert metrics.messages_per_second('BTCTMN@trade') == 1.5
+    clock.now = 1030.0
+    assert metrics.messages_per_second() == 0.0
+    assert metrics.messages['BTCTMN@trade'] == 30 and metrics.bytes['BTCTMN@trade'] == 3000
+
+
+def test_histogram_percentiles_are_bucket_upper_bounds():
+    histogram = Histogram((0.01, 0.1, 1.0))
+    assert math.isnan(histogram.quantile(0.5)) and math.isnan(histogram.mean)
+
+    for value in [0.005] * 50 + [0.05] * 49 + [0.5]:
+        histogram.observe(value)
+    assert histogram.quantile(0.5) == 0.01
+    assert histogram.quantile(0.99) == 0.1
+    assert histogram.quantile(1.0) == 1.0
+    assert histogram.cumulative() == [(0.01, 50), (0.1, 99), (1.0, 100), (math.inf, 100)]
+
+    histogram.observe(5.0)
+    assert histogram.quantile(1.0) == math.inf
+
+
+def test_snapshot_summarises_latency():
+    clock = Clock()
+    metrics = WebsocketMetrics(latency_buckets=(0.01, 0.1, 1.0), clock=clock)
+    metrics.received('BTCTMN@trade', 10)
+    for delay in (0.005, 0.005, 0.5):
+        metrics.handled('BTCTMN@trade', clock.now - delay)
+    metrics.pinged(0.05)
+    metrics.reconnected()
+
+    snapshot = metrics.snapshot()
+    latency = snapshot['channels']['BTCTMN@trade']['latency']
+    assert latency['count'] == 3 and latency['mean'] == pytest.approx(0.51 / 3)
+    assert (latency['p50'], latency['p99'], latency['max']) == (0.01, 1.0, 1.0)
+    assert snapshot['ping_rtt']['max'] == 0.1 and snapshot['last_ping_rtt'] == 0.05
+    assert snapshot['reconnects'] == 1
+
+
+def test_prometheus_output():
+    clock = Clock()
+    metrics = WebsocketMetrics(latency_buckets=(0.01, 0.1), clock=clock)
+    channel = 'odd "name"\\with\nbreak'
+    metrics.received(channel, 42)
+    metrics.handled(channel, clock.now - 0.05)
+    metrics.pinged(0.005)
+
+    lines = metrics.to_prometheus(prefix='ws').splitlines()
+    label = 'channel="odd \\"name\\"\\\\with\\nbreak"'
+    assert '# TYPE ws_messages_total counter' in lines
+    assert f'ws_messages_total{{{label}}} 1' in lines
+    assert f'ws_received_bytes_total{{{label}}} 42' in lines
+    assert f'ws_handler_latency_seconds_bucket{{{label},le="0.01"}} 0' in lines
+    assert f'ws_handler_latency_seconds_bucket{{{label},le="0.1"}} 1' in lines
+    assert f'ws_handler_latency_seconds_bucket{{{label},le="+Inf"}} 1' in lines
+    assert f'ws_handler_latency_seconds_count{{{label}}} 1' in lines
+    assert 'ws_ping_rtt_seconds_bucket{le="0.01"} 1' in lines
+    assert 'ws_ping_rtt_seconds_count 1' in lines
+    assert 'ws_reconnects_total 0' in lines
+    # one sample per line, the newline in the channel name is escaped
+    assert all(line.startswith(('#', 'ws_')) for line in lines)
@@ -0,0 +1,69 @@
+import pytest
+
+from wallex import Client
+from wallex.enums import Resolution
+from wallex.exceptions import RequestException
+from wallex.models import OHLC
+from wallex.ohlc import merge_udf, split_range
+
+
+H = Resolution.ONE_HOUR.seconds
+
+
+def chunk(*times):
+    return {'s': 'ok', 't': list(times), 'o': [1.0] * len(times), 'h': [2.0] * len(times),
+            'l': [0.5] * len(times), 'c': [1.5] * len(times), 'v': [10.0] * len(times)}
+
+
+def test_merge_udf_orders_and_deduplicates():
+    merged = merge_udf([chunk(3 * H, 4 * H), {'s': 'no_data'}, {**chunk(H, 3 * H), 'c': [9.0, 9.0]}])
+    assert merged['t'] == [H, 3 * H, 4 * H]
+    assert merged['c'] == [9.0, 9.0, 1.5]
+
+
+def test_merge_udf_without_bars_is_no_data():
+    assert merge_udf([{'s': 'no_data'}, {'s': 'no_data', 'nextTime': H}]) == {'s': 'no_data'}
+
+
+def test_merge_udf_names_failed_windows():
+    windows = [(0, H - 1), (H, 2 * H - 1), (2 * H, 3 * H - 1)]
+    chunks = [chunk(0), {'s': 'error', 'errmsg': 'rate limited'}, {'s': 'error'}]
+
+    with pytest.raises(RequestException) as error:
+        merge_udf(chunks, windows)
+    assert str((H, 2 * H - 1)) in error.value.message and 'rate limited' in error.value.message
+    assert str((2 * H, 3 * H - 1)) in error.value.message
+    assert str((0, H - 1)) not in error.value.message
+
+
+def test_from_udf_raises_on_an_error_status():
+    pytest.importorskip('numpy')
+
+    assert len(OHLC.from_udf({'s': 'no_data', 'nextTime': H})) == 0
+    assert len(OHLC.from_udf(chunk(H, 2 * H))) == 2
+    with pytest.raises(RequestException, match='rate limited'):
+        OHLC.from_udf({'s': 'error', 'errmsg': 'rate limited'})
+    with pytest.raises(RequestException, match='None'):
+        OHLC.from_udf({})
+
+
+def test_download_ohlc_data_fails_on_an_error_chunk():
+    client = Client(max_workers=4)
+
+    def get_ohlc_data(symbol, resolution, from_date, to_date):
+        if from_date == 10 * H:
+            return {'s': 'error', 'errmsg': 'boom'}
+        return chunk(*range(from_date, to_date + 1, H))
+
+    client.get_ohlc_data = get_ohlc_data
+    windows = split_range(0, 30 * H - 1, Resolution.ONE_HOUR, 10)
+    assert len(windows) == 3
+
+    with pytest.raises(RequestException, match='boom'):
+        client.download_ohlc_data('BTCTMN', Resolution.ONE_HOUR, 0, 30 * H - 1, max_bars=10)
+
+    client.get_ohlc_data = lambda symbol, resolution, from_date, to_date: chunk(*range(from_date, to_date + 1, H))
+    udf = client.download_ohlc_data('BTCTMN', Resolution.ONE_HOUR, 0, 30 * H - 1, max_bars=10)
+    assert udf['t'] == list(range(0, 30 * H, H))
+
+    client.close_connection()
@@ -0,0 +1,206 @@
+import asyncio
+import threading
+from types import SimpleNamespace
+
+import pytest
+
+np = pytest.importorskip('numpy')
+
+from wallex.enums import SIDE_BUY, SIDE_SELL  # noqa: E402
+from wallex.orderbook import LiveOrderBook, OrderBook  # noqa: E402
+
+
+BIDS = [{'price': 99.0, 'quantity': 1.0}, {'price': 98.0, 'quantity': 2.0}]
+ASKS = [{'price': 101.0, 'quantity': 1.0}, {'price': 102.0, 'quantity': 3.0}]
+SNAPSHOT = {'result': {'bid': BIDS, 'ask': ASKS}}
+CROSSED = [{'price': 105.0, 'quantity': 1.0}]
+
+
+def small_book():
+    # bids 100 x1, 99 x2, 98 x3 and asks 101 x1, 102 x2, 104 x4, given out of order
+    return OrderBook.from_levels([(98, 3), (100, 1), (99, 2)], [{'price': 104, 'quantity': 4}, (101, 1), (102, 2)])
+
+
+def test_top_of_book():
+    book = small_book()
+    assert (book.best_bid, book.best_ask) == (100.0, 101.0)
+    assert book.spread == 1.0 and book.mid == 100.5
+
+
+def test_imbalance():
+    book = small_book()
+    assert book.imbalance() == pytest.approx((6 - 7) / 13)
+    assert book.imbalance(levels=2) == 0.0
+    assert book.imbalance(levels=100) == book.imbalance()
+
+
+def test_market_order_pricing():
+    book = small_book()
+
+    assert book.cost(SIDE_BUY, 2) == 203.0
+    assert book.vwap(SIDE_BUY, 2) == 101.5
+    assert book.price_for_depth(SIDE_BUY, 2) == 102.0
+    assert book.slippage(SIDE_BUY, 2) == pytest.approx(0.5 / 101)
+
+    assert book.cost(SIDE_SELL, 4) == 396.0
+    assert book.vwap(SIDE_SELL, 4) == 99.0
+    assert book.price_for_depth(SIDE_SELL, 4) == 98.0
+    assert book.slippage(SIDE_SELL, 4) == pytest.approx(0.01)
+
+
+def test_fills_that_exhaust_a_side():
+    book = small_book()
+
+    # the whole side still fills, a hair more does not
+    assert book.cost(SIDE_BUY, 7) == 721.0 and book.price_for_depth(SIDE_BUY, 7) == 104.0
+    assert np.isnan(book.cost(SIDE_BUY, 7.5)) and np.isnan(book.vwap(SIDE_BUY, 7.5))
+    assert np.isnan(book.price_for_depth(SIDE_BUY, 7.5)) and np.isnan(book.slippage(SIDE_BUY, 7.5))
+    assert book.vwap(SIDE_SELL, 6) == pytest.approx(592 / 6)
+    assert np.isnan(book.vwap(SIDE_SELL, 6.01))
+
+    np.testing.assert_array_equal(book.vwap(SIDE_BUY, [1, 2, 8]), [101.0, 101.5, np.nan])
+    np.testing.assert_array_equal(book.price_for_depth(SIDE_SELL, [0.5, 3, 7]), [100.0, 99.0, np.nan])
+
+
+def test_liquidity_up_to_a_price():
+    book = small_book()
+    assert book.liquidity(SIDE_BUY, 102) == 3.0
+    assert book.liquidity(SIDE_BUY, 100) == 0.0
+    assert book.liquidity(SIDE_SELL, 99) == 3.0
+    assert book.liquidity(SIDE_SELL, 50) == 6.0
+
+
+def test_empty_side():
+    book = OrderBook.from_levels([(100, 1)], [])
+    assert np.isnan(book.best_ask) and np.isnan(book.spread)
+    assert np.isnan(book.vwap(SIDE_BUY, 1)) and np.isnan(book.price_for_depth(SIDE_BUY, 1))
+    assert book.imbalance() == 1.0
+    with pytest.raises(ValueError):
+        book.vwap('hold', 1)
+
+
+class FakeSocket:
+    """
+    ``WallexWebsocket`` stand-in: one handler per event, called from a "socket thread".
+    """
+
+    def __init__(self):
+        self._sio = SimpleNamespace(handlers={'/': {}})
+        self.subscribed = []
+
+    def on(self, event, callback):
+        self._sio.handlers['/'][event] = callback
+
+    def subscribe(self, channel):
+        self.subscribed.append(channel)
+
+    def fire(self, event, *args):
+        thread = threading.Thread(target=self._sio.handlers['/'][event], args=args)
+        thread.start()
+        thread.join(5)
+
+
+class BlockingClient:
+    def __init__(self, response=SNAPSHOT):
+        self.response = response
+        self.release = threading.Event()
+        self.calls = 0
+
+    def get_orderbook(self, symbol):
+        self.calls += 1
+        assert self.release.wait(5)
+        if isinstance(self.response, Exception):
+            raise self.response
+        return self.response
+
+
+def test_sync_resync_does_not_block_the_socket_thread():
+    client = BlockingClient()
+    book = LiveOrderBook('BTCTMN', client=client)
+    book.seed(SNAPSHOT)
+    ws = FakeSocket()
+    book.attach(ws)
+
+    # a crossing update: the REST call is still blocked, yet the handler returned and the book took the update
+    ws.fire('Broadcaster', 'BTCTMN@buyDepth', CROSSED)
+    assert book.needs_resync and book.best_bid == 105.0 and client.calls == 1
+
+    future = book.resync(force=True)
+    assert future is None, 'one snapshot at a time'
+
+    client.release.set()
+    for _ in range(100):
+        if not book.needs_resync:
+            break
+        threading.Event().wait(0.01)
+    assert not book.needs_resync
+    assert book.top == (99.0, 1.0, 101.0, 1.0)
+
+
+def test_failed_snapshot_is_logged_and_keeps_the_book_stale(caplog):
+    client = BlockingClient(ConnectionError('down'))
+    client.release.set()
+    book = LiveOrderBook('BTCTMN', client=client, min_resync_interval=0)
+
+    assert book.resync().result(5) is False
+    assert book.needs_resync
+    assert 'BTCTMN depth snapshot failed' in caplog.text
+
+    client.response = SNAPSHOT
+    assert book.resync().result(5) is True
+    assert not book.needs_resync
+
+
+def test_async_resync_from_a_socket_thread_runs_on_the_client_loop():
+    class AsyncClient:
+        def __init__(self):
+            self.loops = []
+
+        async def get_orderbook(self, symbol):
+            self.loops.append(asyncio.get_running_loop())
+            return SNAPSHOT
+
+    async def run():
+        client = AsyncClient()
+        book = LiveOrderBook('BTCTMN', client=client)
+        book.seed(SNAPSHOT)
+        ws = FakeSocket()
+        book.attach(ws)
+
+        ws.fire('Broadcaster', 'BTCTMN@sellDepth', [{'price': 90.0, 'quantity': 1.0}])
+        for _ in range(100):
+            if client.loops and not book.needs_resync:
+                break
+            await asyncio.sleep(0.01)
+
+        assert client.loops == [asyncio.get_running_loop()]
+        assert book.top == (99.0, 1.0, 101.0, 1.0)
+
+    asyncio.run(run())
+
+
+def test_async_resync_without_a_loop_keeps_the_book_stale():
+    class AsyncClient:
+        async def get_orderbook(self, symbol):
+            return SNAPSHOT
+
+    book = LiveOrderBook('BTCTMN', client=AsyncClient())
+    assert book.resync() is None
+    assert book.needs_resync
+
+
+def test_books_share_a_socket_with_existing_handlers():
+    ws = FakeSocket()
+    seen = []
+    ws.on('Broadcaster', lambda channel, data: seen.append(channel))
+
+    btc, eth = LiveOrderBook('BTCTMN'), LiveOrderBook('ETHTMN')
+    btc.attach(ws)
+    eth.attach(ws)
+
+    ws.fire('Broadcaster', 'BTCTMN@buyDepth', BIDS)
+    ws.fire('Broadcaster', 'ETHTMN@sellDepth', ASKS)
+
+    assert seen == ['BTCTMN@buyDepth', 'ETHTMN@sellDepth']
+    assert btc.best_bid == 99.0 and eth.best_ask == 101.0
+    assert ws.subscribed == btc.channels + eth.channels
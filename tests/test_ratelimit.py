@@ -0,0 +1,77 @@
+import pytest
+
+from wallex.clients.ratelimit import RateLimiter, TokenBucket
+
+
+class Clock:
+    def __init__(self):
+        self.now = 100.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock():
+    return Clock()
+
+
+def test_burst_then_wait(clock):
+    bucket = TokenBucket(10, clock=clock)
+    assert [bucket.reserve() for _ in range(10)] == [0.0] * 10
+    assert bucket.reserve() == pytest.approx(0.1)
+    assert bucket.reserve() == pytest.approx(0.2)
+
+
+def test_concurrent_429s_decrease_the_rate_once(clock):
+    bucket = TokenBucket(16, clock=clock)
+    sent = clock()
+
+    clock.now += 0.05
+    for _ in range(5):
+        bucket.throttled(sent=sent)
+    assert bucket.rate == 8
+
+    # a request sent after that decrease is throttled again
+    clock.now += 0.05
+    sent = clock()
+    clock.now += 0.05
+    bucket.throttled(sent=sent)
+    bucket.throttled(sent=sent)
+    assert bucket.rate == 4
+
+
+def test_decrease_stops_at_min_rate(clock):
+    bucket = TokenBucket(16, min_rate=3, clock=clock)
+    for _ in range(10):
+        bucket.throttled()
+    assert bucket.rate == 3
+
+
+def test_throttle_drops_the_burst_and_honours_retry_after(clock):
+    bucket = TokenBucket(10, clock=clock)
+    bucket.throttled(retry_after=2)
+    assert bucket.reserve() == pytest.approx(2)
+
+
+def test_additive_increase_back_to_max_rate(clock):
+    bucket = TokenBucket(10, increase_step=1, clock=clock)
+    bucket.throttled()
+    assert bucket.rate == 5
+
+    for expected in (6, 7, 8, 9, 10, 10):
+        bucket.succeeded()
+        assert bucket.rate == expected
+
+
+def test_limiter_feedback_uses_the_send_time(clock):
+    limiter = RateLimiter(public_rate=20, signed_rate=4, clock=clock)
+    sent = [limiter.acquire(False) for _ in range(3)]
+
+    for at in sent:
+        limiter.feedback(False, 429, sent=at)
+    assert limiter.public.rate == 10
+    assert limiter.signed.rate == 4
+
+    limiter.feedback(False, 200)
+    assert limiter.public.rate == pytest.approx(10.2)
@@ -0,0 +1,59 @@
+import asyncio
+
+import pytest
+
+pytest.importorskip('socketio')
+
+from socketio import packet as socketio_packet  # noqa: E402
+
+from wallex.websocket import AsyncWebsocket, ReplayWebsocket, SessionRecorder, read_session  # noqa: E402
+
+
+def frames(channel, data):
+    encoded = socketio_packet.Packet(socketio_packet.EVENT, data=['Broadcaster', channel, data]).encode()
+    return encoded if isinstance(encoded, list) else [encoded]
+
+
+def test_recorded_session_replays_every_decodable_message(tmp_path):
+    path = str(tmp_path / 'session.rec')
+    recorded = [
+        *frames('BTCTMN@trade', {'price': '1'}),
+        socketio_packet.Packet(socketio_packet.EVENT, data=['other', 1]).encode(),
+        '2["Broadcaster","BTCTMN@trade",',
+        *frames('BTCTMN@trade', b'\x00\xff binary'),
+        *frames('ETHTMN@trade', {'price': '2'}),
+        *frames('BTCTMN@trade', {'price': '3'}),
+    ]
+    with SessionRecorder(path, flush_every=2) as recorder:
+        for number, raw in enumerate(recorded):
+            recorder.write(1000.0 + number, raw)
+
+    assert [raw for _, raw in read_session(path)] == recorded
+
+    async def consume(stream):
+        return [message.data async for message in stream]
+
+    async def run():
+        async with ReplayWebsocket(path, speed=None) as ws:
+            consumer = asyncio.ensure_future(consume(ws.stream('BTCTMN@trade')))
+            assert await asyncio.wait_for(ws.wait('BTCTMN@trade'), 5) == 4
+            assert await consumer == [{'price': '1'}, b'\x00\xff binary', {'price': '3'}]
+            assert ws.skipped == 1
+
+    asyncio.run(run())
+
+
+def test_disconnect_writes_out_recorded_packets(tmp_path):
+    path = str(tmp_path / 'session.rec')
+
+    async def run():
+        with SessionRecorder(path) as recorder:
+            ws = AsyncWebsocket(recorder=recorder)
+            for raw in frames('BTCTMN@trade', {'price': '1'}):
+                await ws._sio._handle_eio_message(raw)
+            assert list(read_session(path)) == []
+
+            await ws.disconnect()
+            assert [raw for _, raw in read_session(path)] == frames('BTCTMN@trade', {'price': '1'})
+
+    asyncio.run(run())
@@ -0,0 +1,91 @@
+import pytest
+
+np = pytest.importorskip('numpy')
+
+from wallex.enums import Resolution  # noqa: E402
+from wallex.models import OHLC  # noqa: E402
+from wallex.resample import WEEK_ORIGIN, Resampler, bucket_start, resample  # noqa: E402
+
+
+H = Resolution.ONE_HOUR.seconds
+D = 24 * H
+
+
+def hourly(from_hour, to_hour):
+    hours = np.arange(from_hour, to_hour)
+    return OHLC(
+        hours * H, hours + 0.5, hours + 1.0, hours - 1.0, hours + 0.25, np.ones(len(hours))
+    )
+
+
+def assert_same(left, right):
+    for a, b in zip(left.columns().values(), right.columns().values()):
+        np.testing.assert_array_equal(a, b)
+
+
+def test_buckets_are_aligned_to_the_origin():
+    assert bucket_start(5 * H + 10, '4H') == 4 * H
+    assert bucket_start(WEEK_ORIGIN + 3 * D, '1W') == WEEK_ORIGIN
+    assert bucket_start(WEEK_ORIGIN - 1, '1W') == WEEK_ORIGIN - 7 * D
+
+    # starts mid-bucket: the first bucket holds hours 2 and 3 only
+    bars = resample(hourly(2, 12), '4H')
+    assert bars.time.tolist() == [0, 4 * H, 8 * H]
+    assert bars.open.tolist() == [2.5, 4.5, 8.5]
+    assert bars.high.tolist() == [4.0, 8.0, 12.0]
+    assert bars.low.tolist() == [1.0, 3.0, 7.0]
+    assert bars.close.tolist() == [3.25, 7.25, 11.25]
+    assert bars.volume.tolist() == [2.0, 4.0, 4.0]
+
+
+def test_partial_last_bucket_aggregates_what_there_is():
+    bars = resample(hourly(0, 6), '4H')
+    assert bars.time.tolist() == [0, 4 * H]
+    assert bars.close.tolist() == [3.25, 5.25]
+    assert bars.volume.tolist() == [4.0, 2.0]
+
+
+def test_gaps_leave_out_empty_buckets():
+    source = hourly(0, 12)
+    keep = (source.time < 4 * H) | (source.time >= 8 * H)
+    bars = resample(OHLC(*(column[keep] for column in source.columns().values())), '4H')
+    assert bars.time.tolist() == [0, 8 * H]
+
+
+def test_update_then_close_matches_a_full_resample():
+    resampler = Resampler('4H')
+
+    changed = resampler.update(hourly(0, 3))
+    assert changed.time.tolist() == [0]
+    assert len(resampler.closed) == 0 and resampler.current.close.tolist() == [2.25]
+
+    closed = resampler.closed
+    for hour in range(3, 300):
+        changed = resampler.update(hourly(hour, hour + 1))
+        # the forming bucket was returned before and is replaced, a new one follows on a boundary
+        assert changed.time[0] == bucket_start(hour * H, '4H') - (4 * H if hour % 4 == 0 else 0)
+
+    assert_same(resampler.bars, resample(hourly(0, 300), '4H'))
+    assert len(resampler.closed) == 74 and resampler.current.time.tolist() == [296 * H]
+    assert len(closed) == 0
+
+    # the forming source bar sent again with newer values wins
+    resampler.update(OHLC(np.array([299 * H]), *(np.array([value]) for value in (1.0, 500.0, 0.0, 42.0, 9.0))))
+    assert resampler.current.close.tolist() == [42.0]
+    assert resampler.current.high.tolist() == [500.0]
+    assert resampler.current.volume.tolist() == [12.0]
+
+    with pytest.raises(ValueError):
+        resampler.update(hourly(200, 201))
+
+
+def test_closed_views_survive_growth():
+    resampler = Resampler('4H')
+    resampler.update(hourly(0, 9))
+    closed = resampler.closed
+    assert closed.time.tolist() == [0, 4 * H]
+    assert not closed.close.flags.writeable
+
+    resampler.update(hourly(9, 1000))
+    assert closed.time.tolist() == [0, 4 * H]
+    assert_same(resampler.bars, resample(hourly(0, 1000), '4H'))
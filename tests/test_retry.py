@@ -0,0 +1,92 @@
+import random
+
+import pytest
+import requests
+
+from wallex import Client
+from wallex.clients.retry import RetryPolicy
+from wallex.exceptions import APIException
+
+
+class FakeResponse:
+    def __init__(self, headers=None):
+        self.headers = headers or {}
+
+
+def api_error(status_code, headers=None):
+    return APIException(FakeResponse(headers), status_code, b'{"message": "busy"}')
+
+
+def test_backoff_doubles_up_to_the_cap_and_jitter_stays_below_it():
+    policy = RetryPolicy(backoff_base=0.1, backoff_max=0.5, jitter=False)
+    assert [policy.backoff(attempt) for attempt in range(1, 6)] == pytest.approx([0.1, 0.2, 0.4, 0.5, 0.5])
+
+    jittered = RetryPolicy(backoff_base=0.1, backoff_max=0.5)
+    random.seed(7)
+    for attempt in range(1, 6):
+        delays = [jittered.backoff(attempt) for _ in range(200)]
+        assert 0 <= min(delays) and max(delays) <= min(0.5, 0.1 * 2 ** (attempt - 1))
+        assert len(set(delays)) > 1
+
+
+def test_retry_after_is_a_lower_bound_of_the_backoff():
+    policy = RetryPolicy(backoff_base=0.1, jitter=False)
+    assert policy.backoff(1, api_error(429, {'Retry-After': '3'})) == 3.0
+    # only a 429 carries a usable Retry-After, a bad value falls back to the backoff
+    assert policy.backoff(1, api_error(503, {'Retry-After': '3'})) == pytest.approx(0.1)
+    assert policy.backoff(1, api_error(429, {'Retry-After': 'soon'})) == pytest.approx(0.1)
+    assert policy.backoff(1, api_error(429)) == pytest.approx(0.1)
+
+
+def test_only_transient_errors_are_retried_up_to_max_attempts():
+    policy = RetryPolicy(max_attempts=3)
+    assert policy.should_retry(api_error(503), 1, 'v1/markets')
+    assert policy.should_retry(requests.ConnectionError(), 2, 'v1/markets')
+    assert not policy.should_retry(api_error(503), 3, 'v1/markets')
+    assert not policy.should_retry(api_error(400), 1, 'v1/markets')
+    assert not policy.should_retry(ValueError(), 1, 'v1/markets')
+
+
+def test_budget_is_spent_per_endpoint_and_refills_after_the_window():
+    now = [0.0]
+    policy = RetryPolicy(max_attempts=10, budget=2, budget_window=60, budgets={'v1/depth': 1}, clock=lambda: now[0])
+
+    assert [policy.should_retry(api_error(503), 1, 'v1/markets') for _ in range(3)] == [True, True, False]
+    assert policy.should_retry(api_error(503), 1, 'v1/depth')
+    assert not policy.should_retry(api_error(503), 1, 'v1/depth')
+    # an exhausted endpoint does not use up the others
+    assert policy.should_retry(api_error(503), 1, 'v1/currencies/stats')
+
+    now[0] = 60.0
+    assert policy.should_retry(api_error(503), 1, 'v1/markets')
+
+
+def test_idempotency():
+    policy = RetryPolicy()
+    assert policy.is_idempotent('get', 'v1/markets', {})
+    assert policy.is_idempotent('post', 'account/orders', {'json': {'client_id': 'abc'}})
+    assert not policy.is_idempotent('post', 'account/orders', {'json': {'symbol': 'BTCTMN'}})
+    assert not policy.is_idempotent('post', 'account/orders', {})
+    assert policy.is_idempotent('post', 'account/crypto-withdrawal', {'json': {'client_unique_id': 'w1'}})
+    assert not policy.is_idempotent('delete', 'account/orders', {'json': {'clientOrderId': 'abc'}})
+
+
+def test_client_sends_an_order_without_client_id_once():
+    client = Client(retry_policy=RetryPolicy(max_attempts=5, backoff_base=0))
+    calls = []
+
+    def request(method, uri, signed, **kwargs):
+        calls.append(kwargs['json'])
+        raise api_error(503)
+
+    client._request = request
+    with pytest.raises(APIException):
+        client._request_with_retry('post', 'account/orders', 'uri', True, json={'symbol': 'BTCTMN'})
+    assert len(calls) == 1
+
+    calls.clear()
+    with pytest.raises(APIException):
+        client._request_with_retry('post', 'account/orders', 'uri', True, json={'client_id': 'abc'})
+    assert len(calls) == 5
+
+    client.close_connection()
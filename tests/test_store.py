@@ -0,0 +1,116 @@
+import pytest
+
+numpy = pytest.importorskip('numpy')
+
+from wallex.enums import Resolution  # noqa: E402
+from wallex.store import CandleStore  # noqa: E402
+
+
+HOUR = Resolution.ONE_HOUR
+H = HOUR.seconds
+NOW = 1000 * H
+
+
+def bars(from_date, to_date):
+    times = list(range(from_date + (-from_date) % H, to_date + 1, H))
+    if not times:
+        return {'s': 'no_data'}
+    return {
+        's': 'ok', 't': times, 'o': [float(x) for x in times], 'h': [x + 1.0 for x in times],
+        'l': [x - 1.0 for x in times], 'c': [float(x) for x in times], 'v': [1.0] * len(times),
+    }
+
+
+class FakeClient:
+    def __init__(self):
+        self.downloads = []
+
+    def download_ohlc_data(self, symbol, resolution, from_date, to_date):
+        self.downloads.append((from_date, to_date))
+        return bars(from_date, to_date)
+
+
+@pytest.fixture
+def store(tmp_path):
+    return CandleStore(str(tmp_path), clock=lambda: NOW)
+
+
+def test_request_after_held_range_fetches_the_gap(store):
+    client = FakeClient()
+    store.load(client, 'BTCTMN', HOUR, 10 * H, 20 * H)
+    assert store.covered('BTCTMN', HOUR) == (10 * H, 20 * H)
+
+    udf = store.load(client, 'BTCTMN', HOUR, 50 * H, 60 * H)
+    assert client.downloads[-1] == (20 * H + 1, 60 * H)
+    assert store.covered('BTCTMN', HOUR) == (10 * H, 60 * H)
+    assert udf['t'] == list(range(50 * H, 60 * H + 1, H))
+    assert store.read('BTCTMN', HOUR)['t'] == list(range(10 * H, 60 * H + 1, H))
+
+
+def test_request_before_held_range_fetches_the_gap(store):
+    client = FakeClient()
+    store.load(client, 'BTCTMN', HOUR, 50 * H, 60 * H)
+
+    store.load(client, 'BTCTMN', HOUR, 10 * H, 20 * H)
+    assert client.downloads[-1] == (10 * H, 50 * H - 1)
+    assert store.covered('BTCTMN', HOUR) == (10 * H, 60 * H)
+    assert store.read('BTCTMN', HOUR)['t'] == list(range(10 * H, 60 * H + 1, H))
+
+
+def test_held_range_is_not_downloaded_again(store):
+    client = FakeClient()
+    store.load(client, 'BTCTMN', HOUR, 10 * H, 60 * H)
+    store.load(client, 'BTCTMN', HOUR, 20 * H, 40 * H)
+    assert client.downloads == [(10 * H, 60 * H)]
+
+
+def test_store_refuses_a_range_leaving_a_hole(store):
+    store.store('BTCTMN', HOUR, bars(10 * H, 20 * H), 10 * H, 20 * H)
+    with pytest.raises(ValueError):
+        store.store('BTCTMN', HOUR, bars(50 * H, 60 * H), 50 * H, 60 * H)
+    with pytest.raises(ValueError):
+        store.store('BTCTMN', HOUR, bars(0, 5 * H), 0, 5 * H)
+    assert store.covered('BTCTMN', HOUR) == (10 * H, 20 * H)
+
+
+def test_unsettled_tail_is_not_covered(store):
+    store.store('BTCTMN', HOUR, bars(NOW - 10 * H, NOW), NOW - 10 * H, NOW)
+    assert store.covered('BTCTMN', HOUR) == (NOW - 10 * H, NOW - H)
+    assert store.missing('BTCTMN', HOUR, NOW - 10 * H, NOW) == [(NOW - H + 1, NOW)]
+
+
+def test_views_survive_updates(store):
+    store.store('BTCTMN', HOUR, bars(10 * H, 20 * H), 10 * H, 20 * H)
+    views = store.columns('BTCTMN', HOUR)
+    before = views['t'].tolist()
+
+    # replaces the last bar and appends, then rewrites for the head
+    store.store('BTCTMN', HOUR, bars(20 * H, 40 * H), 20 * H, 40 * H)
+    store.store('BTCTMN', HOUR, bars(0, 10 * H - 1), 0, 10 * H - 1)
+
+    assert views['t'].tolist() == before
+    assert store.read('BTCTMN', HOUR)['t'] == list(range(0, 40 * H + 1, H))
+
+
+def test_read_ohlc_is_a_stable_snapshot(store):
+    store.store('BTCTMN', HOUR, bars(10 * H, 20 * H), 10 * H, 20 * H)
+    ohlc = store.read_ohlc('BTCTMN', HOUR)
+    close = ohlc.close.copy()
+
+    store.store('BTCTMN', HOUR, {**bars(20 * H, 30 * H), 'c': [0.0] * 11}, 20 * H, 30 * H)
+
+    numpy.testing.assert_array_equal(ohlc.close, close)
+    assert not ohlc.close.flags.writeable
+    assert store.read_ohlc('BTCTMN', HOUR).close[-1] == 0.0
+
+
+def test_columns_can_be_read_without_mapping(store, monkeypatch):
+    # the Windows code path, where mapped files can not be replaced
+    monkeypatch.setattr(CandleStore, 'MMAP', False)
+    store.store('BTCTMN', HOUR, bars(10 * H, 20 * H), 10 * H, 20 * H)
+    views = store.columns('BTCTMN', HOUR)
+
+    store.store('BTCTMN', HOUR, bars(20 * H, 30 * H), 20 * H, 30 * H)
+    assert views['t'].tolist() == list(range(10 * H, 20 * H + 1, H))
+    assert views['t'].readonly
+    assert store.read('BTCTMN', HOUR)['t'] == list(range(10 * H, 30 * H + 1, H))
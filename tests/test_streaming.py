@@ -0,0 +1,48 @@
+import asyncio
+import io
+import json
+
+import pytest
+
+from wallex import streaming
+from wallex.clients.base import BaseClient
+
+
+pytestmark = pytest.mark.skipif(not streaming.is_available(), reason='needs ijson')
+
+
+MARKETS = {'success': True, 'result': {'symbols': {'BTCTMN': {'price': 1.5}, 'ETHTMN': {'price': [1, {'a': 2}]}}}}
+
+
+class AsyncReader:
+    def __init__(self, data: bytes):
+        self._file = io.BytesIO(data)
+
+    async def read(self, size=-1):
+        return self._file.read(size)
+
+
+def test_project_keeps_only_the_asked_keys():
+    document = streaming.project(io.BytesIO(json.dumps(MARKETS).encode()), 'result.symbols', ['ETHTMN'])
+    assert document == {'success': True, 'result': {'symbols': {'ETHTMN': {'price': [1, {'a': 2}]}}}}
+
+
+def test_missing_keys_match_pick():
+    raw = json.dumps(MARKETS).encode()
+    picked = BaseClient._pick(MARKETS['result']['symbols'], 'XRPTMN')
+
+    assert streaming.project(io.BytesIO(raw), 'result.symbols', ['XRPTMN'])['result']['symbols'] == picked
+    projected = asyncio.run(streaming.project_async(AsyncReader(raw), 'result.symbols', ['XRPTMN', 'BTCTMN']))
+    assert projected['result']['symbols'] == {'XRPTMN': None, 'BTCTMN': {'price': 1.5}}
+
+
+def test_document_without_the_prefix_is_left_alone():
+    raw = json.dumps({'success': False, 'message': 'maintenance'}).encode()
+    assert streaming.project(io.BytesIO(raw), 'result.symbols', ['BTCTMN']) == {
+        'success': False, 'message': 'maintenance'
+    }
+
+
+def test_invalid_json_raises_value_error():
+    with pytest.raises(ValueError):
+        streaming.project(io.BytesIO(b'{"result": {"symbols": {'), 'result.symbols', ['BTCTMN'])
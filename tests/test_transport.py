@@ -0,0 +1,54 @@
+import asyncio
+import socket
+
+from wallex import AsyncClient, Client
+from wallex.clients.transport import ConnectorConfig, SocketOptionsAdapter, TransportConfig
+
+
+def test_client_session_is_pooled_as_configured():
+    config = TransportConfig(pool_connections=3, pool_maxsize=7, pool_block=True, max_retries=2)
+    client = Client(transport=config)
+
+    adapter = client.session.get_adapter('https://api.wallex.ir')
+    assert isinstance(adapter, SocketOptionsAdapter)
+    assert client.session.get_adapter('http://api.wallex.ir') is adapter
+    assert adapter.max_retries.total == 2
+
+    pool_kw = adapter.poolmanager.connection_pool_kw
+    assert (pool_kw['maxsize'], pool_kw['block']) == (7, True)
+    assert adapter.poolmanager.pools._maxsize == 3
+    assert (socket.IPPROTO_TCP, socket.TCP_NODELAY, 1) in pool_kw['socket_options']
+    assert (socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1) in pool_kw['socket_options']
+    assert client.session.headers['Connection'] == 'keep-alive'
+    # the thread pool is sized after the connection pool
+    assert client.max_workers == 7
+
+    client.close_connection()
+
+
+def test_without_keep_alive_connections_are_closed():
+    config = TransportConfig(keep_alive=False, tcp_nodelay=False)
+    session = config.build_session()
+
+    assert session.headers['Connection'] == 'close'
+    assert config.socket_options() == []
+    session.close()
+
+
+def test_async_client_connector_is_built_from_the_config():
+    async def run():
+        config = ConnectorConfig(limit=5, limit_per_host=2, keepalive_timeout=12, use_dns_cache=False, use_aiodns=False)
+        client = AsyncClient(connector=config)
+        connector = client._get_session().connector
+
+        assert (connector.limit, connector.limit_per_host) == (5, 2)
+        assert connector._keepalive_timeout == 12
+        assert not connector.use_dns_cache and not connector.force_close
+        await client.close_connection()
+
+        client = AsyncClient(connector=ConnectorConfig(force_close=True, connector_kwargs={'limit': 9}))
+        connector = client._get_session().connector
+        assert connector.force_close and connector.limit == 9
+        await client.close_connection()
+
+    asyncio.run(run())
@@ -0,0 +1,177 @@
+import asyncio
+from datetime import datetime
+
+import pytest
+
+pytest.importorskip('socketio')
+
+from wallex.websocket.client import AsyncWebsocket  # noqa: E402
+
+
+CHANNEL = 'BTCTMN@trade'
+
+
+def trade(second):
+    return {'timestamp': f'2026-01-01T00:00:{second:02d}Z', 'price': '100', 'quantity': '1', 'isBuyOrder': True}
+
+
+def offline(ws):
+    """
+    Let ``ws`` subscribe and reconnect without a server.
+    """
+
+    async def connect(url, **kwargs):
+        ws._sio.connected = True
+
+    async def emit(event, data=None, **kwargs):
+        pass
+
+    ws._sio.connect = connect
+    ws._sio.emit = emit
+    ws._sio.connected = True
+    return ws
+
+
+async def read(ws, count):
+    messages = []
+    async for message in ws.stream(CHANNEL):
+        messages.append(message)
+        if len(messages) == count:
+            return messages
+
+
+def test_backfill_is_delivered_before_live_trades_received_during_it():
+    class Client:
+        def __init__(self, ws):
+            self.ws = ws
+
+        async def get_recent_trades(self, symbol, page=1):
+            # a live trade arrives while the backfill is being fetched
+            await self.ws._on_broadcast(CHANNEL, trade(3))
+            return {'result': {'latestTrades': [trade(3), trade(2), trade(1), trade(0)]}}
+
+    async def run():
+        ws = offline(AsyncWebsocket(backoff_base=0))
+        ws.client = Client(ws)
+        reader = asyncio.ensure_future(read(ws, 4))
+        await asyncio.sleep(0)
+
+        await ws._on_broadcast(CHANNEL, trade(0))
+        await ws._reconnect({CHANNEL: datetime.fromisoformat('2026-01-01T00:00:00+00:00')})
+        await ws._on_broadcast(CHANNEL, trade(4))
+
+        messages = await asyncio.wait_for(reader, 5)
+        assert [message.data['timestamp'][-3:-1] for message in messages] == ['00', '01', '02', '03']
+        assert [message.backfilled for message in messages] == [False, True, True, True]
+        assert ws.backfilled == 3 and not ws._held
+
+    asyncio.run(run())
+
+
+def test_disconnect_handlers_run_and_broadcast_handlers_are_refused():
+    async def run():
+        ws = AsyncWebsocket(reconnect=False)
+        calls = []
+        ws.on('disconnect', lambda: calls.append('sync'))
+
+        async def handler():
+            calls.append('async')
+
+        ws.on('disconnect', handler)
+        await ws._on_disconnect()
+        assert calls == ['sync', 'async']
+
+        with pytest.raises(ValueError, match='stream()'):
+            ws.on(AsyncWebsocket.BROADCAST_EVENT, handler)
+
+    asyncio.run(run())
+
+
+def test_every_handler_of_an_event_is_called_until_removed():
+    async def run():
+        ws = AsyncWebsocket()
+        handlers = {}
+        ws._sio.on = handlers.__setitem__
+
+        calls = []
+        first = lambda: calls.append('first')  # noqa: E731
+
+        async def second():
+            calls.append('second')
+
+        ws.on('connect', first)
+        ws.on('connect', second)
+        assert list(handlers) == ['connect']
+
+        await handlers['connect']()
+        ws.off('connect', first)
+        await handlers['connect']()
+        assert calls == ['first', 'second', 'second']
+
+    asyncio.run(run())
+
+
+def test_following_books_share_the_connect_event():
+    pytest.importorskip('numpy')
+    from wallex.orderbook import LiveOrderBook
+
+    async def run():
+        ws = offline(AsyncWebsocket())
+        books = [LiveOrderBook('BTCTMN'), LiveOrderBook('ETHTMN')]
+        for book in books:
+            book.needs_resync = False
+        followers = [asyncio.ensure_future(book.follow(ws)) for book in books]
+        await asyncio.sleep(0)
+
+        await ws._trigger('connect')
+        assert all(book.needs_resync for book in books)
+
+        await ws.disconnect()
+        await asyncio.wait_for(asyncio.gather(*followers), 5)
+        assert not ws._callbacks['connect']
+
+    asyncio.run(run())
+
+
+
+
+def test_block_keeps_concurrent_messages_in_arrival_order():
+    from wallex.websocket import BaseWebsocket, BufferPolicy, Message
+
+    class Source(BaseWebsocket):
+        connected = True
+
+        async def connect(self):
+            pass
+
+        async def disconnect(self):
+            self._close_streams()
+
+        async def emit(self, event, data):
+            pass
+
+    async def run():
+        ws = Source()
+        stream = ws.stream('BTCTMN@trade', maxsize=1, policy=BufferPolicy.BLOCK)
+        reading = asyncio.ensure_future(stream.__anext__())
+        await asyncio.sleep(0)
+
+        # one task per message, as a socket handing each message to its own handler task would
+        def publish(number):
+            return asyncio.ensure_future(ws._publish(Message('BTCTMN@trade', number, 0.0)))
+
+        publishers = [publish(0), publish(1), publish(2)]
+        received = [(await reading).data]
+        for number in range(3, 6):
+            await asyncio.sleep(0)
+            # arrives just as room is made for the message waiting before it
+            publishers.append(publish(number))
+            received.append((await stream.__anext__()).data)
+        while len(received) < 6:
+            received.append((await stream.__anext__()).data)
+
+        await asyncio.gather(*publishers)
+        await stream.aclose()
+        assert received == [0, 1, 2, 3, 4, 5]
+
+    asyncio.run(run())